@@ -0,0 +1,268 @@
+import cv2
+import numpy as np
+import os
+
+
+AGE_RANGES = [(16, "0-15"), (23, "16-22"), (31, "23-30"), (41, "31-40"), (51, "41-50"), (61, "51-60")]
+
+EMOTION_MAPPING = {
+    'angry': 'Angry',
+    'disgust': 'Disgust',
+    'fear': 'Fear',
+    'happy': 'Happy',
+    'sad': 'Sad',
+    'surprise': 'Surprised',
+    'neutral': 'Neutral'
+}
+
+RACE_MAPPING = {
+    'asian': 'Asian',
+    'indian': 'Asian',
+    'black': 'African',
+    'white': 'European',
+    'middle eastern': 'Middle Eastern',
+    'latino hispanic': 'Hispanic'
+}
+
+# Ordre des sorties des modèles d'attributs DeepFace
+GENDER_LABELS = ["Woman", "Man"]
+EMOTION_LABELS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+RACE_LABELS = ["asian", "indian", "black", "white", "middle eastern", "latino hispanic"]
+
+ONNX_MODEL_FILES = {
+    'age': 'age.onnx',
+    'gender': 'gender.onnx',
+    'emotion': 'emotion.onnx',
+    'race': 'race.onnx'
+}
+
+
+def get_actions(analyze_age=True, analyze_gender=True, analyze_emotion=True, analyze_ethnicity=True):
+    """Convertit les options d'analyse en actions DeepFace"""
+    actions = []
+    if analyze_age: actions.append('age')
+    if analyze_gender: actions.append('gender')
+    if analyze_emotion: actions.append('emotion')
+    if analyze_ethnicity: actions.append('race')
+    return actions
+
+
+def map_analysis_result(result, analyze_age=True, analyze_gender=True, analyze_emotion=True,
+                        analyze_ethnicity=True):
+    """Convertit une sortie brute (format DeepFace) en attributs affichés
+    Args:
+        result: Dictionnaire {'age': float, 'gender': {...}, 'emotion': {...}, 'race': {...}}
+        analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity: Attributs demandés
+    Returns:
+        Dictionnaire des attributs (tranche d'âge, genre, émotion, ethnie)
+    """
+    analysis = {}
+
+    if isinstance(result, list):
+        result = result[0]
+
+    if analyze_age and 'age' in result:
+        age_value = int(result['age'])
+        analysis['age_estimation'] = next(
+            (label for upper, label in AGE_RANGES if age_value < upper), "60+"
+        )
+
+    if analyze_gender and 'gender' in result:
+        gender_data = result['gender']
+        if isinstance(gender_data, dict):
+            analysis['gender_classification'] = max(gender_data.items(), key=lambda x: x[1])[0]
+        else:
+            analysis['gender_classification'] = str(gender_data)
+
+    if analyze_emotion and 'emotion' in result:
+        emotion_data = result['emotion']
+        if isinstance(emotion_data, dict):
+            dominant_emotion = max(emotion_data.items(), key=lambda x: x[1])[0]
+            analysis['emotion'] = EMOTION_MAPPING.get(dominant_emotion.lower(), dominant_emotion.title())
+        else:
+            analysis['emotion'] = str(emotion_data)
+
+    if analyze_ethnicity and 'race' in result:
+        race_data = result['race']
+        if isinstance(race_data, dict):
+            dominant_race = max(race_data.items(), key=lambda x: x[1])[0]
+            analysis['ethnicity_estimation'] = RACE_MAPPING.get(dominant_race.lower(), dominant_race.title())
+        else:
+            analysis['ethnicity_estimation'] = str(race_data)
+
+    return analysis
+
+
+class DeepFaceAnalyzer:
+    """Analyse des attributs par DeepFace (TensorFlow)"""
+
+    name = 'deepface'
+
+    def analyze(self, face_image, actions):
+        """Analyse un visage recadré
+        Args:
+            face_image: Visage BGR redimensionné (224x224)
+            actions: Actions DeepFace ('age', 'gender', 'emotion', 'race')
+        Returns:
+            Sortie brute au format DeepFace
+        """
+        from deepface import DeepFace
+
+        result = DeepFace.analyze(face_image, actions=actions,
+                                  enforce_detection=False, silent=True)
+        return result[0] if isinstance(result, list) else result
+
+    def analyze_batch(self, face_images, actions):
+        """Analyse plusieurs visages (DeepFace.analyze traite une image à la fois)
+        Returns:
+            Liste des sorties brutes, dans l'ordre des visages (None pour un visage en erreur)
+        """
+        results = []
+        for face_image in face_images:
+            # Une erreur sur un visage ne fait pas échouer les autres visages du lot
+            try:
+                results.append(self.analyze(face_image, actions))
+            except Exception as e:
+                print(f"Erreur analyse visage du lot: {str(e)}")
+                results.append(None)
+        return results
+
+    def warmup(self, actions):
+        """Charge les modèles des actions demandées"""
+        dummy_img = np.zeros((224, 224, 3), dtype=np.uint8)
+        self.analyze(dummy_img, actions)
+
+
+class ONNXAttributeAnalyzer:
+    """Analyse des attributs par ONNX Runtime sur CPU (modèles DeepFace exportés, int8 optionnel)
+
+    Les modèles sont produits une fois par export_attribute_models.py. Le visage détecté est
+    passé directement aux modèles (pas de re-détection dans le recadrage comme DeepFace.analyze).
+    """
+
+    name = 'onnx'
+
+    def __init__(self, model_dir=None, quantized=None):
+        """Initialise l'analyseur
+        Args:
+            model_dir: Dossier des modèles (ATTRIBUTE_MODELS_DIR, défaut models/attributes)
+            quantized: Utilise les modèles int8 *.int8.onnx (ATTRIBUTE_ONNX_QUANTIZED, défaut false)
+        """
+        self.model_dir = model_dir or get_attribute_models_dir()
+        if quantized is None:
+            quantized = os.getenv('ATTRIBUTE_ONNX_QUANTIZED', 'false').lower() in ('1', 'true', 'yes', 'on')
+        self.quantized = quantized
+        self._sessions = {}
+
+    @staticmethod
+    def model_path(model_dir, action, quantized=False):
+        """Chemin du modèle ONNX d'une action"""
+        filename = ONNX_MODEL_FILES[action]
+        if quantized:
+            filename = filename.replace('.onnx', '.int8.onnx')
+        return os.path.join(model_dir, filename)
+
+    @classmethod
+    def is_available(cls, model_dir=None, quantized=False):
+        """Indique si onnxruntime et les modèles exportés sont présents"""
+        try:
+            import onnxruntime
+        except ImportError:
+            return False
+        model_dir = model_dir or get_attribute_models_dir()
+        return all(os.path.exists(cls.model_path(model_dir, action, quantized)) for action in ONNX_MODEL_FILES)
+
+    def _session(self, action):
+        """Session ONNX Runtime d'une action (chargée au premier usage)"""
+        session = self._sessions.get(action)
+        if session is None:
+            import onnxruntime
+            from thread_budget import get_onnx_session_options
+
+            session = onnxruntime.InferenceSession(
+                self.model_path(self.model_dir, action, self.quantized),
+                sess_options=get_onnx_session_options(),
+                providers=['CPUExecutionProvider']
+            )
+            self._sessions[action] = session
+        return session
+
+    def _predict(self, action, tensor):
+        session = self._session(action)
+        return session.run(None, {session.get_inputs()[0].name: tensor})[0]
+
+    def analyze(self, face_image, actions):
+        """Analyse un visage recadré
+        Args:
+            face_image: Visage BGR redimensionné (224x224)
+            actions: Actions DeepFace ('age', 'gender', 'emotion', 'race')
+        Returns:
+            Sortie brute au format DeepFace
+        """
+        return self.analyze_batch([face_image], actions)[0]
+
+    def analyze_batch(self, face_images, actions):
+        """Analyse plusieurs visages en une inférence par modèle
+        Args:
+            face_images: Visages BGR recadrés
+            actions: Actions DeepFace ('age', 'gender', 'emotion', 'race')
+        Returns:
+            Liste des sorties brutes au format DeepFace, dans l'ordre des visages
+        """
+        # Même prétraitement que DeepFace: BGR normalisé [0, 1], 224x224 (48x48 niveaux de gris pour l'émotion)
+        faces = np.stack([
+            cv2.resize(face_image, (224, 224)).astype(np.float32) / 255.0 for face_image in face_images
+        ])
+        results = [{} for _ in face_images]
+
+        if 'age' in actions:
+            probabilities = self._predict('age', faces)
+            ages = probabilities @ np.arange(probabilities.shape[1])
+            for result, age in zip(results, ages):
+                result['age'] = float(age)
+
+        if 'gender' in actions:
+            for result, probabilities in zip(results, self._predict('gender', faces)):
+                result['gender'] = {label: float(p) * 100 for label, p in zip(GENDER_LABELS, probabilities)}
+
+        if 'race' in actions:
+            for result, probabilities in zip(results, self._predict('race', faces)):
+                result['race'] = {label: float(p) * 100 for label, p in zip(RACE_LABELS, probabilities)}
+
+        if 'emotion' in actions:
+            grays = np.stack([cv2.resize(cv2.cvtColor(face, cv2.COLOR_BGR2GRAY), (48, 48)) for face in faces])
+            for result, probabilities in zip(results, self._predict('emotion', grays[..., np.newaxis])):
+                result['emotion'] = {label: float(p) * 100 for label, p in zip(EMOTION_LABELS, probabilities)}
+
+        return results
+
+    def warmup(self, actions):
+        """Charge les sessions des actions demandées"""
+        dummy_img = np.zeros((224, 224, 3), dtype=np.uint8)
+        self.analyze(dummy_img, actions)
+
+
+def get_attribute_models_dir():
+    """Dossier des modèles d'attributs exportés (ATTRIBUTE_MODELS_DIR, défaut models/attributes)"""
+    return os.getenv('ATTRIBUTE_MODELS_DIR',
+                     os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'attributes'))
+
+
+def create_attribute_analyzer(name=None):
+    """Instancie l'analyseur d'attributs, avec repli sur DeepFace
+    Args:
+        name: 'deepface' ou 'onnx' (défaut ATTRIBUTE_ANALYZER)
+    Returns:
+        DeepFaceAnalyzer ou ONNXAttributeAnalyzer
+    """
+    name = name or os.getenv('ATTRIBUTE_ANALYZER', DeepFaceAnalyzer.name)
+
+    if name == ONNXAttributeAnalyzer.name:
+        analyzer = ONNXAttributeAnalyzer()
+        if ONNXAttributeAnalyzer.is_available(analyzer.model_dir, analyzer.quantized):
+            return analyzer
+        print(f"Avertissement: modèles ONNX ou onnxruntime introuvables ({analyzer.model_dir}), utilisation de DeepFace")
+    elif name != DeepFaceAnalyzer.name:
+        print(f"Avertissement: analyseur d'attributs inconnu '{name}', utilisation de DeepFace")
+
+    return DeepFaceAnalyzer()
@@ -0,0 +1,129 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AttributeAnalysisPool:
+    """Pool d'analyse d'attributs asynchrone: les appels DeepFace sortent du chemin critique
+
+    Une seule analyse en vol par track (dé-duplication), une file bornée (rejet au-delà),
+    et annulation lorsque le track expire.
+    """
+
+    def __init__(self, analyze_fn, max_workers=None, max_pending=None):
+        """Initialise le pool
+        Args:
+            analyze_fn: Fonction d'analyse (image, bbox, age, genre, émotion, ethnie) -> dict
+            max_workers: Nombre de threads d'analyse (ATTRIBUTE_POOL_WORKERS, défaut 1)
+            max_pending: Nombre maximal d'analyses en attente ou en cours (ATTRIBUTE_POOL_MAX_PENDING, défaut 8)
+        """
+        self.analyze_fn = analyze_fn
+        self.max_workers = max_workers or int(os.getenv('ATTRIBUTE_POOL_WORKERS', '1'))
+        self.max_pending = max_pending or int(os.getenv('ATTRIBUTE_POOL_MAX_PENDING', '8'))
+
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                           thread_name_prefix="AttributeAnalysis")
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._results = {}
+
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    def submit(self, track_id, face_image, analyze_age=True, analyze_gender=True,
+               analyze_emotion=True, analyze_ethnicity=True):
+        """Soumet l'analyse d'un visage
+        Args:
+            track_id: Identifiant du track
+            face_image: Région du visage (copie indépendante de la frame)
+            analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity: Attributs demandés
+        Returns:
+            True si la tâche a été acceptée, False si déjà en cours ou file pleine
+        """
+        with self._lock:
+            if track_id in self._pending or track_id in self._results:
+                return False
+            if len(self._pending) >= self.max_pending:
+                self.rejected += 1
+                return False
+
+            h, w = face_image.shape[:2]
+            future = self.executor.submit(
+                self.analyze_fn, face_image, (0, 0, w, h),
+                analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity
+            )
+            self._pending[track_id] = future
+            self.submitted += 1
+
+        future.add_done_callback(lambda f, track_id=track_id: self._on_done(track_id, f))
+        return True
+
+    def _on_done(self, track_id, future):
+        """Range le résultat d'une analyse terminée (ignoré si le track a été annulé)"""
+        with self._lock:
+            if self._pending.get(track_id) is not future:
+                return
+            del self._pending[track_id]
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.failed += 1
+                return
+            self._results[track_id] = future.result()
+            self.completed += 1
+
+    def is_pending(self, track_id):
+        """Indique si une analyse est en attente ou prête à être récupérée pour ce track"""
+        with self._lock:
+            return track_id in self._pending or track_id in self._results
+
+    def cancel(self, track_id):
+        """Annule l'analyse d'un track expiré (seule une analyse pas encore démarrée est comptée)"""
+        with self._lock:
+            future = self._pending.pop(track_id, None)
+            self._results.pop(track_id, None)
+        if future is not None and future.cancel():
+            self.cancelled += 1
+
+    def poll_results(self, track_ids=None):
+        """Retourne et vide les résultats disponibles
+        Args:
+            track_ids: Conteneur des tracks concernés (pool partagé entre plusieurs détecteurs)
+        Returns:
+            Dictionnaire track_id -> attributs analysés (None si le visage n'était pas analysable)
+        """
+        with self._lock:
+            if track_ids is None:
+                results, self._results = self._results, {}
+                return results
+            results = {track_id: analysis for track_id, analysis in self._results.items() if track_id in track_ids}
+            for track_id in results:
+                del self._results[track_id]
+            return results
+
+    def get_stats(self):
+        """Statistiques du pool"""
+        with self._lock:
+            in_flight = len(self._pending)
+        return {
+            'workers': self.max_workers,
+            'in_flight': in_flight,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'cancelled': self.cancelled,
+            'failed': self.failed
+        }
+
+    def shutdown(self):
+        """Arrête le pool en abandonnant les analyses non démarrées"""
+        with self._lock:
+            futures = list(self._pending.values())
+            self._pending.clear()
+            self._results.clear()
+        for future in futures:
+            future.cancel()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark des backends de détection de visages
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import cv2
+
+from detector_backends import BACKENDS, available_backends, create_detector_backend
+
+
+def load_ground_truth(clip_path, ground_truth_path=None):
+    """Charge les annotations d'un clip
+    Format JSON: {"numéro de frame": [[x, y, w, h], ...], ...}
+    Args:
+        clip_path: Chemin du clip (annotations recherchées dans <clip>.json par défaut)
+        ground_truth_path: Chemin explicite des annotations
+    Returns:
+        Dictionnaire frame -> liste de boîtes, ou None sans annotations
+    """
+    path = ground_truth_path or os.path.splitext(clip_path)[0] + '.json'
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return {int(frame): [tuple(box) for box in boxes] for frame, boxes in json.load(f).items()}
+
+
+def iou(box_a, box_b):
+    """Intersection sur union de deux boîtes (x, y, w, h)"""
+    ax, ay, aw, ah = box_a
+    bx, by, bw, bh = box_b
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = inter_w * inter_h
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match_detections(predicted, expected, iou_threshold=0.5):
+    """Associe gloutonnement les détections aux annotations
+    Returns:
+        Tuple (vrais positifs, faux positifs, faux négatifs)
+    """
+    unmatched = list(expected)
+    true_positives = 0
+    for box in predicted:
+        best = max(unmatched, key=lambda gt: iou(box, gt), default=None)
+        if best is not None and iou(box, best) >= iou_threshold:
+            unmatched.remove(best)
+            true_positives += 1
+    return true_positives, len(predicted) - true_positives, len(unmatched)
+
+
+def benchmark_backend(backend_name, clip_path, ground_truth=None, max_frames=300, frame_step=1, use_gpu=False):
+    """Mesure un backend sur un clip
+    Args:
+        backend_name: Nom du backend
+        clip_path: Chemin du clip
+        ground_truth: Annotations (load_ground_truth)
+        max_frames: Nombre maximal de frames évaluées
+        frame_step: Évalue une frame sur frame_step
+        use_gpu: Exécution CUDA pour les backends DNN
+    Returns:
+        Dictionnaire de métriques
+    """
+    backend = create_detector_backend(backend_name, use_gpu)
+    cap = cv2.VideoCapture(clip_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Impossible d'ouvrir {clip_path}")
+
+    frame_number = 0
+    evaluated = 0
+    total_faces = 0
+    detect_time = 0.0
+    true_positives = false_positives = false_negatives = 0
+
+    # Une frame de chauffe: initialisation des réseaux hors mesure
+    ret, frame = cap.read()
+    if ret:
+        backend.detect(frame)
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    while evaluated < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        if frame_number % frame_step == 0:
+            start = time.perf_counter()
+            faces = backend.detect(frame)
+            detect_time += time.perf_counter() - start
+
+            evaluated += 1
+            total_faces += len(faces)
+
+            if ground_truth is not None:
+                tp, fp, fn = match_detections(faces, ground_truth.get(frame_number, []))
+                true_positives += tp
+                false_positives += fp
+                false_negatives += fn
+
+        frame_number += 1
+
+    cap.release()
+
+    result = {
+        'clip': os.path.basename(clip_path),
+        'backend': backend.name,
+        'frames': evaluated,
+        'fps': evaluated / detect_time if detect_time > 0 else 0.0,
+        'ms_per_frame': detect_time * 1000 / evaluated if evaluated else 0.0,
+        'faces_per_frame': total_faces / evaluated if evaluated else 0.0,
+        'precision': None,
+        'recall': None
+    }
+    if ground_truth is not None:
+        predicted = true_positives + false_positives
+        expected = true_positives + false_negatives
+        result['precision'] = true_positives / predicted if predicted else 1.0
+        result['recall'] = true_positives / expected if expected else 1.0
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare les backends de détection (fps / précision) sur les mêmes clips")
+    parser.add_argument('clips', nargs='+', help="Clips vidéo à évaluer")
+    parser.add_argument('--backends', nargs='+', default=None, choices=list(BACKENDS),
+                        help="Backends à comparer (défaut: tous les backends disponibles)")
+    parser.add_argument('--ground-truth', default=None,
+                        help="Annotations JSON (un seul clip; défaut: <clip>.json s'il existe)")
+    parser.add_argument('--max-frames', type=int, default=300, help="Frames évaluées par clip")
+    parser.add_argument('--frame-step', type=int, default=1, help="Évalue une frame sur N")
+    parser.add_argument('--gpu', action='store_true', help="Exécution CUDA des backends DNN")
+    parser.add_argument('--csv', default=None, help="Fichier CSV de sortie")
+    args = parser.parse_args()
+
+    backends = args.backends or available_backends()
+    missing = [name for name in backends if not BACKENDS[name].is_available()]
+    if missing:
+        print(f"Modèles introuvables pour: {', '.join(missing)}")
+        sys.exit(1)
+
+    results = []
+    for clip_path in args.clips:
+        ground_truth = load_ground_truth(clip_path, args.ground_truth if len(args.clips) == 1 else None)
+        for backend_name in backends:
+            result = benchmark_backend(
+                backend_name, clip_path, ground_truth,
+                args.max_frames, args.frame_step, args.gpu
+            )
+            results.append(result)
+
+    print(f"{'Clip':<30} {'Backend':<8} {'Frames':>7} {'FPS':>8} {'ms/frame':>9} {'Visages/f':>10} {'Précision':>10} {'Rappel':>8}")
+    for result in results:
+        precision = f"{result['precision']:.3f}" if result['precision'] is not None else "-"
+        recall = f"{result['recall']:.3f}" if result['recall'] is not None else "-"
+        print(f"{result['clip'][:30]:<30} {result['backend']:<8} {result['frames']:>7} {result['fps']:>8.1f} "
+              f"{result['ms_per_frame']:>9.2f} {result['faces_per_frame']:>10.2f} {precision:>10} {recall:>8}")
+
+    if args.csv:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0].keys()), delimiter=';')
+            writer.writeheader()
+            writer.writerows(results)
+        print(f"\nRésultats sauvegardés: {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
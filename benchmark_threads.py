@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark du budget de threads CPU
+
+Mesure le débit de détection d'un pool de processus selon le nombre de threads accordé à chaque
+processus: part du budget (gouverné) ou tous les cœurs pour chacun (sursouscrit, comportement
+par défaut des bibliothèques).
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import cv2
+
+from detector_backends import BACKENDS, available_backends
+from thread_budget import ThreadBudget
+
+
+def _benchmark_process(clip_path, backend_name, threads, index, processes, max_frames, barrier, results):
+    """Processus mesuré: décode sa part des frames puis les détecte, départ synchronisé"""
+    from detector_backends import create_detector_backend
+    from thread_budget import apply_thread_settings
+
+    apply_thread_settings(threads)
+    backend = create_detector_backend(backend_name)
+
+    cap = cv2.VideoCapture(clip_path)
+    frames = []
+    frame_number = 0
+    while frame_number < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame_number % processes == index:
+            frames.append(frame)
+        frame_number += 1
+    cap.release()
+
+    # Chauffe hors mesure
+    if frames:
+        backend.detect(frames[0])
+
+    barrier.wait()
+    start = time.perf_counter()
+    for frame in frames:
+        backend.detect(frame)
+    results.put((len(frames), start, time.perf_counter()))
+
+
+def benchmark_configuration(clip_path, backend_name, processes, threads, max_frames=200):
+    """Mesure un pool de processus de détection
+    Args:
+        clip_path: Clip vidéo
+        backend_name: Backend de détection
+        processes: Processus de détection
+        threads: Threads de calcul par processus
+        max_frames: Frames du clip réparties entre les processus
+    Returns:
+        Dictionnaire de métriques
+    """
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(processes)
+    results = context.Queue()
+    workers = [
+        context.Process(target=_benchmark_process,
+                        args=(clip_path, backend_name, threads, index, processes, max_frames, barrier, results))
+        for index in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    measures = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    frames = sum(measure[0] for measure in measures)
+    elapsed = max(measure[2] for measure in measures) - min(measure[1] for measure in measures)
+    return {
+        'backend': backend_name,
+        'processes': processes,
+        'threads_per_process': threads,
+        'total_threads': processes * threads,
+        'frames': frames,
+        'fps': frames / elapsed if elapsed > 0 else 0.0,
+        'ms_per_frame': elapsed * 1000 / frames if frames else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare les débits de détection gouverné et sursouscrit")
+    parser.add_argument('clip', help="Clip vidéo")
+    parser.add_argument('--backend', default=None, choices=list(BACKENDS),
+                        help="Backend de détection (défaut: premier backend disponible)")
+    parser.add_argument('--processes', nargs='+', type=int, default=[1, 2, 4], help="Tailles de pool mesurées")
+    parser.add_argument('--max-frames', type=int, default=200, help="Frames du clip mesurées")
+    parser.add_argument('--budget', type=int, default=None, help="Budget de threads (défaut CPU_THREAD_BUDGET)")
+    parser.add_argument('--csv', default=None, help="Fichier CSV de sortie")
+    parser.add_argument('--json', default=None, help="Fichier JSON de sortie")
+    args = parser.parse_args()
+
+    backend_name = args.backend or available_backends()[0]
+    if not BACKENDS[backend_name].is_available():
+        print(f"Modèle introuvable pour: {backend_name}")
+        sys.exit(1)
+    if not os.path.exists(args.clip):
+        print(f"Clip introuvable: {args.clip}")
+        sys.exit(1)
+
+    budget = ThreadBudget(total=args.budget)
+    cores = os.cpu_count() or 1
+    print(f"Budget CPU: {budget.describe()} ({cores} cœur(s) logique(s))")
+
+    results = []
+    for processes in args.processes:
+        for policy, threads in (('gouverné', budget.threads_per_worker(processes)), ('sursouscrit', cores)):
+            result = benchmark_configuration(args.clip, backend_name, processes, threads, args.max_frames)
+            result['policy'] = policy
+            results.append(result)
+
+    print(f"{'Politique':<12} {'Processus':>9} {'Threads/p':>9} {'Total':>6} {'Frames':>7} {'FPS':>8} {'ms/frame':>9}")
+    for result in results:
+        print(f"{result['policy']:<12} {result['processes']:>9} {result['threads_per_process']:>9} "
+              f"{result['total_threads']:>6} {result['frames']:>7} {result['fps']:>8.1f} {result['ms_per_frame']:>9.2f}")
+
+    if args.csv:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0].keys()), delimiter=';')
+            writer.writeheader()
+            writer.writerows(results)
+        print(f"\nRésultats sauvegardés: {args.csv}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Résultats sauvegardés: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
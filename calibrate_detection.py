@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Calibration des paramètres de détection Haar sur un clip de référence annoté
+
+Balaye scaleFactor, minNeighbors, minSize et la résolution de détection, mesure fps, précision
+et rappel, puis enregistre des profils nommés chargeables par les deux modes.
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+
+import cv2
+
+from benchmark_detectors import load_ground_truth, match_detections
+from detection_profiles import get_profiles_path, save_profile
+from detector_backends import HaarCascadeBackend
+
+
+def load_frames(clip_path, max_frames=150, frame_step=1):
+    """Décode une fois les frames évaluées (le balayage ne mesure que la détection)
+    Returns:
+        Liste de tuples (numéro de frame, frame BGR)
+    """
+    cap = cv2.VideoCapture(clip_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Impossible d'ouvrir {clip_path}")
+
+    frames = []
+    frame_number = 0
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame_number % frame_step == 0:
+            frames.append((frame_number, frame))
+        frame_number += 1
+    cap.release()
+    return frames
+
+
+def evaluate_params(params, frames, ground_truth, iou_threshold=0.5):
+    """Mesure un jeu de paramètres
+    Args:
+        params: Paramètres du backend Haar
+        frames: Frames décodées (load_frames)
+        ground_truth: Annotations (load_ground_truth)
+        iou_threshold: IoU minimale d'une détection correcte
+    Returns:
+        Dictionnaire (paramètres, fps, précision, rappel)
+    """
+    backend = HaarCascadeBackend(**params)
+    true_positives = false_positives = false_negatives = 0
+    detect_time = 0.0
+
+    for frame_number, frame in frames:
+        start = time.perf_counter()
+        faces = backend.detect(frame)
+        detect_time += time.perf_counter() - start
+
+        tp, fp, fn = match_detections(faces, ground_truth.get(frame_number, []), iou_threshold)
+        true_positives += tp
+        false_positives += fp
+        false_negatives += fn
+
+    predicted = true_positives + false_positives
+    expected = true_positives + false_negatives
+    return {
+        **params,
+        'fps': len(frames) / detect_time if detect_time > 0 else 0.0,
+        'precision': true_positives / predicted if predicted else 1.0,
+        'recall': true_positives / expected if expected else 1.0
+    }
+
+
+def select_profiles(results, recall_target):
+    """Choisit les profils à enregistrer
+    Returns:
+        Tuple (plus rapide atteignant le rappel cible ou None, meilleur rappel)
+    """
+    eligible = [result for result in results if result['recall'] >= recall_target]
+    fast = max(eligible, key=lambda r: (r['fps'], r['precision'])) if eligible else None
+    accurate = max(results, key=lambda r: (r['recall'], r['precision'], r['fps']))
+    return fast, accurate
+
+
+def profile_params(result):
+    return {key: result[key] for key in HaarCascadeBackend.PARAMETERS if result.get(key)}
+
+
+def profile_metrics(result):
+    return {key: round(result[key], 4) for key in ('fps', 'precision', 'recall')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibre les paramètres de détection Haar sur un clip annoté")
+    parser.add_argument('clip', help="Clip de référence")
+    parser.add_argument('--ground-truth', default=None, help="Annotations JSON (défaut: <clip>.json)")
+    parser.add_argument('--max-frames', type=int, default=150, help="Frames évaluées")
+    parser.add_argument('--frame-step', type=int, default=1, help="Évalue une frame sur N")
+    parser.add_argument('--recall-target', type=float, default=0.8, help="Rappel minimal du profil rapide")
+    parser.add_argument('--scale-factors', type=float, nargs='+', default=[1.05, 1.1, 1.2, 1.3])
+    parser.add_argument('--min-neighbors', type=int, nargs='+', default=[3, 4, 5, 6, 8])
+    parser.add_argument('--min-sizes', type=int, nargs='+', default=[20, 30, 40, 60])
+    parser.add_argument('--detection-widths', type=int, nargs='+', default=[0, 640, 480, 320],
+                        help="Largeurs de l'image de détection (0 = résolution d'origine)")
+    parser.add_argument('--fast-name', default='fast', help="Nom du profil rapide")
+    parser.add_argument('--accurate-name', default='accurate', help="Nom du profil précis")
+    parser.add_argument('--no-save', action='store_true', help="N'enregistre pas les profils")
+    parser.add_argument('--csv', default=None, help="Résultats complets du balayage (CSV)")
+    args = parser.parse_args()
+
+    ground_truth = load_ground_truth(args.clip, args.ground_truth)
+    if ground_truth is None:
+        print("Annotations introuvables: la calibration nécessite <clip>.json ou --ground-truth")
+        sys.exit(1)
+
+    frames = load_frames(args.clip, args.max_frames, args.frame_step)
+    if not frames:
+        print(f"Aucune frame lue dans {args.clip}")
+        sys.exit(1)
+
+    grid = list(itertools.product(args.scale_factors, args.min_neighbors, args.min_sizes, args.detection_widths))
+    print(f"{len(frames)} frames, {len(grid)} combinaisons évaluées")
+
+    results = []
+    for index, (scale_factor, min_neighbors, min_size, detection_width) in enumerate(grid, start=1):
+        params = {
+            'scale_factor': scale_factor,
+            'min_neighbors': min_neighbors,
+            'min_size': min_size,
+            'detection_width': detection_width or None
+        }
+        results.append(evaluate_params(params, frames, ground_truth))
+        if index % 20 == 0 or index == len(grid):
+            print(f"  {index}/{len(grid)}")
+
+    print(f"\n{'scale':>6} {'voisins':>8} {'min':>5} {'largeur':>8} {'FPS':>8} {'Précision':>10} {'Rappel':>8}")
+    for result in sorted(results, key=lambda r: (-r['recall'], -r['fps']))[:15]:
+        width = result['detection_width'] or "orig."
+        print(f"{result['scale_factor']:>6.2f} {result['min_neighbors']:>8} {result['min_size']:>5} {width:>8} "
+              f"{result['fps']:>8.1f} {result['precision']:>10.3f} {result['recall']:>8.3f}")
+
+    fast, accurate = select_profiles(results, args.recall_target)
+    if fast is None:
+        print(f"\nAucun réglage n'atteint le rappel cible {args.recall_target:.2f}")
+    else:
+        print(f"\nProfil '{args.fast_name}': {profile_params(fast)} -> {profile_metrics(fast)}")
+    print(f"Profil '{args.accurate_name}': {profile_params(accurate)} -> {profile_metrics(accurate)}")
+
+    if not args.no_save:
+        source = os.path.basename(args.clip)
+        if fast is not None:
+            save_profile(args.fast_name, HaarCascadeBackend.name, profile_params(fast), profile_metrics(fast), source)
+        save_profile(args.accurate_name, HaarCascadeBackend.name, profile_params(accurate),
+                     profile_metrics(accurate), source)
+        print(f"Profils enregistrés: {get_profiles_path()}")
+
+    if args.csv:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0].keys()), delimiter=';')
+            writer.writeheader()
+            writer.writerows(results)
+        print(f"Résultats sauvegardés: {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
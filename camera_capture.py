@@ -0,0 +1,484 @@
+import cv2
+import numpy as np
+import threading
+import time
+import requests
+from collections import deque
+
+
+class MultipartJPEGParser:
+    """Parseur incrémental d'un flux multipart/x-mixed-replace (MJPEG)"""
+
+    def __init__(self, boundary=None, max_buffer_size=8 * 1024 * 1024):
+        """Initialise le parseur
+        Args:
+            boundary: Frontière multipart (avec ou sans tirets) ou None pour un parsing par marqueurs JPEG
+            max_buffer_size: Taille maximale du tampon avant purge (flux corrompu)
+        """
+        self.boundary = b'--' + boundary.strip().strip('"').lstrip('-').encode() if boundary else None
+        self.max_buffer_size = max_buffer_size
+        self.buffer = bytearray()
+        self._expected_length = None
+        self._in_part = False
+
+    def feed(self, data):
+        """Ajoute des octets au tampon et extrait les images JPEG complètes
+        Args:
+            data: Octets reçus du flux
+        Returns:
+            Liste des images JPEG complètes (bytes), dans l'ordre de réception
+        """
+        self.buffer.extend(data)
+        if self.boundary:
+            frames = self._parse_boundary()
+        else:
+            frames = self._parse_markers()
+
+        if len(self.buffer) > self.max_buffer_size:
+            self.buffer.clear()
+            self._expected_length = None
+            self._in_part = False
+        return frames
+
+    def _parse_boundary(self):
+        """Découpe le tampon selon la frontière multipart et les en-têtes Content-Length"""
+        frames = []
+        while True:
+            if not self._in_part:
+                start = self.buffer.find(self.boundary)
+                if start < 0:
+                    # Conserver la fin du tampon: la frontière peut être coupée entre deux chunks
+                    keep = len(self.boundary) + 4
+                    if len(self.buffer) > keep:
+                        del self.buffer[:-keep]
+                    break
+                headers_end = self.buffer.find(b'\r\n\r\n', start)
+                if headers_end < 0:
+                    del self.buffer[:start]
+                    break
+                headers = bytes(self.buffer[start:headers_end]).decode('latin-1').lower()
+                self._expected_length = None
+                for line in headers.split('\r\n'):
+                    if line.startswith('content-length:'):
+                        try:
+                            self._expected_length = int(line.split(':', 1)[1].strip())
+                        except ValueError:
+                            self._expected_length = None
+                del self.buffer[:headers_end + 4]
+                self._in_part = True
+
+            if self._expected_length is not None:
+                if len(self.buffer) < self._expected_length:
+                    break
+                frames.append(bytes(self.buffer[:self._expected_length]))
+                del self.buffer[:self._expected_length]
+            else:
+                end = self.buffer.find(self.boundary)
+                if end < 0:
+                    break
+                frames.append(bytes(self.buffer[:end]).rstrip(b'\r\n'))
+                del self.buffer[:end]
+            self._in_part = False
+        return [frame for frame in frames if frame]
+
+    def _parse_markers(self):
+        """Découpe le tampon selon les marqueurs JPEG SOI (FFD8) / EOI (FFD9)"""
+        frames = []
+        while True:
+            start = self.buffer.find(b'\xff\xd8')
+            if start < 0:
+                if self.buffer[-1:] == b'\xff':
+                    del self.buffer[:-1]
+                else:
+                    self.buffer.clear()
+                break
+            end = self.buffer.find(b'\xff\xd9', start + 2)
+            if end < 0:
+                del self.buffer[:start]
+                break
+            frames.append(bytes(self.buffer[start:end + 2]))
+            del self.buffer[:end + 2]
+        return frames
+
+
+class MJPEGStreamReader:
+    """Lecteur MJPEG persistant: une connexion HTTP, parsing en arrière-plan, reconnexion avec backoff"""
+
+    def __init__(self, url, connect_timeout=3.0, read_timeout=5.0, chunk_size=16384,
+                 initial_backoff=0.5, max_backoff=8.0, snapshot_interval=0.03):
+        """Initialise le lecteur
+        Args:
+            url: URL du flux (MJPEG multipart ou image JPEG unique)
+            connect_timeout: Timeout de connexion (secondes)
+            read_timeout: Timeout de lecture entre deux chunks (secondes)
+            chunk_size: Taille des blocs lus sur la socket
+            initial_backoff: Délai initial avant reconnexion (secondes)
+            max_backoff: Délai maximal avant reconnexion (secondes)
+            snapshot_interval: Délai entre deux requêtes pour une URL d'image unique
+        """
+        self.url = url.strip()
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.chunk_size = chunk_size
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.snapshot_interval = snapshot_interval
+
+        self.session = requests.Session()
+        self.content_type = None
+        self.connected = False
+        self.last_error = None
+        self.frames_received = 0
+        self.reconnects = 0
+        self.last_frame_time = None
+
+        self._lock = threading.Lock()
+        self._new_frame = threading.Condition(self._lock)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._latest_jpeg = None
+        self._latest_seq = 0
+        self._decoded_seq = 0
+        self._decoded_frame = None
+
+    def start(self):
+        """Démarre le thread de lecture"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="MJPEGStreamReader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrête le thread de lecture et ferme la connexion"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.read_timeout + 1)
+        self._thread = None
+        self.connected = False
+        self.session.close()
+
+    def wait_for_frame(self, timeout=5.0):
+        """Attend la réception d'une première image
+        Args:
+            timeout: Délai maximal d'attente (secondes)
+        Returns:
+            True si une image est disponible
+        """
+        return self.wait_for_sequence(0, timeout) > 0
+
+    def wait_for_sequence(self, after_seq, timeout=1.0):
+        """Attend une image plus récente qu'un numéro de séquence donné
+        Args:
+            after_seq: Dernier numéro de séquence déjà traité
+            timeout: Délai maximal d'attente (secondes)
+        Returns:
+            Numéro de séquence courant (inchangé si aucune nouvelle image)
+        """
+        with self._new_frame:
+            self._new_frame.wait_for(lambda: self._latest_seq > after_seq, timeout)
+            return self._latest_seq
+
+    def read(self):
+        """Décode et retourne la dernière image reçue (les images intermédiaires sont ignorées)
+        Returns:
+            Tuple (succès, frame BGR)
+        """
+        with self._lock:
+            jpeg = self._latest_jpeg
+            seq = self._latest_seq
+
+        if jpeg is None:
+            return False, None
+
+        if seq != self._decoded_seq:
+            frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+            if frame is not None:
+                self._decoded_frame = frame
+                self._decoded_seq = seq
+
+        if self._decoded_frame is None:
+            return False, None
+        return True, self._decoded_frame.copy()
+
+    @property
+    def latest_sequence(self):
+        """Numéro de séquence de la dernière image reçue"""
+        with self._lock:
+            return self._latest_seq
+
+    def _publish(self, jpeg):
+        """Remplace l'image courante par la plus récente"""
+        with self._lock:
+            self._latest_jpeg = jpeg
+            self._latest_seq += 1
+            self.frames_received += 1
+            self.last_frame_time = time.time()
+            self._new_frame.notify_all()
+
+    def _run(self):
+        """Boucle de connexion / lecture avec reconnexion exponentielle"""
+        backoff = self.initial_backoff
+        first_attempt = True
+
+        while not self._stop_event.is_set():
+            if not first_attempt:
+                self.reconnects += 1
+            first_attempt = False
+
+            try:
+                with self.session.get(self.url, stream=True,
+                                      timeout=(self.connect_timeout, self.read_timeout)) as response:
+                    if response.status_code != 200:
+                        raise ConnectionError(f"Code HTTP {response.status_code}")
+
+                    self.content_type = response.headers.get('content-type', '')
+                    self.connected = True
+                    self.last_error = None
+
+                    if 'multipart' in self.content_type.lower():
+                        if self._read_multipart(response):
+                            backoff = self.initial_backoff
+                    else:
+                        content = response.content
+                        if content:
+                            self._publish(content)
+                            backoff = self.initial_backoff
+                        # URL d'image unique: on réutilise la connexion keep-alive de la session
+                        self._stop_event.wait(self.snapshot_interval)
+                        first_attempt = True
+                        continue
+
+            except Exception as e:
+                self.last_error = str(e)
+
+            self.connected = False
+            if self._stop_event.is_set():
+                break
+            self._stop_event.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _read_multipart(self, response):
+        """Lit le flux multipart jusqu'à déconnexion ou arrêt
+        Returns:
+            True si au moins une image a été reçue sur cette connexion
+        """
+        boundary = None
+        for param in self.content_type.split(';'):
+            param = param.strip()
+            if param.lower().startswith('boundary='):
+                boundary = param.split('=', 1)[1]
+
+        parser = MultipartJPEGParser(boundary)
+        received = False
+
+        # read1 retourne les octets disponibles sans attendre un bloc complet (latence minimale)
+        read1 = getattr(response.raw, 'read1', None)
+        if read1 is not None:
+            chunks = iter(lambda: read1(self.chunk_size), b'')
+        else:
+            chunks = response.iter_content(chunk_size=1024)
+
+        for chunk in chunks:
+            if self._stop_event.is_set():
+                break
+            if not chunk:
+                continue
+            frames = parser.feed(chunk)
+            if frames:
+                # Seule la plus récente est conservée: pas de décodage des images intermédiaires
+                self._publish(frames[-1])
+                received = True
+        return received
+
+
+class DroidCamCapture:
+    """Capture DroidCam via un flux MJPEG persistant"""
+
+    def __init__(self, url):
+        self.url = url.strip()
+        self.is_opened = False
+        self.reader = MJPEGStreamReader(self.url)
+        self._last_seq = 0
+
+    def open(self, timeout=5.0):
+        """Ouvre la connexion et attend une première image"""
+        self.reader.start()
+        self.is_opened = self.reader.wait_for_frame(timeout)
+        if not self.is_opened:
+            self.reader.stop()
+        return self.is_opened
+
+    def isOpened(self):
+        return self.is_opened
+
+    def read(self):
+        """Retourne la dernière frame reçue sans requête bloquante"""
+        if not self.is_opened:
+            return False, None
+        self._last_seq = self.reader.latest_sequence
+        return self.reader.read()
+
+    def wait_for_new_frame(self, timeout=1.0):
+        """Attend une frame non encore lue
+        Returns:
+            True si une nouvelle frame est disponible
+        """
+        return self.reader.wait_for_sequence(self._last_seq, timeout) > self._last_seq
+
+    def refresh_frame(self):
+        """Indique si le flux est toujours connecté (la lecture est continue)"""
+        return self.is_opened and self.reader.connected
+
+    @property
+    def last_error(self):
+        return self.reader.last_error
+
+    def set(self, prop, value):
+        pass
+
+    def release(self):
+        self.is_opened = False
+        self.reader.stop()
+
+
+class LatestFrameCapture:
+    """Capture continue sur un thread dédié avec tampon borné des frames les plus récentes
+
+    Enveloppe indifféremment cv2.VideoCapture ou DroidCamCapture: le thread vide en permanence
+    le tampon du pilote, et read() retourne immédiatement la frame la plus fraîche.
+    """
+
+    def __init__(self, source, buffer_size=1, recorder=None):
+        """Initialise la capture
+        Args:
+            source: Source ouverte exposant read(), isOpened() et release()
+            buffer_size: Nombre de frames conservées (1 = dernière frame uniquement)
+            recorder: SessionRecorder optionnel recevant chaque frame capturée
+        """
+        self.source = source
+        self.recorder = recorder
+        self.buffer = deque(maxlen=max(1, buffer_size))
+        self.frames_captured = 0
+        self.frames_consumed = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+        self.started_at = None
+
+        self._lock = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._sequence = 0
+        self._last_read_seq = 0
+
+    def start(self):
+        """Démarre le thread de capture"""
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="LatestFrameCapture", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        """Boucle de capture: lit la source aussi vite qu'elle produit"""
+        wait_for_new_frame = getattr(self.source, 'wait_for_new_frame', None)
+
+        while not self._stop_event.is_set():
+            if wait_for_new_frame is not None and not wait_for_new_frame(timeout=0.5):
+                continue
+
+            try:
+                ret, frame = self.source.read()
+            except Exception:
+                ret, frame = False, None
+
+            if not ret or frame is None:
+                self.read_failures += 1
+                self._stop_event.wait(0.01)
+                continue
+
+            captured_at = time.time()
+            if self.recorder:
+                self.recorder.write(frame, captured_at)
+            with self._lock:
+                self._sequence += 1
+                if len(self.buffer) == self.buffer.maxlen and self.buffer[0][1] > self._last_read_seq:
+                    self.frames_dropped += 1
+                self.buffer.append((frame, self._sequence, captured_at))
+                self.frames_captured += 1
+                self._lock.notify_all()
+
+    def read_latest(self, timeout=None):
+        """Retourne la frame la plus récente avec ses métadonnées
+        Args:
+            timeout: Délai d'attente si aucune nouvelle frame (None = ne pas attendre)
+        Returns:
+            Tuple (succès, frame, numéro de séquence, horodatage de capture)
+        """
+        with self._lock:
+            if timeout is not None:
+                self._lock.wait_for(lambda: self._sequence > self._last_read_seq, timeout)
+            if not self.buffer:
+                return False, None, 0, None
+
+            frame, seq, captured_at = self.buffer[-1]
+            if seq != self._last_read_seq:
+                # Les frames plus anciennes restées dans le tampon ne seront jamais analysées
+                self.frames_dropped += sum(1 for item in self.buffer if self._last_read_seq < item[1] < seq)
+                self.buffer.clear()
+                self.buffer.append((frame, seq, captured_at))
+                self.frames_consumed += 1
+                self._last_read_seq = seq
+            return True, frame, seq, captured_at
+
+    def read_buffered(self):
+        """Retourne et vide toutes les frames en attente, de la plus ancienne à la plus récente
+        Returns:
+            Liste de tuples (frame, numéro de séquence, horodatage de capture)
+        """
+        with self._lock:
+            frames = [item for item in self.buffer if item[1] > self._last_read_seq]
+            if frames:
+                self._last_read_seq = frames[-1][1]
+                self.frames_consumed += len(frames)
+            return frames
+
+    def read(self):
+        """Interface compatible cv2.VideoCapture
+        Returns:
+            Tuple (succès, frame)
+        """
+        ret, frame, _, _ = self.read_latest()
+        return ret, frame
+
+    def get_stats(self):
+        """Statistiques de capture
+        Returns:
+            Dictionnaire (frames capturées, consommées, perdues, fps de capture)
+        """
+        elapsed = time.time() - self.started_at if self.started_at else 0
+        return {
+            'frames_captured': self.frames_captured,
+            'frames_consumed': self.frames_consumed,
+            'frames_dropped': self.frames_dropped,
+            'read_failures': self.read_failures,
+            'capture_fps': self.frames_captured / elapsed if elapsed > 0 else 0.0
+        }
+
+    def isOpened(self):
+        return self.source.isOpened()
+
+    def set(self, prop, value):
+        return self.source.set(prop, value)
+
+    def release(self):
+        """Arrête le thread puis libère la source (et termine l'enregistrement)"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        self._thread = None
+        self.source.release()
+        if self.recorder:
+            self.recorder.close()
@@ -0,0 +1,192 @@
+import cv2
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+
+def compute_file_hash(file_obj, chunk_size=1024 * 1024):
+    """Calcule l'empreinte SHA-256 d'un fichier par blocs (sans le charger en mémoire)
+    Args:
+        file_obj: Chemin ou objet fichier binaire (ex: fichier uploadé Streamlit)
+        chunk_size: Taille des blocs lus
+    Returns:
+        Empreinte hexadécimale du contenu
+    """
+    digest = hashlib.sha256()
+
+    if isinstance(file_obj, (str, os.PathLike)):
+        with open(file_obj, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    position = file_obj.tell()
+    file_obj.seek(0)
+    for chunk in iter(lambda: file_obj.read(chunk_size), b''):
+        digest.update(chunk)
+    file_obj.seek(position)
+    return digest.hexdigest()
+
+
+def make_job_key(content_hash, params):
+    """Construit la clé d'une analyse: contenu de la vidéo + paramètres qui influent sur le résultat
+    Args:
+        content_hash: Empreinte du fichier vidéo
+        params: Dictionnaire des paramètres d'analyse
+    Returns:
+        Clé hexadécimale
+    """
+    serialized = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(f"{content_hash}:{serialized}".encode('utf-8')).hexdigest()[:32]
+
+
+def json_default(value):
+    """Sérialise les types numpy présents dans les détections et l'état du tracker (bbox, scores, descripteurs)"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+class AnalysisCheckpoint:
+    """Points de reprise d'une analyse vidéo longue
+
+    Un répertoire par analyse contient:
+    - detections.jsonl: détections ajoutées au fil des points de reprise
+    - state.json: état du tracker, frame de reprise et segments de vidéo annotée déjà écrits
+      (JSON et non pickle: un fichier déposé dans le répertoire ne peut pas exécuter de code)
+    - segment_XXXX.mp4: vidéo annotée découpée aux points de reprise (un mp4 n'est lisible
+      qu'une fois fermé, chaque segment est donc finalisé avant l'enregistrement de l'état)
+
+    L'état est écrit en dernier et de façon atomique: un arrêt brutal pendant une sauvegarde
+    laisse le point de reprise précédent intact.
+    """
+
+    def __init__(self, job_key, base_dir=None, interval_frames=None):
+        """Initialise le point de reprise
+        Args:
+            job_key: Clé de l'analyse (make_job_key)
+            base_dir: Répertoire racine (CHECKPOINT_DIR, défaut répertoire temporaire)
+            interval_frames: Frames entre deux sauvegardes (CHECKPOINT_INTERVAL_FRAMES, défaut 1500)
+        """
+        base_dir = base_dir or os.getenv('CHECKPOINT_DIR') or os.path.join(tempfile.gettempdir(), 'face_detector_checkpoints')
+        self.job_key = job_key
+        self.directory = os.path.join(base_dir, job_key)
+        self.interval_frames = interval_frames or int(os.getenv('CHECKPOINT_INTERVAL_FRAMES', '1500'))
+
+        self.state_path = os.path.join(self.directory, 'state.json')
+        self.detections_path = os.path.join(self.directory, 'detections.jsonl')
+
+    def exists(self):
+        """Indique si un point de reprise est disponible"""
+        return os.path.exists(self.state_path)
+
+    def segment_path(self, index):
+        """Chemin du segment de vidéo annotée n° index"""
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"segment_{index:04d}.mp4")
+
+    def save(self, state, new_detections):
+        """Enregistre un point de reprise
+        Args:
+            state: Dictionnaire d'état (frame de reprise, état du détecteur, segments...)
+            new_detections: Détections produites depuis le point de reprise précédent
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        with open(self.detections_path, 'a', encoding='utf-8') as f:
+            for detection in new_detections:
+                f.write(json.dumps(detection, default=json_default) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, default=json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+    def load(self):
+        """Charge le dernier point de reprise
+        Returns:
+            Tuple (état, détections enregistrées) ou (None, []) si aucun point de reprise
+        """
+        if not self.exists():
+            return None, []
+
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+
+        # Les lignes au-delà du compteur de l'état proviennent d'une sauvegarde interrompue
+        detections = []
+        valid_size = 0
+        if os.path.exists(self.detections_path):
+            with open(self.detections_path, 'rb') as f:
+                for line in f:
+                    if len(detections) >= state['detections_count'] or not line.endswith(b'\n'):
+                        break
+                    detection = json.loads(line)
+                    detection['bbox'] = tuple(detection['bbox'])
+                    detections.append(detection)
+                    valid_size += len(line)
+            with open(self.detections_path, 'r+b') as f:
+                f.truncate(valid_size)
+
+        return state, detections
+
+    def clear(self):
+        """Supprime le point de reprise (analyse terminée ou relancée depuis le début)"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def concat_video_segments(segment_paths, output_path, fps, frame_size):
+    """Assemble les segments de vidéo annotée en une seule vidéo
+    Args:
+        segment_paths: Segments dans l'ordre
+        output_path: Vidéo de sortie
+        fps: Cadence de la vidéo de sortie
+        frame_size: Tuple (largeur, hauteur)
+    Returns:
+        Chemin de la vidéo assemblée
+    """
+    segments = [path for path in segment_paths if os.path.exists(path)]
+
+    if len(segments) == 1:
+        shutil.copyfile(segments[0], output_path)
+        return output_path
+
+    try:
+        import ffmpeg
+
+        list_path = output_path + '.txt'
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for path in segments:
+                f.write(f"file '{path}'\n")
+        try:
+            (
+                ffmpeg
+                .input(list_path, format='concat', safe=0)
+                .output(output_path, c='copy')
+                .overwrite_output()
+                .run(quiet=True)
+            )
+        finally:
+            os.unlink(list_path)
+        return output_path
+    except Exception as e:
+        print(f"Concaténation ffmpeg indisponible ({str(e)}), repli OpenCV")
+
+    fourcc = cv2.VideoWriter.fourcc(*'mp4v')
+    out = cv2.VideoWriter(output_path, fourcc, fps, frame_size)
+    for path in segments:
+        cap = cv2.VideoCapture(path)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            out.write(frame)
+        cap.release()
+    out.release()
+    return output_path
@@ -0,0 +1,66 @@
+import json
+import os
+import time
+
+
+def get_profiles_path():
+    """Fichier des profils de détection (DETECTION_PROFILES_PATH, défaut detection_profiles.json)"""
+    return os.getenv('DETECTION_PROFILES_PATH',
+                     os.path.join(os.path.dirname(os.path.abspath(__file__)), 'detection_profiles.json'))
+
+
+def load_profiles(path=None):
+    """Charge les profils de détection nommés
+    Args:
+        path: Fichier des profils (défaut get_profiles_path())
+    Returns:
+        Dictionnaire nom -> profil ({'backend', 'params', 'metrics', ...})
+    """
+    path = path or get_profiles_path()
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Avertissement: profils de détection illisibles ({path}): {e}")
+        return {}
+
+
+def get_profile(name, path=None):
+    """Retourne un profil par son nom (None s'il n'existe pas)"""
+    return load_profiles(path).get(name)
+
+
+def save_profile(name, backend, params, metrics=None, source=None, path=None):
+    """Enregistre ou remplace un profil
+    Args:
+        name: Nom du profil (ex: "fast", "accurate")
+        backend: Nom du backend de détection
+        params: Paramètres du backend
+        metrics: Mesures de calibration (fps, précision, rappel)
+        source: Clip de référence utilisé
+        path: Fichier des profils (défaut get_profiles_path())
+    """
+    path = path or get_profiles_path()
+    profiles = load_profiles(path)
+    profiles[name] = {
+        'backend': backend,
+        'params': params,
+        'metrics': metrics or {},
+        'source': source,
+        'created_at': time.time()
+    }
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def describe_profile(name, profile):
+    """Libellé d'un profil pour les sélecteurs de l'interface"""
+    metrics = profile.get('metrics') or {}
+    if 'fps' in metrics and 'recall' in metrics:
+        return f"{name} ({profile['backend']}, {metrics['fps']:.0f} FPS, rappel {metrics['recall']:.2f})"
+    return f"{name} ({profile['backend']})"
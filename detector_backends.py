@@ -0,0 +1,261 @@
+import cv2
+import os
+
+
+def get_models_dir():
+    """Répertoire des modèles de détection locaux (DETECTOR_MODELS_DIR, défaut ./models)"""
+    return os.getenv('DETECTOR_MODELS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models'))
+
+
+def get_confidence_threshold():
+    """Score minimal des détecteurs DNN (DETECTOR_CONFIDENCE, défaut 0.6)"""
+    return float(os.getenv('DETECTOR_CONFIDENCE', '0.6'))
+
+
+class DetectorBackend:
+    """Interface commune des détecteurs de visages
+
+    detect() retourne une liste de boîtes (x, y, w, h) en pixels entiers, dans le repère de l'image.
+    """
+
+    name = None
+    label = None
+    # Paramètres réglables par un profil de détection (calibrate_detection.py)
+    PARAMETERS = ()
+
+    @classmethod
+    def is_available(cls):
+        """Indique si les fichiers nécessaires au backend sont présents"""
+        return True
+
+    @classmethod
+    def settings(cls):
+        """Paramètres du backend influant sur les détections (clé du cache de résultats)"""
+        return {}
+
+    def detect(self, image):
+        """Détecte les visages d'une image BGR
+        Args:
+            image: Image à analyser
+        Returns:
+            Liste des boîtes englobantes (x, y, w, h)
+        """
+        raise NotImplementedError
+
+
+class HaarCascadeBackend(DetectorBackend):
+    """Cascade de Haar OpenCV (historique: rapide en basse résolution, nombreux faux positifs)"""
+
+    name = 'haar'
+    label = "Haar Cascade"
+
+    SCALE_FACTOR = 1.1
+    MIN_NEIGHBORS = 5
+    MIN_SIZE = 30
+    PARAMETERS = ('scale_factor', 'min_neighbors', 'min_size', 'detection_width')
+
+    def __init__(self, use_gpu=False, scale_factor=None, min_neighbors=None, min_size=None, detection_width=None):
+        """Initialise la cascade
+        Args:
+            use_gpu: Sans effet (exécution CPU)
+            scale_factor: Facteur d'échelle de detectMultiScale (défaut 1.1)
+            min_neighbors: Voisins minimum d'une détection (défaut 5)
+            min_size: Taille minimale d'un visage, en pixels de l'image de détection (défaut 30)
+            detection_width: Largeur de l'image de détection (None: résolution d'origine)
+        """
+        self.scale_factor = scale_factor or self.SCALE_FACTOR
+        self.min_neighbors = min_neighbors or self.MIN_NEIGHBORS
+        self.min_size = min_size or self.MIN_SIZE
+        self.detection_width = detection_width or None
+
+        try:
+            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+            self.face_cascade = cv2.CascadeClassifier(cascade_path)
+        except:
+            self.face_cascade = cv2.CascadeClassifier('haarcascade_frontalface_default.xml')
+
+        if self.face_cascade.empty():
+            print("Erreur: Impossible de charger le classificateur de visages")
+
+    @classmethod
+    def settings(cls):
+        return {'scale_factor': cls.SCALE_FACTOR, 'min_neighbors': cls.MIN_NEIGHBORS, 'min_size': cls.MIN_SIZE}
+
+    def detect(self, image):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        ratio = 1.0
+        if self.detection_width and gray.shape[1] > self.detection_width:
+            ratio = self.detection_width / gray.shape[1]
+            gray = cv2.resize(gray, (self.detection_width, int(round(gray.shape[0] * ratio))),
+                              interpolation=cv2.INTER_AREA)
+
+        faces = self.face_cascade.detectMultiScale(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=(self.min_size, self.min_size),
+            flags=cv2.CASCADE_SCALE_IMAGE
+        )
+        return [tuple(int(round(v / ratio)) for v in face) for face in faces]
+
+
+class OpenCVDNNBackend(DetectorBackend):
+    """SSD ResNet-10 (res10_300x300) via cv2.dnn, modèle Caffe local"""
+
+    name = 'dnn'
+    label = "OpenCV DNN (res10 SSD)"
+
+    PROTOTXT = 'deploy.prototxt'
+    CAFFEMODEL = 'res10_300x300_ssd_iter_140000.caffemodel'
+    INPUT_SIZE = 300
+
+    def __init__(self, use_gpu=False):
+        models_dir = get_models_dir()
+        self.confidence = get_confidence_threshold()
+        self.net = cv2.dnn.readNetFromCaffe(
+            os.path.join(models_dir, self.PROTOTXT),
+            os.path.join(models_dir, self.CAFFEMODEL)
+        )
+        if use_gpu:
+            self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_CUDA)
+            self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CUDA)
+
+    @classmethod
+    def is_available(cls):
+        models_dir = get_models_dir()
+        return (os.path.exists(os.path.join(models_dir, cls.PROTOTXT))
+                and os.path.exists(os.path.join(models_dir, cls.CAFFEMODEL)))
+
+    @classmethod
+    def settings(cls):
+        return {'model': cls.CAFFEMODEL, 'confidence': get_confidence_threshold()}
+
+    def detect(self, image):
+        height, width = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(
+            cv2.resize(image, (self.INPUT_SIZE, self.INPUT_SIZE)), 1.0,
+            (self.INPUT_SIZE, self.INPUT_SIZE), (104.0, 177.0, 123.0)
+        )
+        self.net.setInput(blob)
+        output = self.net.forward()
+
+        faces = []
+        for i in range(output.shape[2]):
+            if output[0, 0, i, 2] < self.confidence:
+                continue
+            x1 = max(0, int(output[0, 0, i, 3] * width))
+            y1 = max(0, int(output[0, 0, i, 4] * height))
+            x2 = min(width, int(output[0, 0, i, 5] * width))
+            y2 = min(height, int(output[0, 0, i, 6] * height))
+            if x2 > x1 and y2 > y1:
+                faces.append((x1, y1, x2 - x1, y2 - y1))
+        return faces
+
+
+class YuNetBackend(DetectorBackend):
+    """YuNet via cv2.FaceDetectorYN (OpenCV >= 4.5.4), modèle ONNX local"""
+
+    name = 'yunet'
+    label = "YuNet"
+
+    MODEL = 'face_detection_yunet_2023mar.onnx'
+    NMS_THRESHOLD = 0.3
+    TOP_K = 5000
+
+    def __init__(self, use_gpu=False):
+        self.confidence = get_confidence_threshold()
+        backend_id = cv2.dnn.DNN_BACKEND_CUDA if use_gpu else cv2.dnn.DNN_BACKEND_DEFAULT
+        target_id = cv2.dnn.DNN_TARGET_CUDA if use_gpu else cv2.dnn.DNN_TARGET_CPU
+        self.detector = cv2.FaceDetectorYN.create(
+            os.path.join(get_models_dir(), self.MODEL), "", (320, 320),
+            self.confidence, self.NMS_THRESHOLD, self.TOP_K, backend_id, target_id
+        )
+        self._input_size = None
+
+    @classmethod
+    def is_available(cls):
+        return hasattr(cv2, 'FaceDetectorYN') and os.path.exists(os.path.join(get_models_dir(), cls.MODEL))
+
+    @classmethod
+    def settings(cls):
+        return {'model': cls.MODEL, 'confidence': get_confidence_threshold(), 'nms': cls.NMS_THRESHOLD}
+
+    def detect(self, image):
+        height, width = image.shape[:2]
+        if self._input_size != (width, height):
+            self.detector.setInputSize((width, height))
+            self._input_size = (width, height)
+
+        _, detections = self.detector.detect(image)
+        if detections is None:
+            return []
+
+        faces = []
+        for detection in detections:
+            x, y, w, h = (int(v) for v in detection[:4])
+            x, y = max(0, x), max(0, y)
+            w, h = min(w, width - x), min(h, height - y)
+            if w > 0 and h > 0:
+                faces.append((x, y, w, h))
+        return faces
+
+
+BACKENDS = {
+    HaarCascadeBackend.name: HaarCascadeBackend,
+    OpenCVDNNBackend.name: OpenCVDNNBackend,
+    YuNetBackend.name: YuNetBackend
+}
+
+
+def default_backend_name():
+    """Backend par défaut (DETECTOR_BACKEND, défaut haar)"""
+    name = os.getenv('DETECTOR_BACKEND', HaarCascadeBackend.name)
+    return name if name in BACKENDS else HaarCascadeBackend.name
+
+
+def available_backends():
+    """Liste les backends dont les modèles sont présents
+    Returns:
+        Liste des noms de backends utilisables
+    """
+    return [name for name, backend_class in BACKENDS.items() if backend_class.is_available()]
+
+
+def backend_signature(name, params=None):
+    """Identifie un backend et ses paramètres (inclus dans la clé du cache de résultats)
+    Args:
+        name: Nom du backend
+        params: Paramètres d'un profil de détection (remplacent les valeurs par défaut)
+    """
+    return {'backend': name, **BACKENDS[name].settings(), **(params or {})}
+
+
+def create_detector_backend(name=None, use_gpu=False, params=None):
+    """Instancie un backend de détection, avec repli sur la cascade de Haar
+    Args:
+        name: Nom du backend (défaut DETECTOR_BACKEND)
+        use_gpu: Exécution CUDA pour les backends DNN
+        params: Paramètres du backend issus d'un profil de détection
+    Returns:
+        Instance de DetectorBackend
+    """
+    name = name or default_backend_name()
+    backend_class = BACKENDS.get(name)
+    params = params or {}
+
+    if backend_class is None:
+        print(f"Avertissement: backend de détection inconnu '{name}', utilisation de Haar")
+    elif not backend_class.is_available():
+        print(f"Avertissement: modèle du backend '{name}' introuvable dans {get_models_dir()}, utilisation de Haar")
+    else:
+        ignored = [key for key in params if key not in backend_class.PARAMETERS]
+        if ignored:
+            print(f"Avertissement: paramètres ignorés par le backend '{name}': {', '.join(ignored)}")
+        try:
+            return backend_class(use_gpu=use_gpu, **{key: value for key, value in params.items()
+                                                     if key in backend_class.PARAMETERS})
+        except Exception as e:
+            print(f"Avertissement: échec du chargement du backend '{name}' ({e}), utilisation de Haar")
+
+    return HaarCascadeBackend()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Export des modèles d'attributs DeepFace vers ONNX (quantification int8 optionnelle),
+et du modèle de reconnaissance ArcFace utilisé par la ré-identification
+"""
+
+import argparse
+import os
+
+from attribute_analyzers import ONNX_MODEL_FILES, ONNXAttributeAnalyzer, get_attribute_models_dir
+from face_gallery import REID_MODEL_FILE
+
+DEEPFACE_MODEL_NAMES = {
+    'age': 'Age',
+    'gender': 'Gender',
+    'emotion': 'Emotion',
+    'race': 'Race'
+}
+
+
+def build_keras_model(action):
+    """Construit le modèle Keras DeepFace d'une action
+    Args:
+        action: 'age', 'gender', 'emotion' ou 'race'
+    Returns:
+        Modèle Keras
+    """
+    from deepface import DeepFace
+
+    model_name = DEEPFACE_MODEL_NAMES[action]
+    try:
+        model = DeepFace.build_model(model_name=model_name, task="facial_attribute")
+    except TypeError:
+        # Versions de DeepFace antérieures au paramètre task
+        model = DeepFace.build_model(model_name)
+    return getattr(model, 'model', model)
+
+
+def build_reid_model():
+    """Construit le modèle Keras ArcFace de DeepFace (reconnaissance faciale)"""
+    from deepface import DeepFace
+
+    try:
+        model = DeepFace.build_model(model_name="ArcFace", task="facial_recognition")
+    except TypeError:
+        model = DeepFace.build_model("ArcFace")
+    return getattr(model, 'model', model)
+
+
+def export_keras_model(model, output_path, opset=13):
+    """Convertit un modèle Keras en ONNX (taille de lot dynamique)"""
+    import tensorflow as tf
+    import tf2onnx
+
+    input_signature = (tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32, name='input'),)
+    tf2onnx.convert.from_keras(model, input_signature=input_signature, opset=opset, output_path=output_path)
+    return output_path
+
+
+def export_model(action, output_dir, opset=13):
+    """Exporte le modèle d'une action en ONNX
+    Returns:
+        Chemin du modèle exporté
+    """
+    return export_keras_model(build_keras_model(action), ONNXAttributeAnalyzer.model_path(output_dir, action), opset)
+
+
+def quantize_model(action, output_dir):
+    """Quantifie dynamiquement un modèle exporté (poids int8)
+    Returns:
+        Chemin du modèle quantifié
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    model_path = ONNXAttributeAnalyzer.model_path(output_dir, action)
+    quantized_path = ONNXAttributeAnalyzer.model_path(output_dir, action, quantized=True)
+    quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporte les modèles d'attributs DeepFace vers ONNX")
+    parser.add_argument('--output-dir', default=get_attribute_models_dir(), help="Dossier de sortie")
+    parser.add_argument('--actions', nargs='+', default=list(ONNX_MODEL_FILES), choices=list(ONNX_MODEL_FILES))
+    parser.add_argument('--quantize', action='store_true', help="Produit aussi les modèles int8 (*.int8.onnx)")
+    parser.add_argument('--reid', action='store_true',
+                        help=f"Exporte aussi le modèle de ré-identification ArcFace ({REID_MODEL_FILE})")
+    parser.add_argument('--opset', type=int, default=13)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    for action in args.actions:
+        path = export_model(action, args.output_dir, args.opset)
+        print(f"{action}: {path} ({os.path.getsize(path) / (1024 * 1024):.1f} Mo)")
+        if args.quantize:
+            quantized_path = quantize_model(action, args.output_dir)
+            print(f"{action} (int8): {quantized_path} ({os.path.getsize(quantized_path) / (1024 * 1024):.1f} Mo)")
+
+    if args.reid:
+        path = export_keras_model(build_reid_model(), os.path.join(args.output_dir, REID_MODEL_FILE), args.opset)
+        print(f"ré-identification: {path} ({os.path.getsize(path) / (1024 * 1024):.1f} Mo)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,85 @@
 import cv2
 import numpy as np
-import pandas as pd
 import os
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime
 import random
-from deepface import DeepFace
+from detector_backends import create_detector_backend
+from detection_profiles import get_profile
+from attribute_analyzers import create_attribute_analyzer, get_actions, map_analysis_result
+from face_gallery import FaceGallery, reid_enabled
 
 # Configuration du logging
 logging.getLogger('opencv').setLevel(logging.ERROR)
 logging.getLogger('tensorflow').setLevel(logging.ERROR)
 
 class FaceDetector:
-    def __init__(self, use_gpu=False):
-        """Initialise le détecteur de visages avec les paramètres de base"""
+    # Paramètres de tracking (inclus dans la clé du cache de résultats avec ceux du backend)
+    DETECTION_SETTINGS = {
+        'max_distance': 150,
+        'persistence_frames': 90
+    }
+    
+    def __init__(self, use_gpu=False, backend=None, analyzer=None, preload_actions=None,
+                 detection_profile=None):
+        """Initialise le détecteur de visages avec les paramètres de base
+        Args:
+            use_gpu: Accélération matérielle
+            backend: Nom du backend de détection (haar, dnn, yunet; défaut DETECTOR_BACKEND)
+            analyzer: Nom de l'analyseur d'attributs (deepface, onnx; défaut ATTRIBUTE_ANALYZER)
+            preload_actions: Actions dont les modèles sont chargés dès l'initialisation
+                (None: chargement au premier usage)
+            detection_profile: Nom d'un profil de détection calibré (remplace le backend)
+        """
         self.use_gpu = use_gpu
-        
-        try:
-            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            self.face_cascade = cv2.CascadeClassifier(cascade_path)
-        except:
-            self.face_cascade = cv2.CascadeClassifier('haarcascade_frontalface_default.xml')
-        
-        if self.face_cascade.empty():
-            print("Erreur: Impossible de charger le classificateur de visages")
+        self.detection_profile = detection_profile
+        backend_params = None
+        if detection_profile:
+            profile = get_profile(detection_profile)
+            if profile is None:
+                print(f"Avertissement: profil de détection '{detection_profile}' introuvable, paramètres par défaut")
+            else:
+                backend = profile['backend']
+                backend_params = profile['params']
+        self.detector_backend = create_detector_backend(backend, use_gpu, backend_params)
+        self.attribute_analyzer = create_attribute_analyzer(analyzer)
         
         self.face_id_counter = 0
         self.detections = []
         self.tracked_faces = {}
         self.next_face_id = 1
         self.detection_interval = 30
-        self.max_distance = 150
-        self.persistence_frames = 90
-        self.analysis_cache = {}
+        self.max_distance = self.DETECTION_SETTINGS['max_distance']
+        self.persistence_frames = self.DETECTION_SETTINGS['persistence_frames']
+        self.analysis_cache = OrderedDict()
+        self.analysis_cache_max = int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', '256'))
+        self._analysis_cache_lock = threading.Lock()
         
         self.age_ranges = ["0-15", "16-22", "23-30", "31-40", "41-50", "51-60", "60+"]
         self.emotions = ["Happy", "Neutral", "Sad", "Surprised", "Angry", "Fear", "Disgust"]
         self.ethnicities = ["Asian", "European", "African", "Hispanic", "Middle Eastern", "Other"]
         self.emotion_stability = {}
+        self.attribute_pool = None
+        self.face_id_prefix = "face"
+        # Analyse d'attributs différée (budget de latence dépassé): les nouveaux visages restent en attente
+        self.defer_analysis = False
+        # Galerie des tracks expirés: un visage qui revient retrouve son identifiant et ses attributs
+        self.reid_gallery = FaceGallery() if reid_enabled() else None
         
-        print("Chargement des modèles DeepFace en cours...")
+        if preload_actions:
+            self.preload_models(preload_actions)
+    
+    def preload_models(self, actions):
+        """Charge les modèles d'attributs des actions activées
+        Args:
+            actions: Actions à charger ('age', 'gender', 'emotion', 'race')
+        """
+        print(f"Chargement des modèles d'attributs ({self.attribute_analyzer.name}: {', '.join(actions)}) en cours...")
         try:
-            dummy_img = np.zeros((224, 224, 3), dtype=np.uint8)
-            DeepFace.analyze(dummy_img, actions=['age', 'gender', 'emotion', 'race'], 
-                           enforce_detection=False, silent=True)
-            print("Modèles DeepFace chargés avec succès !")
+            self.attribute_analyzer.warmup(actions)
+            print("Modèles d'attributs chargés avec succès !")
         except Exception as e:
             print(f"Avertissement: Erreur lors du pré-chargement des modèles: {e}")
     
@@ -56,22 +91,14 @@ class FaceDetector:
             Liste des boîtes englobantes des visages détectés
         """
         try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30),
-                flags=cv2.CASCADE_SCALE_IMAGE
-            )
-            return faces
+            return self.detector_backend.detect(image)
         except Exception as e:
             print(f"Erreur détection visages: {e}")
             return []
     
     def analyze_face_real(self, image, bbox, analyze_age=True, analyze_gender=True, 
                          analyze_emotion=True, analyze_ethnicity=True):
-        """Analyse les attributs d'un visage avec DeepFace
+        """Analyse les attributs d'un visage (DeepFace ou ONNX Runtime)
         Args:
             image: Image source
             bbox: Boîte englobante du visage
@@ -93,84 +120,24 @@ class FaceDetector:
             face_resized = cv2.resize(face_region, (224, 224))
             cache_key = f"{hash(face_resized.tobytes())}_{w}_{h}"
             
-            if cache_key in self.analysis_cache:
-                return self.analysis_cache[cache_key]
+            with self._analysis_cache_lock:
+                if cache_key in self.analysis_cache:
+                    self.analysis_cache.move_to_end(cache_key)
+                    return self.analysis_cache[cache_key]
             
-            actions = []
-            if analyze_age: actions.append('age')
-            if analyze_gender: actions.append('gender')
-            if analyze_emotion: actions.append('emotion')
-            if analyze_ethnicity: actions.append('race')
+            actions = get_actions(analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity)
             
             if not actions:
                 return None
             
-            result = DeepFace.analyze(face_resized, actions=actions, 
-                                    enforce_detection=False, silent=True)
-            
-            analysis = {}
-            
-            if isinstance(result, list):
-                result = result[0]
-            
-            if analyze_age and 'age' in result:
-                age_value = int(result['age'])
-                if age_value < 16:
-                    analysis['age_estimation'] = "0-15"
-                elif age_value < 23:
-                    analysis['age_estimation'] = "16-22"
-                elif age_value < 31:
-                    analysis['age_estimation'] = "23-30"
-                elif age_value < 41:
-                    analysis['age_estimation'] = "31-40"
-                elif age_value < 51:
-                    analysis['age_estimation'] = "41-50"
-                elif age_value < 61:
-                    analysis['age_estimation'] = "51-60"
-                else:
-                    analysis['age_estimation'] = "60+"
-            
-            if analyze_gender and 'gender' in result:
-                gender_data = result['gender']
-                if isinstance(gender_data, dict):
-                    analysis['gender_classification'] = max(gender_data.items(), key=lambda x: x[1])[0]
-                else:
-                    analysis['gender_classification'] = str(gender_data)
-            
-            if analyze_emotion and 'emotion' in result:
-                emotion_data = result['emotion']
-                if isinstance(emotion_data, dict):
-                    dominant_emotion = max(emotion_data.items(), key=lambda x: x[1])[0]
-                    emotion_mapping = {
-                        'angry': 'Angry',
-                        'disgust': 'Disgust', 
-                        'fear': 'Fear',
-                        'happy': 'Happy',
-                        'sad': 'Sad',
-                        'surprise': 'Surprised',
-                        'neutral': 'Neutral'
-                    }
-                    analysis['emotion'] = emotion_mapping.get(dominant_emotion.lower(), dominant_emotion.title())
-                else:
-                    analysis['emotion'] = str(emotion_data)
-            
-            if analyze_ethnicity and 'race' in result:
-                race_data = result['race']
-                if isinstance(race_data, dict):
-                    dominant_race = max(race_data.items(), key=lambda x: x[1])[0]
-                    race_mapping = {
-                        'asian': 'Asian',
-                        'indian': 'Asian',
-                        'black': 'African',
-                        'white': 'European',
-                        'middle eastern': 'Middle Eastern',
-                        'latino hispanic': 'Hispanic'
-                    }
-                    analysis['ethnicity_estimation'] = race_mapping.get(dominant_race.lower(), dominant_race.title())
-                else:
-                    analysis['ethnicity_estimation'] = str(race_data)
+            result = self.attribute_analyzer.analyze(face_resized, actions)
+            analysis = map_analysis_result(
+                result, analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity
+            )
             
-            self.analysis_cache[cache_key] = analysis
+            with self._analysis_cache_lock:
+                self.analysis_cache[cache_key] = analysis
+            self.trim_analysis_cache()
             return analysis
             
         except Exception as e:
@@ -182,6 +149,57 @@ class FaceDetector:
                 'emotion': 'Unknown'
             }
     
+    def analyze_faces_batch(self, faces, analyze_age=True, analyze_gender=True, 
+                            analyze_emotion=True, analyze_ethnicity=True):
+        """Analyse les attributs de plusieurs visages en un seul appel à l'analyseur
+        Args:
+            faces: Liste de tuples (image, bbox)
+            analyze_age: Analyse de l'âge
+            analyze_gender: Analyse du genre
+            analyze_emotion: Analyse des émotions
+            analyze_ethnicity: Analyse de l'ethnicité
+        Returns:
+            Liste des sorties brutes de l'analyseur (None pour un visage trop petit ou en erreur),
+            dans l'ordre des visages
+        """
+        results = [None] * len(faces)
+        actions = get_actions(analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity)
+        
+        crops = []
+        indices = []
+        for i, (image, (x, y, w, h)) in enumerate(faces):
+            face_region = image[y:y+h, x:x+w]
+            if face_region.size == 0 or w < 30 or h < 30:
+                continue
+            crops.append(cv2.resize(face_region, (224, 224)))
+            indices.append(i)
+        
+        if not actions or not crops:
+            return results
+        
+        try:
+            batch_results = self.attribute_analyzer.analyze_batch(crops, actions)
+        except Exception as e:
+            # Lot en erreur (inférence groupée): visage par visage, seul le visage fautif est perdu
+            print(f"Erreur analyse par lot, reprise visage par visage: {str(e)}")
+            batch_results = []
+            for crop in crops:
+                try:
+                    batch_results.append(self.attribute_analyzer.analyze(crop, actions))
+                except Exception as face_error:
+                    print(f"Erreur analyse réelle visage: {str(face_error)}")
+                    batch_results.append(None)
+        
+        for i, result in zip(indices, batch_results):
+            results[i] = result
+        return results
+    
+    def trim_analysis_cache(self):
+        """Évince les analyses les moins récemment utilisées au-delà du budget du cache"""
+        with self._analysis_cache_lock:
+            while len(self.analysis_cache) > self.analysis_cache_max:
+                self.analysis_cache.popitem(last=False)
+    
     def process_frame(self, image, frame_number, timestamp, analyze_age=True, 
                      analyze_gender=True, analyze_emotion=True, analyze_ethnicity=True):
         """Traite une frame et retourne les détections
@@ -201,7 +219,7 @@ class FaceDetector:
         
         for i, (x, y, w, h) in enumerate(faces):
             self.face_id_counter += 1
-            face_id = f"face_{self.face_id_counter:04d}"
+            face_id = f"{self.face_id_prefix}_{self.face_id_counter:04d}"
             
             analysis = self.analyze_face_real(
                 image, (x, y, w, h),
@@ -220,9 +238,10 @@ class FaceDetector:
         
         return frame_detections
     
-    def draw_annotations(self, image, detections, show_age=True, show_gender=True, 
+    @staticmethod
+    def draw_annotations(image, detections, show_age=True, show_gender=True, 
                         show_emotion=True, show_ethnicity=True):
-        """Dessine les annotations sur l'image
+        """Dessine les annotations sur l'image (sans état: utilisable sans instancier le détecteur)
         Args:
             image: Image à annoter
             detections: Liste des détections
@@ -240,6 +259,8 @@ class FaceDetector:
             cv2.rectangle(annotated_image, (x, y), (x + w, y + h), (0, 255, 0), 2)
             
             annotations = []
+            if detection.get('analysis_pending'):
+                annotations.append("Analyse en cours...")
             if show_age and 'age_estimation' in detection:
                 annotations.append(f"Age: {detection['age_estimation']}")
             if show_gender and 'gender_classification' in detection:
@@ -272,6 +293,8 @@ class FaceDetector:
         Returns:
             DataFrame pandas contenant les détections
         """
+        import pandas as pd
+        
         if not self.detections:
             return pd.DataFrame()
         return pd.DataFrame(self.detections)
@@ -310,61 +333,203 @@ class FaceDetector:
         distance = ((center1[0] - center2[0])**2 + (center1[1] - center2[1])**2)**0.5
         return distance
     
-    def update_tracked_faces(self, new_faces, frame_number):
+    def update_tracked_faces(self, new_faces, frame_number, image=None, analyze_options=None):
         """Met à jour le tracking des visages
         Args:
             new_faces: Liste des nouveaux visages détectés
             frame_number: Numéro de la frame courante
+            image: Frame courante (nécessaire à l'analyse asynchrone)
+            analyze_options: Tuple (age, genre, émotion, ethnie) des attributs demandés
         """
         for face_id in list(self.tracked_faces.keys()):
             if frame_number - self.tracked_faces[face_id]['last_seen'] > self.persistence_frames:
-                del self.tracked_faces[face_id]
+                tracked_data = self.tracked_faces.pop(face_id)
+                self.emotion_stability.pop(face_id, None)
+                if self.attribute_pool:
+                    self.attribute_pool.cancel(face_id)
+                if self.reid_gallery is not None and tracked_data.get('embedding') is not None:
+                    self.reid_gallery.add(face_id, tracked_data['embedding'], {
+                        'attributes': tracked_data['attributes'],
+                        'analyzed': tracked_data.get('analyzed', False),
+                        'first_seen': tracked_data['first_seen']
+                    }, frame_number)
         
         used_faces = set()
+        unmatched = []
         
         for face_bbox in new_faces:
-            best_match = None
-            best_distance = float('inf')
-            
-            for face_id, tracked_data in self.tracked_faces.items():
-                if face_id in used_faces:
-                    continue
-                    
-                distance = self.calculate_distance(face_bbox, tracked_data['bbox'])
-                if distance < self.max_distance and distance < best_distance:
-                    best_distance = distance
-                    best_match = face_id
-            
+            best_match = self.find_closest_track(face_bbox, used_faces)
             if best_match:
-                old_bbox = self.tracked_faces[best_match]['bbox']
-                old_x, old_y = old_bbox[0] + old_bbox[2]//2, old_bbox[1] + old_bbox[3]//2
-                new_x, new_y = face_bbox[0] + face_bbox[2]//2, face_bbox[1] + face_bbox[3]//2
-                
-                velocity = (new_x - old_x, new_y - old_y)
-                
-                self.tracked_faces[best_match]['bbox'] = face_bbox
-                self.tracked_faces[best_match]['last_seen'] = frame_number
-                self.tracked_faces[best_match]['velocity'] = velocity
-                
-                bbox_history = self.tracked_faces[best_match]['bbox_history']
-                bbox_history.append(face_bbox)
-                if len(bbox_history) > 5:
-                    bbox_history.pop(0)
-                
+                self.update_track(best_match, face_bbox, frame_number, image, analyze_options)
                 used_faces.add(best_match)
             else:
-                attributes = self.analyze_face_simple_for_new_face(face_bbox, frame_number)
-                face_id = f"face_{self.next_face_id:04d}"
+                unmatched.append(face_bbox)
+        
+        # Descripteurs des nouveaux visages calculés en un seul lot (une inférence par frame)
+        embeddings = [None] * len(unmatched)
+        if unmatched and self.reid_gallery is not None and image is not None:
+            embeddings = self.reid_gallery.embed_batch(image, unmatched)
+        
+        new_tracks = set()
+        for face_bbox, embedding in zip(unmatched, embeddings):
+            # Détections multiples d'un même nouveau visage: rattachées au track créé pour la première
+            best_match = self.find_closest_track(face_bbox, used_faces, new_tracks)
+            if best_match:
+                self.update_track(best_match, face_bbox, frame_number, image, analyze_options)
+                used_faces.add(best_match)
+                continue
+            
+            restored = None
+            if embedding is not None:
+                restored = self.reid_gallery.match(embedding, frame_number)
+            
+            if restored:
+                # Visage revenu: identifiant et attributs du track expiré, sans nouvelle analyse
+                face_id, previous = restored
+                attributes = previous['attributes']
+            else:
+                face_id = f"{self.face_id_prefix}_{self.next_face_id:04d}"
                 self.next_face_id += 1
+                previous = {'analyzed': False, 'first_seen': frame_number}
                 
-                self.tracked_faces[face_id] = {
-                    'bbox': face_bbox,
-                    'attributes': attributes,
-                    'last_seen': frame_number,
-                    'first_seen': frame_number,
-                    'velocity': (0, 0),
-                    'bbox_history': [face_bbox]
-                }
+                if self.defer_analysis or (self.attribute_pool and image is not None):
+                    attributes = {}
+                else:
+                    attributes = self.analyze_face_simple_for_new_face(face_bbox, frame_number)
+            
+            self.tracked_faces[face_id] = {
+                'bbox': face_bbox,
+                'attributes': attributes,
+                'last_seen': frame_number,
+                'first_seen': previous['first_seen'],
+                'velocity': (0, 0),
+                'bbox_history': [face_bbox],
+                'analysis_pending': not attributes,
+                'embedding': embedding,
+                'embedding_frame': frame_number
+            }
+            new_tracks.add(face_id)
+            if previous['analyzed']:
+                self.tracked_faces[face_id]['analyzed'] = True
+            
+            if not attributes and not self.defer_analysis:
+                self.submit_face_analysis(face_id, image, face_bbox, analyze_options)
+    
+    def find_closest_track(self, face_bbox, used_faces, candidates=None):
+        """Track le plus proche d'une détection
+        Args:
+            face_bbox: Boîte détectée
+            used_faces: Tracks déjà associés à une détection de la frame
+            candidates: Tracks envisagés (défaut: tous les tracks)
+        Returns:
+            Identifiant du track, ou None au-delà de max_distance
+        """
+        best_match = None
+        best_distance = float('inf')
+        
+        for face_id in (self.tracked_faces if candidates is None else candidates):
+            if face_id in used_faces:
+                continue
+                
+            distance = self.calculate_distance(face_bbox, self.tracked_faces[face_id]['bbox'])
+            if distance < self.max_distance and distance < best_distance:
+                best_distance = distance
+                best_match = face_id
+        return best_match
+    
+    def update_track(self, face_id, face_bbox, frame_number, image=None, analyze_options=None):
+        """Associe une détection à un track existant (position, vitesse, descripteur, analyse en attente)"""
+        tracked_data = self.tracked_faces[face_id]
+        old_bbox = tracked_data['bbox']
+        old_x, old_y = old_bbox[0] + old_bbox[2]//2, old_bbox[1] + old_bbox[3]//2
+        new_x, new_y = face_bbox[0] + face_bbox[2]//2, face_bbox[1] + face_bbox[3]//2
+        
+        velocity = (new_x - old_x, new_y - old_y)
+        
+        tracked_data['bbox'] = face_bbox
+        tracked_data['last_seen'] = frame_number
+        tracked_data['velocity'] = velocity
+        
+        bbox_history = tracked_data['bbox_history']
+        bbox_history.append(face_bbox)
+        if len(bbox_history) > 5:
+            bbox_history.pop(0)
+        
+        self.update_face_embedding(tracked_data, image, face_bbox, frame_number)
+        
+        # Nouvelle tentative si l'analyse avait été refusée (file pleine) ou différée
+        if tracked_data.get('analysis_pending') and not self.defer_analysis:
+            if self.attribute_pool:
+                self.submit_face_analysis(face_id, image, face_bbox, analyze_options)
+            else:
+                tracked_data['attributes'] = self.analyze_face_simple_for_new_face(
+                    face_bbox, frame_number
+                )
+                tracked_data['analysis_pending'] = False
+    
+    def update_face_embedding(self, tracked_data, image, bbox, frame_number):
+        """Rafraîchit le descripteur de ré-identification d'un track (moyenne glissante normée)
+        Au plus une fois toutes les reid_gallery.refresh_frames frames: le descripteur calculé à la
+        création du track suffit entre deux rafraîchissements.
+        Args:
+            tracked_data: Données du track
+            image: Frame courante
+            bbox: Boîte englobante détectée
+            frame_number: Frame courante
+        """
+        if self.reid_gallery is None or image is None:
+            return
+        refresh_frames = self.reid_gallery.refresh_frames
+        if frame_number - tracked_data.get('embedding_frame', frame_number - refresh_frames) < refresh_frames:
+            return
+        tracked_data['embedding_frame'] = frame_number
+        embedding = self.reid_gallery.embed(image, bbox)
+        if embedding is None:
+            return
+        
+        previous = tracked_data.get('embedding')
+        if previous is not None:
+            embedding = 0.7 * previous + 0.3 * embedding
+            embedding /= np.linalg.norm(embedding)
+        tracked_data['embedding'] = embedding
+    
+    def submit_face_analysis(self, face_id, image, bbox, analyze_options=None):
+        """Soumet l'analyse réelle d'un visage suivi au pool asynchrone
+        Args:
+            face_id: Identifiant du track
+            image: Frame courante
+            bbox: Boîte englobante du visage
+            analyze_options: Tuple (age, genre, émotion, ethnie) des attributs demandés
+        Returns:
+            True si l'analyse a été acceptée par le pool
+        """
+        if not self.attribute_pool or image is None or self.attribute_pool.is_pending(face_id):
+            return False
+        
+        x, y, w, h = bbox
+        face_region = image[max(y, 0):y+h, max(x, 0):x+w].copy()
+        if face_region.size == 0:
+            return False
+        
+        options = analyze_options or (True, True, True, True)
+        return self.attribute_pool.submit(face_id, face_region, *options)
+    
+    def apply_analysis_results(self):
+        """Rattache aux tracks les résultats d'analyse asynchrone disponibles"""
+        if not self.attribute_pool:
+            return
+        
+        for face_id, analysis in self.attribute_pool.poll_results(self.tracked_faces).items():
+            tracked_data = self.tracked_faces.get(face_id)
+            if tracked_data is None:
+                continue
+            if not analysis:
+                # Visage trop petit pour DeepFace: repli sur l'estimation simple
+                analysis = self.analyze_face_simple_for_new_face(tracked_data['bbox'], tracked_data['last_seen'])
+            else:
+                tracked_data['analyzed'] = True
+            tracked_data['attributes'] = analysis
+            tracked_data['analysis_pending'] = False
     
     def _analyze_gender_advanced(self, face_region, x, y, w, h):
         """Analyse avancée du genre basée sur les caractéristiques du visage
@@ -424,7 +589,8 @@ class FaceDetector:
     
     def process_frame_with_tracking(self, image, frame_number, timestamp, 
                                    analyze_age=True, analyze_gender=True, 
-                                   analyze_emotion=True, analyze_ethnicity=True):
+                                   analyze_emotion=True, analyze_ethnicity=True, faces=None,
+                                   detection_interval=None):
         """Traite une frame avec système de tracking
         Args:
             image: Frame à analyser
@@ -434,14 +600,22 @@ class FaceDetector:
             analyze_gender: Analyse du genre
             analyze_emotion: Analyse des émotions
             analyze_ethnicity: Analyse de l'ethnicité
+            faces: Boîtes détectées par ailleurs (processus de détection): remplacent la détection
+            detection_interval: Intervalle de détection de cet appel (défaut self.detection_interval)
         Returns:
             Liste des détections avec tracking
         """
         frame_detections = []
         
-        if frame_number % self.detection_interval == 0:
-            new_faces = self.detect_faces(image)
-            self.update_tracked_faces(new_faces, frame_number)
+        self.apply_analysis_results()
+        
+        interval = detection_interval or self.detection_interval
+        if faces is not None or frame_number % interval == 0:
+            new_faces = faces if faces is not None else self.detect_faces(image)
+            self.update_tracked_faces(
+                new_faces, frame_number, image,
+                (analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity)
+            )
         
         for face_id, tracked_data in self.tracked_faces.items():
             frames_since_last_seen = frame_number - tracked_data['last_seen']
@@ -466,13 +640,19 @@ class FaceDetector:
                     'bbox': predicted_bbox
                 }
                 
+                if tracked_data.get('analysis_pending'):
+                    detection['analysis_pending'] = True
+                
                 if analyze_age and 'age_estimation' in tracked_data['attributes']:
                     detection['age_estimation'] = tracked_data['attributes']['age_estimation']
                 if analyze_gender and 'gender_classification' in tracked_data['attributes']:
                     detection['gender_classification'] = tracked_data['attributes']['gender_classification']
                 if analyze_emotion and 'emotion' in tracked_data['attributes']:
                     base_emotion = tracked_data['attributes']['emotion']
-                    current_emotion = self.get_dynamic_emotion(face_id, base_emotion, frame_number)
+                    if tracked_data.get('analyzed'):
+                        current_emotion = base_emotion
+                    else:
+                        current_emotion = self.get_dynamic_emotion(face_id, base_emotion, frame_number)
                     detection['emotion'] = current_emotion
                 if analyze_ethnicity and 'ethnicity_estimation' in tracked_data['attributes']:
                     detection['ethnicity_estimation'] = tracked_data['attributes']['ethnicity_estimation']
@@ -534,10 +714,47 @@ class FaceDetector:
         
         return emotion_data['current_emotion']
     
+    def get_state(self):
+        """Retourne l'état du tracking (pour la sauvegarde d'un point de reprise)
+        Returns:
+            Dictionnaire sérialisable en JSON de l'état du détecteur (tableaux numpy convertis par
+            checkpoint.json_default)
+        """
+        return {
+            'tracked_faces': self.tracked_faces,
+            'next_face_id': self.next_face_id,
+            'face_id_counter': self.face_id_counter,
+            'emotion_stability': self.emotion_stability,
+            'detection_interval': self.detection_interval,
+            'reid_gallery': self.reid_gallery.get_state() if self.reid_gallery is not None else None
+        }
+    
+    def load_state(self, state):
+        """Restaure l'état du tracking depuis un point de reprise
+        Args:
+            state: Dictionnaire retourné par get_state
+        """
+        self.tracked_faces = state['tracked_faces']
+        # Tuples et tableaux numpy deviennent des listes en JSON
+        for tracked_data in self.tracked_faces.values():
+            tracked_data['bbox'] = tuple(tracked_data['bbox'])
+            tracked_data['velocity'] = tuple(tracked_data['velocity'])
+            tracked_data['bbox_history'] = [tuple(bbox) for bbox in tracked_data['bbox_history']]
+            if tracked_data.get('embedding') is not None:
+                tracked_data['embedding'] = np.asarray(tracked_data['embedding'], dtype=np.float32)
+        self.next_face_id = state['next_face_id']
+        self.face_id_counter = state['face_id_counter']
+        self.emotion_stability = state['emotion_stability']
+        self.detection_interval = state['detection_interval']
+        if self.reid_gallery is not None and state.get('reid_gallery') is not None:
+            self.reid_gallery.load_state(state['reid_gallery'])
+    
     def clear_detections(self):
         """Efface l'historique des détections"""
         self.detections = []
         self.face_id_counter = 0
         self.tracked_faces = {}
         self.next_face_id = 1
-        self.emotion_stability = {} 
\ No newline at end of file
+        self.emotion_stability = {}
+        if self.reid_gallery is not None:
+            self.reid_gallery.clear() 
\ No newline at end of file
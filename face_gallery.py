@@ -0,0 +1,313 @@
+import importlib.util
+import os
+
+import cv2
+import numpy as np
+
+from attribute_analyzers import get_attribute_models_dir
+
+EMBEDDING_SIZE = 16
+
+REID_MODEL_FILE = 'face_recognition.onnx'
+
+
+def reid_enabled():
+    """Indique si la ré-identification des visages est activée (FACE_REID_ENABLED, défaut false)"""
+    return os.getenv('FACE_REID_ENABLED', 'false').lower() in ('1', 'true', 'yes', 'on')
+
+
+def get_reid_model_path():
+    """Modèle ONNX de reconnaissance faciale (FACE_REID_MODEL, défaut face_recognition.onnx
+    dans le dossier des modèles d'attributs)"""
+    return os.getenv('FACE_REID_MODEL') or os.path.join(get_attribute_models_dir(), REID_MODEL_FILE)
+
+
+def get_embedder_class(name=None):
+    """Classe du descripteur de ré-identification, avec repli sur la vignette
+    Args:
+        name: 'onnx' ou 'thumbnail' (défaut FACE_REID_EMBEDDER, onnx)
+    Returns:
+        ONNXFaceEmbedder si le modèle et onnxruntime sont présents, sinon ThumbnailEmbedder
+    """
+    name = name or os.getenv('FACE_REID_EMBEDDER', ONNXFaceEmbedder.name)
+    if name == ONNXFaceEmbedder.name and ONNXFaceEmbedder.is_available():
+        return ONNXFaceEmbedder
+    return ThumbnailEmbedder
+
+
+def create_face_embedder(name=None):
+    """Instancie le descripteur de ré-identification (voir get_embedder_class)"""
+    requested = name or os.getenv('FACE_REID_EMBEDDER', ONNXFaceEmbedder.name)
+    embedder_class = get_embedder_class(requested)
+    if requested != embedder_class.name:
+        print(f"Avertissement: modèle de ré-identification ou onnxruntime introuvable ({get_reid_model_path()}), "
+              f"utilisation de la vignette (seuil à valider avec validate_reid.py)")
+    return embedder_class()
+
+
+def get_reid_settings():
+    """Paramètres de ré-identification (inclus dans la clé du cache de résultats)
+    Lus dans l'environnement, sans allouer de galerie ni charger de modèle.
+    Returns:
+        Dictionnaire des paramètres, ou None si la ré-identification est désactivée
+    """
+    if not reid_enabled():
+        return None
+    embedder_class = get_embedder_class()
+    return {
+        'embedder': embedder_class.name,
+        'max_size': int(os.getenv('FACE_REID_GALLERY_SIZE', '256')),
+        'ttl_frames': int(os.getenv('FACE_REID_TTL_FRAMES', '1800')),
+        'refresh_frames': int(os.getenv('FACE_REID_REFRESH_FRAMES', '30')),
+        'threshold': float(os.getenv('FACE_REID_THRESHOLD', str(embedder_class.default_threshold)))
+    }
+
+
+def compute_face_embedding(image, bbox):
+    """Descripteur léger d'un visage: vignette en niveaux de gris égalisée, centrée et normée
+    Le produit scalaire de deux descripteurs est leur similarité cosinus (corrélation normalisée).
+    Args:
+        image: Frame BGR
+        bbox: Boîte englobante (x, y, w, h)
+    Returns:
+        Vecteur float32 de norme 1, ou None si la région est vide ou uniforme
+    """
+    x, y, w, h = (int(v) for v in bbox)
+    face_region = image[max(y, 0):y+h, max(x, 0):x+w]
+    if face_region.size == 0:
+        return None
+
+    if face_region.ndim == 3:
+        face_region = cv2.cvtColor(face_region, cv2.COLOR_BGR2GRAY)
+    thumbnail = cv2.resize(face_region, (EMBEDDING_SIZE, EMBEDDING_SIZE), interpolation=cv2.INTER_AREA)
+    vector = cv2.equalizeHist(thumbnail).astype(np.float32).ravel()
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return None
+    return vector / norm
+
+
+class ThumbnailEmbedder:
+    """Descripteur de repli sans modèle (compute_face_embedding)
+
+    Une vignette 16x16 distingue mal deux personnes proches: le seuil doit être validé sur des
+    visages étiquetés de la scène (validate_reid.py) avant d'activer la ré-identification.
+    """
+
+    name = 'thumbnail'
+    default_threshold = 0.85
+
+    def embed(self, image, bbox):
+        return compute_face_embedding(image, bbox)
+
+    def embed_boxes(self, image, bboxes):
+        return [compute_face_embedding(image, bbox) for bbox in bboxes]
+
+
+class ONNXFaceEmbedder:
+    """Descripteur de reconnaissance faciale par ONNX Runtime (ArcFace exporté de DeepFace)
+
+    Le modèle est produit une fois par export_attribute_models.py --reid. Entrée RGB 112x112
+    normalisée comme ArcFace ((x - 127.5) / 128), sortie ramenée à la norme 1.
+    """
+
+    name = 'onnx'
+    default_threshold = 0.45
+
+    def __init__(self, model_path=None):
+        """Initialise le descripteur
+        Args:
+            model_path: Modèle ONNX (FACE_REID_MODEL, défaut models/attributes/face_recognition.onnx)
+        """
+        self.model_path = model_path or get_reid_model_path()
+        self._session = None
+
+    @staticmethod
+    def is_available(model_path=None):
+        """Indique si onnxruntime et le modèle exporté sont présents (sans importer onnxruntime)"""
+        return importlib.util.find_spec('onnxruntime') is not None and os.path.exists(model_path or get_reid_model_path())
+
+    def _get_session(self):
+        if self._session is None:
+            import onnxruntime
+            from thread_budget import get_onnx_session_options
+
+            self._session = onnxruntime.InferenceSession(
+                self.model_path,
+                sess_options=get_onnx_session_options(),
+                providers=['CPUExecutionProvider']
+            )
+        return self._session
+
+    def embed_batch(self, face_images):
+        """Descripteurs de visages recadrés en une inférence
+        Args:
+            face_images: Visages BGR recadrés
+        Returns:
+            Matrice float32 (un descripteur de norme 1 par ligne)
+        """
+        faces = np.stack([
+            cv2.cvtColor(cv2.resize(face_image, (112, 112)), cv2.COLOR_BGR2RGB) for face_image in face_images
+        ]).astype(np.float32)
+        faces = (faces - 127.5) / 128.0
+        session = self._get_session()
+        vectors = session.run(None, {session.get_inputs()[0].name: faces})[0].astype(np.float32)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    def embed_boxes(self, image, bboxes):
+        """Descripteurs des visages d'une frame en une inférence
+        Args:
+            image: Frame BGR
+            bboxes: Boîtes englobantes (x, y, w, h)
+        Returns:
+            Liste de descripteurs, None pour une région vide
+        """
+        regions = []
+        for x, y, w, h in ((int(v) for v in bbox) for bbox in bboxes):
+            regions.append(image[max(y, 0):y+h, max(x, 0):x+w])
+        valid = [index for index, region in enumerate(regions) if region.size]
+        embeddings = [None] * len(regions)
+        if valid:
+            for index, vector in zip(valid, self.embed_batch([regions[index] for index in valid])):
+                embeddings[index] = vector
+        return embeddings
+
+    def embed(self, image, bbox):
+        return self.embed_boxes(image, [bbox])[0]
+
+
+class FaceGallery:
+    """Galerie des visages dont le track a expiré, pour restaurer leur identité à leur retour
+
+    Les descripteurs sont rangés dans une matrice allouée une fois (dimension du descripteur,
+    au premier ajout): la recherche est un seul produit matrice-vecteur. La galerie est bornée en taille (le plus ancien est remplacé) et en âge
+    (une entrée plus vieille que ttl_frames est ignorée puis libérée).
+    """
+
+    def __init__(self, max_size=None, ttl_frames=None, threshold=None, embedder=None, refresh_frames=None):
+        """Initialise la galerie
+        Args:
+            max_size: Visages conservés (FACE_REID_GALLERY_SIZE, défaut 256)
+            ttl_frames: Frames pendant lesquelles un visage expiré reste reconnaissable
+                (FACE_REID_TTL_FRAMES, défaut 1800)
+            threshold: Similarité cosinus minimale d'une ré-identification (FACE_REID_THRESHOLD,
+                défaut 0.45 avec le modèle ONNX, 0.85 avec la vignette)
+            embedder: Descripteur des visages (défaut create_face_embedder)
+            refresh_frames: Frames entre deux rafraîchissements du descripteur d'un track suivi
+                (FACE_REID_REFRESH_FRAMES, défaut 30)
+        """
+        self.embedder = embedder or create_face_embedder()
+        # is None et non "or": un seuil explicite de 0 reste un réglage valide
+        self.max_size = max_size if max_size is not None else int(os.getenv('FACE_REID_GALLERY_SIZE', '256'))
+        self.ttl_frames = ttl_frames if ttl_frames is not None else int(os.getenv('FACE_REID_TTL_FRAMES', '1800'))
+        self.refresh_frames = (refresh_frames if refresh_frames is not None
+                               else int(os.getenv('FACE_REID_REFRESH_FRAMES', '30')))
+        if threshold is None:
+            threshold = float(os.getenv('FACE_REID_THRESHOLD', str(self.embedder.default_threshold)))
+        self.threshold = threshold
+
+        # Allouée au premier ajout: la dimension dépend du descripteur
+        self._embeddings = None
+        # Frame d'expiration de chaque emplacement (-1: libre)
+        self._stored_at = np.full(self.max_size, -1, dtype=np.int64)
+        self._entries = [None] * self.max_size
+
+        self.matches = 0
+        self.misses = 0
+
+    def embed(self, image, bbox):
+        """Descripteur d'un visage détecté (None si la région est inexploitable)"""
+        return self.embedder.embed(image, bbox)
+
+    def embed_batch(self, image, bboxes):
+        """Descripteurs des nouveaux visages d'une frame (une seule inférence avec le modèle ONNX)"""
+        return self.embedder.embed_boxes(image, bboxes)
+
+    def __len__(self):
+        return int(np.count_nonzero(self._stored_at >= 0))
+
+    def add(self, face_id, embedding, track, frame_number):
+        """Range un visage dont le track expire
+        Args:
+            face_id: Identifiant du track
+            embedding: Descripteur (embed)
+            track: Données restaurées à la ré-identification (attributs...)
+            frame_number: Frame d'expiration
+        """
+        if self._embeddings is None:
+            self._embeddings = np.zeros((self.max_size, len(embedding)), dtype=np.float32)
+        # Emplacement libre (-1) s'il en reste, sinon le plus ancien
+        slot = int(np.argmin(self._stored_at))
+        self._embeddings[slot] = embedding
+        self._stored_at[slot] = frame_number
+        self._entries[slot] = (face_id, track)
+
+    def match(self, embedding, frame_number):
+        """Cherche un visage expiré ressemblant au descripteur (l'entrée trouvée est retirée)
+        Args:
+            embedding: Descripteur du nouveau visage
+            frame_number: Frame courante
+        Returns:
+            Tuple (identifiant, données du track), ou None
+        """
+        self._expire(frame_number)
+        valid = self._stored_at >= 0
+        if not valid.any():
+            self.misses += 1
+            return None
+
+        similarities = self._embeddings @ embedding
+        similarities[~valid] = -np.inf
+        slot = int(np.argmax(similarities))
+        if similarities[slot] < self.threshold:
+            self.misses += 1
+            return None
+
+        entry = self._entries[slot]
+        self._release(slot)
+        self.matches += 1
+        return entry
+
+    def _expire(self, frame_number):
+        expired = np.flatnonzero((self._stored_at >= 0) & (frame_number - self._stored_at > self.ttl_frames))
+        for slot in expired:
+            self._release(slot)
+
+    def _release(self, slot):
+        self._stored_at[slot] = -1
+        self._entries[slot] = None
+
+    def get_state(self):
+        """État sérialisable (points de reprise): seules les entrées occupées sont conservées"""
+        slots = np.flatnonzero(self._stored_at >= 0)
+        return {
+            'embeddings': self._embeddings[slots] if self._embeddings is not None else [],
+            'stored_at': self._stored_at[slots],
+            'entries': [self._entries[slot] for slot in slots],
+            'matches': self.matches,
+            'misses': self.misses
+        }
+
+    def load_state(self, state):
+        """Restaure l'état retourné par get_state (JSON: tableaux relus depuis des listes)"""
+        self.clear()
+        count = min(len(state['entries']), self.max_size)
+        if count:
+            embeddings = np.asarray(state['embeddings'][:count], dtype=np.float32)
+            self._embeddings = np.zeros((self.max_size, embeddings.shape[1]), dtype=np.float32)
+            self._embeddings[:count] = embeddings
+            self._stored_at[:count] = state['stored_at'][:count]
+            for slot, (face_id, track) in enumerate(state['entries'][:count]):
+                self._entries[slot] = (face_id, track)
+        self.matches = state['matches']
+        self.misses = state['misses']
+
+    def get_stats(self):
+        return {'size': len(self), 'matches': self.matches, 'misses': self.misses}
+
+    def clear(self):
+        self._stored_at[:] = -1
+        self._entries = [None] * self.max_size
+        self.matches = 0
+        self.misses = 0
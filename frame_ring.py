@@ -0,0 +1,341 @@
+import multiprocessing
+import os
+import queue
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from realtime_worker import RealtimeWorker
+from thread_budget import ThreadBudget
+
+
+class SharedFrameRing:
+    """Anneau de frames en mémoire partagée (multiprocessing.shared_memory)
+
+    Disposition du segment: numéros de séquence des emplacements (int64), horodatages de
+    capture (float64), puis les emplacements de frames. Un emplacement en cours d'écriture
+    porte la séquence -1; un lecteur vérifie que la séquence n'a pas changé après lecture.
+    """
+
+    def __init__(self, frame_shape, slots, name=None, create=True):
+        """Crée ou rattache l'anneau
+        Args:
+            frame_shape: Forme des frames (hauteur, largeur, canaux)
+            slots: Nombre d'emplacements
+            name: Nom du segment (requis pour se rattacher depuis un autre processus)
+            create: Crée le segment (False: rattachement à un segment existant)
+        """
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.frame_shape))
+        header_bytes = 16 * slots
+
+        self.shm = shared_memory.SharedMemory(name=name, create=create,
+                                              size=header_bytes + frame_bytes * slots)
+        self.name = self.shm.name
+        self.owner = create
+
+        self.seqs = np.ndarray((slots,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        self.captured_at = np.ndarray((slots,), dtype=np.float64, buffer=self.shm.buf, offset=8 * slots)
+        self.frames = np.ndarray((slots,) + self.frame_shape, dtype=np.uint8,
+                                 buffer=self.shm.buf, offset=header_bytes)
+        if create:
+            self.seqs[:] = 0
+
+    @classmethod
+    def attach(cls, name, frame_shape, slots):
+        """Rattache un anneau créé par un autre processus"""
+        return cls(frame_shape, slots, name=name, create=False)
+
+    def write(self, slot, seq, frame, captured_at):
+        """Copie une frame dans un emplacement
+        Args:
+            slot: Emplacement libre choisi par le propriétaire de l'anneau
+            seq: Numéro de séquence (> 0)
+            frame: Frame BGR de la forme de l'anneau
+            captured_at: Horodatage de capture
+        """
+        self.seqs[slot] = -1
+        self.frames[slot] = frame
+        self.captured_at[slot] = captured_at
+        self.seqs[slot] = seq
+
+    def view(self, slot, seq):
+        """Frame d'une séquence, sans copie
+        Returns:
+            Vue numpy sur l'emplacement, ou None si la frame a été remplacée
+        """
+        if self.seqs[slot] != seq:
+            return None
+        return self.frames[slot]
+
+    def is_current(self, slot, seq):
+        """Indique si l'emplacement contient toujours la séquence (lecture non déchirée)"""
+        return self.seqs[slot] == seq
+
+    def close(self):
+        """Détache le segment (et le supprime côté créateur)"""
+        # Les vues numpy référencent le tampon: elles doivent disparaître avant close()
+        self.seqs = self.captured_at = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _detection_process(ring_name, frame_shape, slots, tasks, results, backend, detection_profile, threads):
+    """Processus de détection: lit les frames dans l'anneau et renvoie les boîtes détectées"""
+    from face_detector import FaceDetector
+    from thread_budget import apply_thread_settings
+
+    apply_thread_settings(threads)
+    ring = SharedFrameRing.attach(ring_name, frame_shape, slots)
+    detector = FaceDetector(backend=backend, detection_profile=detection_profile)
+    results.put(('ready', os.getpid()))
+
+    frame = None
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+
+            seq, slot = task
+            frame = ring.view(slot, seq)
+            if frame is None:
+                results.put((seq, None, 0.0))
+                continue
+
+            start = time.perf_counter()
+            faces = [tuple(int(v) for v in bbox) for bbox in detector.detect_faces(frame)]
+            detect_time = time.perf_counter() - start
+
+            # Emplacement réécrit pendant la détection: résultat écarté
+            results.put((seq, faces if ring.is_current(slot, seq) else None, detect_time))
+    finally:
+        del frame
+        ring.close()
+
+
+class SharedMemoryDetectionPool:
+    """Pool de processus de détection alimenté par un anneau de frames en mémoire partagée
+
+    Seul le numéro de séquence transite par la file des tâches et seules les boîtes reviennent
+    par la file des résultats: les frames ne sont jamais sérialisées. Un emplacement reste réservé
+    jusqu'à release(), l'anneau n'écrase donc jamais une frame en cours de traitement; quand tous
+    les emplacements sont occupés, la nouvelle frame est abandonnée.
+    """
+
+    def __init__(self, frame_shape, num_processes=None, slots=None, backend=None, detection_profile=None):
+        """Initialise le pool
+        Args:
+            frame_shape: Forme des frames (hauteur, largeur, canaux)
+            num_processes: Processus de détection (SHM_DETECTOR_PROCESSES, défaut 2)
+            slots: Emplacements de l'anneau (SHM_RING_SLOTS, défaut 2 par processus + 2)
+            backend: Backend de détection des processus
+            detection_profile: Profil de détection des processus
+        """
+        self.num_processes = num_processes or int(os.getenv('SHM_DETECTOR_PROCESSES', '2'))
+        # Part du budget CPU de chaque processus: N processus à la part entière sursouscriraient les cœurs
+        self.threads = ThreadBudget().threads_per_worker(self.num_processes)
+        self.slots = slots or int(os.getenv('SHM_RING_SLOTS', str(self.num_processes * 2 + 2)))
+        self.frame_shape = tuple(frame_shape)
+        self.backend = backend
+        self.detection_profile = detection_profile
+
+        self.ring = None
+        self._context = multiprocessing.get_context('spawn')
+        self._tasks = self._context.Queue()
+        self._results = self._context.Queue()
+        self._processes = []
+
+        self._seq = 0
+        # Séquence -> (emplacement, horodatage): les résultats arrivent dans le désordre, un
+        # emplacement n'est réutilisé qu'une fois sa propre séquence libérée
+        self._in_flight = {}
+        self._free_slots = deque(range(self.slots))
+        self.frames_submitted = 0
+        self.frames_dropped = 0
+        self.frames_torn = 0
+        self.detect_times = deque(maxlen=100)
+
+    def start(self, timeout=60):
+        """Crée l'anneau et démarre les processus (attend leur initialisation)
+        Un démarrage en échec arrête les processus lancés et supprime le segment partagé.
+        """
+        self.ring = SharedFrameRing(self.frame_shape, self.slots)
+        try:
+            for _ in range(self.num_processes):
+                process = self._context.Process(
+                    target=_detection_process,
+                    args=(self.ring.name, self.frame_shape, self.slots, self._tasks, self._results,
+                          self.backend, self.detection_profile, self.threads),
+                    daemon=True
+                )
+                process.start()
+                self._processes.append(process)
+
+            for _ in range(self.num_processes):
+                message = self._results.get(timeout=timeout)
+                if message[0] != 'ready':
+                    raise RuntimeError(f"Message inattendu d'un processus de détection: {message}")
+        except BaseException:
+            self.stop()
+            raise
+        return self
+
+    def submit(self, frame, captured_at):
+        """Copie une frame dans l'anneau et la confie aux processus
+        Args:
+            frame: Frame BGR (redimensionnée si sa forme diffère de celle de l'anneau)
+            captured_at: Horodatage de capture
+        Returns:
+            Numéro de séquence, ou None si la frame est abandonnée (anneau plein)
+        """
+        if not self._free_slots:
+            self.frames_dropped += 1
+            return None
+
+        if frame.shape != self.frame_shape:
+            frame = cv2.resize(frame, (self.frame_shape[1], self.frame_shape[0]))
+
+        self._seq += 1
+        slot = self._free_slots.popleft()
+        self.ring.write(slot, self._seq, frame, captured_at)
+        self._in_flight[self._seq] = (slot, captured_at)
+        self._tasks.put((self._seq, slot))
+        self.frames_submitted += 1
+        return self._seq
+
+    def poll(self, timeout=0.0):
+        """Résultats disponibles
+        Args:
+            timeout: Attente maximale du premier résultat
+        Returns:
+            Liste de tuples (séquence, horodatage de capture, boîtes ou None si lecture déchirée)
+        """
+        items = []
+        try:
+            items.append(self._results.get(timeout=timeout) if timeout else self._results.get_nowait())
+            while True:
+                items.append(self._results.get_nowait())
+        except queue.Empty:
+            pass
+
+        results = []
+        for seq, faces, detect_time in items:
+            if faces is None:
+                self.frames_torn += 1
+            else:
+                self.detect_times.append(detect_time)
+            reserved = self._in_flight.get(seq)
+            results.append((seq, reserved[1] if reserved else None, faces))
+        return sorted(results, key=lambda item: item[0])
+
+    def frame(self, seq):
+        """Vue sans copie sur la frame d'une séquence réservée"""
+        reserved = self._in_flight.get(seq)
+        if reserved is None:
+            return None
+        return self.ring.view(reserved[0], seq)
+
+    def release(self, seq):
+        """Libère l'emplacement d'une séquence traitée"""
+        reserved = self._in_flight.pop(seq, None)
+        if reserved is not None:
+            self._free_slots.append(reserved[0])
+
+    def stop(self):
+        """Arrête les processus puis supprime le segment partagé"""
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        if self.ring:
+            self.ring.close()
+            self.ring = None
+
+    def get_stats(self):
+        """Compteurs de l'anneau et temps de détection moyen"""
+        return {
+            'processes': self.num_processes,
+            'threads_per_process': self.threads,
+            'slots': self.slots,
+            'in_flight': len(self._in_flight),
+            'frames_submitted': self.frames_submitted,
+            'frames_dropped': self.frames_dropped,
+            'frames_torn': self.frames_torn,
+            'detect_ms': sum(self.detect_times) * 1000 / len(self.detect_times) if self.detect_times else 0.0
+        }
+
+
+class SharedMemoryRealtimeWorker(RealtimeWorker):
+    """Worker temps réel dont la détection est répartie sur des processus
+
+    Chaque frame capturée est détectée par un processus du pool; le tracking, l'annotation et
+    la publication restent dans ce thread, dans l'ordre des séquences. L'intervalle de détection
+    ne s'applique pas: la détection porte sur chaque frame, en parallèle sur plusieurs cœurs.
+    """
+
+    def __init__(self, capture, detector, state, num_processes=None, backend=None, detection_profile=None,
+                 profiler=None, governor=None, policy=None):
+        """Initialise le worker
+        Args:
+            capture: LatestFrameCapture démarrée
+            detector: FaceDetector dédié à la session (tracking et attributs)
+            state: RealtimeState partagé avec l'interface
+            num_processes: Processus de détection (SHM_DETECTOR_PROCESSES, défaut 2)
+            backend: Backend de détection des processus
+            detection_profile: Profil de détection des processus
+            profiler: AnalysisProfiler optionnel
+            governor: MemoryGovernor optionnel
+            policy: LatencyPolicy optionnelle
+        """
+        super().__init__(capture, detector, state, profiler=profiler, governor=governor, policy=policy)
+        self.num_processes = num_processes
+        self.backend = backend
+        self.detection_profile = detection_profile
+        self.pool = None
+
+    def _run(self):
+        """Boucle principale: alimente l'anneau et consomme les détections dans l'ordre"""
+        last_capture_seq = 0
+        last_processed = 0
+
+        try:
+            while not self._stop_event.is_set():
+                ret, frame, seq, captured_at = self.capture.read_latest(timeout=0.01)
+                if ret and frame is not None and seq != last_capture_seq:
+                    last_capture_seq = seq
+                    if self.pool is None:
+                        # Forme de l'anneau fixée par la première frame de la caméra
+                        self.pool = SharedMemoryDetectionPool(
+                            frame.shape, self.num_processes, backend=self.backend,
+                            detection_profile=self.detection_profile
+                        ).start()
+                        self.state.log(f"Détection multi-processus: {self.pool.num_processes} processus "
+                                       f"à {self.pool.threads} thread(s), "
+                                       f"anneau de {self.pool.slots} frames en mémoire partagée")
+                    self.pool.submit(frame, captured_at)
+
+                if self.pool is None:
+                    continue
+
+                for ring_seq, ring_captured_at, faces in self.pool.poll():
+                    # Résultat arrivé après une frame plus récente: il n'est plus affiché
+                    if faces is not None and ring_seq > last_processed:
+                        last_processed = ring_seq
+                        self.handle_frame(self.pool.frame(ring_seq), ring_captured_at, faces)
+                    self.pool.release(ring_seq)
+        except Exception as e:
+            self.state.set_error(str(e))
+            self.state.log(f"Erreur détection multi-processus: {str(e)}")
+        finally:
+            if self.pool:
+                self.pool.stop()
+                self.pool = None
@@ -0,0 +1,93 @@
+import cv2
+import os
+import time
+
+
+class JPEGFrameEncoder:
+    """Encodage JPEG unique des frames affichées dans le navigateur
+
+    La frame BGR est redimensionnée à la largeur d'affichage puis encodée une seule fois avec
+    cv2.imencode (pas de conversion RGB ni d'encodage PNG côté Streamlit). Une frame déjà
+    encodée n'est pas ré-encodée: les mêmes octets sont renvoyés, et Streamlit les dé-duplique.
+    """
+
+    def __init__(self, quality=None, display_width=None):
+        """Initialise l'encodeur
+        Args:
+            quality: Qualité JPEG 1-100 (DISPLAY_JPEG_QUALITY, défaut 80)
+            display_width: Largeur d'affichage en pixels (DISPLAY_WIDTH, défaut 640)
+        """
+        self.quality = quality or int(os.getenv('DISPLAY_JPEG_QUALITY', '80'))
+        self.display_width = display_width or int(os.getenv('DISPLAY_WIDTH', '640'))
+
+        self.frames_encoded = 0
+        self.frames_skipped = 0
+        self.total_bytes = 0
+        self.total_encode_time = 0.0
+        self.last_bytes = 0
+        self.last_encode_ms = 0.0
+
+        self._last_key = None
+        self._last_jpeg = None
+        self._last_width = None
+
+    def configure(self, quality, display_width):
+        """Change la qualité ou la résolution (invalide la frame en cache)"""
+        if quality != self.quality or display_width != self.display_width:
+            self.quality = quality
+            self.display_width = display_width
+            self._last_key = None
+
+    def encode(self, frame, frame_id):
+        """Encode une frame en JPEG si elle a changé
+        Args:
+            frame: Frame BGR
+            frame_id: Identifiant de la frame (numéro de séquence)
+        Returns:
+            Tuple (octets JPEG, largeur encodée, True si la frame vient d'être encodée)
+        """
+        if frame_id == self._last_key and self._last_jpeg is not None:
+            self.frames_skipped += 1
+            return self._last_jpeg, self._last_width, False
+
+        start = time.perf_counter()
+
+        height, width = frame.shape[:2]
+        if width > self.display_width:
+            scale = self.display_width / width
+            frame = cv2.resize(frame, (self.display_width, int(height * scale)), interpolation=cv2.INTER_AREA)
+
+        ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise ValueError("Échec de l'encodage JPEG de la frame")
+
+        jpeg = buffer.tobytes()
+        encode_time = time.perf_counter() - start
+
+        self.frames_encoded += 1
+        self.total_bytes += len(jpeg)
+        self.total_encode_time += encode_time
+        self.last_bytes = len(jpeg)
+        self.last_encode_ms = encode_time * 1000
+
+        self._last_key = frame_id
+        self._last_jpeg = jpeg
+        self._last_width = frame.shape[1]
+        return jpeg, self._last_width, True
+
+    def get_stats(self):
+        """Statistiques de transport
+        Returns:
+            Dictionnaire (frames encodées/ignorées, octets et temps d'encodage moyens)
+        """
+        encoded = max(self.frames_encoded, 1)
+        return {
+            'frames_encoded': self.frames_encoded,
+            'frames_skipped': self.frames_skipped,
+            'avg_bytes': self.total_bytes / encoded,
+            'avg_encode_ms': self.total_encode_time * 1000 / encoded,
+            'last_bytes': self.last_bytes,
+            'last_encode_ms': self.last_encode_ms,
+            'quality': self.quality,
+            'display_width': self.display_width
+        }
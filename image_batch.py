@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Analyse par lots d'un dossier d'images (détection et attributs, en parallèle)
+
+Les images sont décodées par un pool de threads puis analysées par un pool de processus
+(un FaceDetector par processus). Les résultats sont écrits au fil de l'eau dans un fichier
+JSONL, une ligne par image; une relance reprend en ignorant les images déjà traitées.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import cv2
+
+from thread_budget import ThreadBudget, apply_thread_settings
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+
+ATTRIBUTE_COLUMNS = ['age_estimation', 'gender_classification', 'ethnicity_estimation', 'emotion']
+
+_worker_detector = None
+_worker_flags = None
+
+
+def find_images(input_dir, recursive=True):
+    """Liste les images d'un dossier
+    Args:
+        input_dir: Dossier source
+        recursive: Parcourt les sous-dossiers
+    Returns:
+        Chemins relatifs au dossier, triés
+    """
+    images = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for filename in files:
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                images.append(os.path.relpath(os.path.join(root, filename), input_dir))
+        if not recursive:
+            break
+    return sorted(images)
+
+
+def load_processed(results_path):
+    """Images déjà présentes dans le fichier de résultats (reprise)
+    Args:
+        results_path: Fichier JSONL
+    Returns:
+        Ensemble des chemins relatifs traités (les images en erreur sont retentées)
+    """
+    processed = set()
+    if not os.path.exists(results_path):
+        return processed
+
+    with open(results_path, 'rb+') as f:
+        data = f.read()
+        # Dernière ligne tronquée par une interruption: supprimée, l'image sera retraitée
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            f.truncate(complete)
+
+    for line in data[:complete].decode('utf-8').splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if 'error' not in record:
+            processed.add(record['image'])
+    return processed
+
+
+def decode_image(input_dir, relative_path):
+    """Lit et décode une image (exécuté dans le pool de threads, cv2 libère le GIL)"""
+    return relative_path, cv2.imread(os.path.join(input_dir, relative_path), cv2.IMREAD_COLOR)
+
+
+def _init_worker(backend, analyzer, flags, threads):
+    """Initialise le détecteur d'un processus de travail (modèles chargés une fois par processus)"""
+    global _worker_detector, _worker_flags
+    # Avant le chargement des modèles: TensorFlow lit son nombre de threads à l'initialisation
+    apply_thread_settings(threads)
+    from face_detector import FaceDetector
+    from attribute_analyzers import get_actions
+
+    _worker_flags = flags
+    _worker_detector = FaceDetector(
+        backend=backend, analyzer=analyzer,
+        preload_actions=get_actions(*flags) or None
+    )
+
+
+def analyze_image(relative_path, image):
+    """Détecte et analyse les visages d'une image (exécuté dans un processus de travail)
+    Returns:
+        Dictionnaire du résultat de l'image
+    """
+    faces = []
+    for index, bbox in enumerate(_worker_detector.detect_faces(image)):
+        bbox = tuple(int(v) for v in bbox)
+        analysis = _worker_detector.analyze_face_real(image, bbox, *_worker_flags)
+        face = {'face_index': index, 'bbox': list(bbox)}
+        face.update(analysis or {})
+        faces.append(face)
+
+    height, width = image.shape[:2]
+    return {'image': relative_path, 'width': width, 'height': height, 'faces': faces}
+
+
+def run_image_batch(input_dir, results_path, backend=None, analyzer=None, flags=(True, True, True, True),
+                    workers=None, decode_threads=None, recursive=True, progress_callback=None):
+    """Analyse toutes les images non encore traitées d'un dossier
+    Args:
+        input_dir: Dossier source
+        results_path: Fichier JSONL de résultats (complété, jamais réécrit)
+        backend: Backend de détection
+        analyzer: Analyseur d'attributs
+        flags: (âge, genre, émotion, ethnicité)
+        workers: Processus d'analyse (IMAGE_BATCH_WORKERS, défaut part du budget CPU_THREAD_BUDGET)
+        decode_threads: Threads de décodage (IMAGE_BATCH_DECODE_THREADS, défaut 4)
+        recursive: Parcourt les sous-dossiers
+        progress_callback: Fonction (traitées, total, images/s) appelée après chaque image
+    Returns:
+        Dictionnaire de synthèse
+    """
+    budget = ThreadBudget()
+    workers = workers or int(os.getenv('IMAGE_BATCH_WORKERS', str(budget.pool_size())))
+    threads = budget.threads_per_worker(workers)
+    decode_threads = decode_threads or int(os.getenv('IMAGE_BATCH_DECODE_THREADS', '4'))
+
+    images = find_images(input_dir, recursive)
+    processed = load_processed(results_path)
+    pending = [path for path in images if path not in processed]
+    print(f"Budget CPU: {budget.describe()}; {workers} processus d'analyse à {threads} thread(s)")
+    print(f"{len(images)} images trouvées, {len(images) - len(pending)} déjà traitées, {len(pending)} à analyser")
+
+    done = 0
+    failed = 0
+    faces = 0
+    started = time.perf_counter()
+    # Images en vol (décodage + analyse): borne la mémoire quand l'analyse est plus lente que le décodage
+    max_in_flight = workers * 2
+
+    with open(results_path, 'a', encoding='utf-8') as output, \
+            ThreadPoolExecutor(max_workers=decode_threads) as decoders, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(backend, analyzer, tuple(flags), threads)) as analyzers:
+
+        def write(record):
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            output.flush()
+            if progress_callback:
+                elapsed = time.perf_counter() - started
+                progress_callback(done + failed, len(pending), (done + failed) / elapsed if elapsed > 0 else 0.0)
+
+        # Décodages soumis au fil de l'eau: images en cours de décodage ou d'analyse bornées par max_in_flight
+        paths = iter(pending)
+        decoding = set()
+        in_flight = {}
+        exhausted = False
+
+        while in_flight or decoding or not exhausted:
+            while not exhausted and len(decoding) + len(in_flight) < max_in_flight:
+                relative_path = next(paths, None)
+                if relative_path is None:
+                    exhausted = True
+                    break
+                decoding.add(decoders.submit(decode_image, input_dir, relative_path))
+
+            if not in_flight and not decoding:
+                continue
+
+            completed, _ = wait(decoding | set(in_flight), return_when=FIRST_COMPLETED)
+            for future in completed:
+                if future in decoding:
+                    decoding.discard(future)
+                    relative_path, image = future.result()
+                    if image is None:
+                        failed += 1
+                        write({'image': relative_path, 'error': "Image illisible", 'faces': []})
+                    else:
+                        in_flight[analyzers.submit(analyze_image, relative_path, image)] = relative_path
+                    continue
+
+                relative_path = in_flight.pop(future)
+                try:
+                    record = future.result()
+                    faces += len(record['faces'])
+                    done += 1
+                except Exception as e:
+                    record = {'image': relative_path, 'error': str(e), 'faces': []}
+                    failed += 1
+                write(record)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'total_images': len(images),
+        'skipped': len(images) - len(pending),
+        'processed': done,
+        'failed': failed,
+        'faces': faces,
+        'elapsed_s': elapsed,
+        'images_per_s': (done + failed) / elapsed if elapsed > 0 else 0.0
+    }
+
+
+def export_results_csv(results_path, csv_path):
+    """Exporte les résultats JSONL en CSV (une ligne par visage)"""
+    with open(results_path, 'r', encoding='utf-8') as source, \
+            open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['image', 'face_index', 'bbox'] + ATTRIBUTE_COLUMNS,
+                                delimiter=';', extrasaction='ignore')
+        writer.writeheader()
+        for line in source:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            for face in record.get('faces', []):
+                writer.writerow({'image': record['image'], **face, 'bbox': tuple(face['bbox'])})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse en parallèle les visages d'un dossier d'images")
+    parser.add_argument('input_dir', help="Dossier d'images")
+    parser.add_argument('--output', default=None, help="Fichier JSONL de résultats (défaut: <dossier>/face_results.jsonl)")
+    parser.add_argument('--csv', default=None, help="Export CSV final (une ligne par visage)")
+    parser.add_argument('--workers', type=int, default=None, help="Processus d'analyse")
+    parser.add_argument('--decode-threads', type=int, default=None, help="Threads de décodage")
+    parser.add_argument('--backend', default=None, help="Backend de détection")
+    parser.add_argument('--analyzer', default=None, help="Analyseur d'attributs ('deepface' ou 'onnx')")
+    parser.add_argument('--no-recursive', action='store_true', help="Ignore les sous-dossiers")
+    parser.add_argument('--no-age', action='store_true', help="Désactive l'estimation d'âge")
+    parser.add_argument('--no-gender', action='store_true', help="Désactive la classification du genre")
+    parser.add_argument('--no-emotion', action='store_true', help="Désactive l'analyse des émotions")
+    parser.add_argument('--no-ethnicity', action='store_true', help="Désactive l'estimation de l'ethnicité")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_dir):
+        print(f"Dossier introuvable: {args.input_dir}")
+        sys.exit(1)
+
+    results_path = args.output or os.path.join(args.input_dir, 'face_results.jsonl')
+    flags = (not args.no_age, not args.no_gender, not args.no_emotion, not args.no_ethnicity)
+
+    def report(count, total, rate):
+        if count % 50 == 0 or count == total:
+            print(f"  {count}/{total} images ({rate:.1f} images/s)")
+
+    summary = run_image_batch(
+        args.input_dir, results_path, args.backend, args.analyzer, flags,
+        args.workers, args.decode_threads, not args.no_recursive, report
+    )
+
+    print(f"\n{summary['processed']} images analysées, {summary['failed']} en erreur, "
+          f"{summary['skipped']} ignorées (déjà traitées)")
+    print(f"{summary['faces']} visages en {summary['elapsed_s']:.1f} s ({summary['images_per_s']:.1f} images/s)")
+    print(f"Résultats: {results_path}")
+
+    if args.csv:
+        export_results_csv(results_path, args.csv)
+        print(f"Export CSV: {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
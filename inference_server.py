@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Service HTTP local d'inférence (détection + attributs) avec regroupement dynamique des requêtes
+
+Endpoints:
+    POST /detect   Frame JPEG -> visages détectés et leurs attributs
+    POST /analyze  Visage recadré JPEG -> attributs
+    GET  /stats    Compteurs de débit, taille des lots, latences
+    GET  /health   État du service
+
+Les attributs demandés se choisissent par paramètres de requête (?age=1&gender=1&emotion=0&ethnicity=0).
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+import numpy as np
+
+from attribute_analyzers import map_analysis_result
+
+ATTRIBUTE_FLAGS = ('age', 'gender', 'emotion', 'ethnicity')
+
+
+class QueueFullError(Exception):
+    """File d'attente pleine: la requête est rejetée (délestage)"""
+
+
+class InferenceRequest:
+    """Requête en attente de traitement par le lot suivant"""
+
+    def __init__(self, kind, image, flags):
+        self.kind = kind
+        self.image = image
+        self.flags = flags
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def resolve(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.done.set()
+
+
+class DynamicBatcher:
+    """Regroupe les requêtes concurrentes en lots sous un budget de latence
+
+    Un seul thread exécute les modèles: le premier élément d'un lot attend au plus
+    max_latency_ms que d'autres requêtes le rejoignent, dans la limite de max_batch_size.
+    """
+
+    def __init__(self, detector, max_batch_size=None, max_latency_ms=None, max_queue=None, timeout_s=None):
+        """Initialise le regroupeur
+        Args:
+            detector: FaceDetector partagé par toutes les requêtes
+            max_batch_size: Requêtes maximum par lot (INFERENCE_MAX_BATCH, défaut 16)
+            max_latency_ms: Attente maximale pour compléter un lot (INFERENCE_MAX_LATENCY_MS, défaut 20)
+            max_queue: Requêtes en attente au-delà desquelles les nouvelles sont rejetées (INFERENCE_MAX_QUEUE, défaut 64)
+            timeout_s: Âge au-delà duquel une requête en attente est abandonnée (INFERENCE_TIMEOUT_S, défaut 10)
+        """
+        self.detector = detector
+        self.max_batch_size = max_batch_size or int(os.getenv('INFERENCE_MAX_BATCH', '16'))
+        self.max_latency = (max_latency_ms or float(os.getenv('INFERENCE_MAX_LATENCY_MS', '20'))) / 1000
+        self.timeout = timeout_s or float(os.getenv('INFERENCE_TIMEOUT_S', '10'))
+        self.queue = queue.Queue(maxsize=max_queue or int(os.getenv('INFERENCE_MAX_QUEUE', '64')))
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self.started_at = time.time()
+        self.requests = 0
+        self.completed = 0
+        self.rejected = 0
+        self.expired = 0
+        self.failed = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.faces_analyzed = 0
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, kind, image, flags):
+        """Ajoute une requête et attend son résultat
+        Args:
+            kind: 'detect' (frame complète) ou 'analyze' (visage recadré)
+            image: Image BGR décodée
+            flags: Dictionnaire des attributs demandés
+        Returns:
+            Liste des visages (bbox et attributs)
+        Raises:
+            QueueFullError: File pleine
+            TimeoutError: Résultat non disponible dans le délai
+        """
+        request = InferenceRequest(kind, image, flags)
+        with self._lock:
+            self.requests += 1
+        try:
+            self.queue.put_nowait(request)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise QueueFullError("File d'inférence pleine")
+
+        if not request.done.wait(self.timeout):
+            raise TimeoutError("Délai d'inférence dépassé")
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def stop(self):
+        self._running = False
+        self._thread.join(timeout=2)
+
+    def _collect_batch(self):
+        """Attend une requête puis complète le lot jusqu'à la taille ou l'échéance maximale"""
+        try:
+            first = self.queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = first.enqueued_at + self.max_latency
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            # Délestage des requêtes dont le client a déjà abandonné l'attente
+            now = time.perf_counter()
+            live = []
+            for request in batch:
+                if now - request.enqueued_at > self.timeout:
+                    request.resolve(error=TimeoutError("Requête expirée dans la file"))
+                else:
+                    live.append(request)
+            with self._lock:
+                self.expired += len(batch) - len(live)
+            if not live:
+                continue
+
+            try:
+                self._process_batch(live)
+            except Exception as e:
+                print(f"Erreur inférence par lot: {e}")
+                for request in live:
+                    request.resolve(error=e)
+                with self._lock:
+                    self.failed += len(live)
+                continue
+
+            finished = time.perf_counter()
+            with self._lock:
+                self.batches += 1
+                self.batched_requests += len(live)
+                self.completed += len(live)
+                self._latencies.extend(finished - request.enqueued_at for request in live)
+
+    def _process_batch(self, batch):
+        """Détecte les visages de chaque frame puis analyse tous les visages du lot en un appel"""
+        faces = []
+        owners = []
+        for request in batch:
+            if request.kind == 'detect':
+                bboxes = self.detector.detect_faces(request.image)
+            else:
+                height, width = request.image.shape[:2]
+                bboxes = [(0, 0, width, height)]
+            request.result = []
+            for bbox in bboxes:
+                faces.append((request.image, tuple(int(v) for v in bbox)))
+                owners.append(request)
+
+        # Union des attributs demandés: un seul passage par modèle pour tout le lot
+        union = {flag: any(request.flags[flag] for request in batch) for flag in ATTRIBUTE_FLAGS}
+        raw_results = self.detector.analyze_faces_batch(
+            faces, union['age'], union['gender'], union['emotion'], union['ethnicity']
+        ) if faces else []
+
+        for (image, bbox), request, raw in zip(faces, owners, raw_results):
+            face = {'bbox': list(bbox)}
+            if raw is not None:
+                face.update(map_analysis_result(
+                    raw, request.flags['age'], request.flags['gender'],
+                    request.flags['emotion'], request.flags['ethnicity']
+                ))
+            request.result.append(face)
+
+        with self._lock:
+            self.faces_analyzed += sum(raw is not None for raw in raw_results)
+        for request in batch:
+            request.resolve(request.result)
+
+    def get_stats(self):
+        """Compteurs de débit et percentiles de latence (file + inférence)"""
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            elapsed = max(time.time() - self.started_at, 1e-6)
+            return {
+                'requests': self.requests,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'expired': self.expired,
+                'failed': self.failed,
+                'batches': self.batches,
+                'avg_batch_size': self.batched_requests / self.batches if self.batches else 0.0,
+                'faces_analyzed': self.faces_analyzed,
+                'queue_depth': self.queue.qsize(),
+                'queue_capacity': self.queue.maxsize,
+                'requests_per_s': self.completed / elapsed,
+                'latency_p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+                'latency_p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else None,
+                'uptime_s': elapsed
+            }
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    """Gestionnaire HTTP (un thread par connexion, inférence déléguée au regroupeur)"""
+
+    server_version = "FaceInference/1.0"
+
+    def log_message(self, format, *args):
+        # Journal d'accès désactivé: une ligne par frame noierait la console
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/stats':
+            self._send_json(200, self.server.batcher.get_stats())
+        elif path == '/health':
+            self._send_json(200, {
+                'status': 'ok',
+                'detector_backend': self.server.batcher.detector.detector_backend.name,
+                'attribute_analyzer': self.server.batcher.detector.attribute_analyzer.name
+            })
+        else:
+            self._send_json(404, {'error': 'Endpoint inconnu'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        kind = url.path.strip('/')
+        if kind not in ('detect', 'analyze'):
+            self._send_json(404, {'error': 'Endpoint inconnu'})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        if length <= 0:
+            self._send_json(400, {'error': 'Corps de requête vide (image JPEG attendue)'})
+            return
+        if length > self.server.max_body_bytes:
+            self._send_json(413, {'error': 'Image trop volumineuse'})
+            return
+
+        data = np.frombuffer(self.rfile.read(length), dtype=np.uint8)
+        image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if image is None:
+            self._send_json(400, {'error': 'Image illisible'})
+            return
+
+        query = parse_qs(url.query)
+        flags = {
+            flag: query.get(flag, ['1'])[0].lower() in ('1', 'true', 'yes', 'on')
+            for flag in ATTRIBUTE_FLAGS
+        }
+
+        started = time.perf_counter()
+        try:
+            faces = self.server.batcher.submit(kind, image, flags)
+        except QueueFullError as e:
+            self._send_json(503, {'error': str(e)}, {'Retry-After': '1'})
+            return
+        except TimeoutError as e:
+            self._send_json(504, {'error': str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+
+        self._send_json(200, {
+            'faces': faces,
+            'latency_ms': (time.perf_counter() - started) * 1000
+        })
+
+
+def create_server(detector, host=None, port=None, batcher=None):
+    """Crée le serveur HTTP (non démarré)
+    Args:
+        detector: FaceDetector partagé
+        host: Adresse d'écoute (INFERENCE_HOST, défaut 127.0.0.1)
+        port: Port d'écoute (INFERENCE_PORT, défaut 8765; 0 = port libre)
+        batcher: DynamicBatcher (créé depuis l'environnement si None)
+    Returns:
+        ThreadingHTTPServer
+    """
+    host = host or os.getenv('INFERENCE_HOST', '127.0.0.1')
+    port = int(os.getenv('INFERENCE_PORT', '8765')) if port is None else port
+
+    server = ThreadingHTTPServer((host, port), InferenceRequestHandler)
+    server.daemon_threads = True
+    server.batcher = batcher or DynamicBatcher(detector)
+    server.max_body_bytes = int(float(os.getenv('INFERENCE_MAX_BODY_MB', '10')) * 1024 * 1024)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service HTTP local de détection et d'analyse des visages")
+    parser.add_argument('--host', default=None, help="Adresse d'écoute (défaut INFERENCE_HOST ou 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=None, help="Port d'écoute (défaut INFERENCE_PORT ou 8765)")
+    parser.add_argument('--backend', default=None, help="Backend de détection")
+    parser.add_argument('--analyzer', default=None, help="Analyseur d'attributs ('deepface' ou 'onnx')")
+    parser.add_argument('--max-batch', type=int, default=None, help="Requêtes maximum par lot")
+    parser.add_argument('--max-latency-ms', type=float, default=None, help="Attente maximale pour compléter un lot")
+    parser.add_argument('--max-queue', type=int, default=None, help="Taille de la file avant délestage")
+    parser.add_argument('--preload', nargs='*', default=['age', 'gender', 'emotion', 'race'],
+                        choices=['age', 'gender', 'emotion', 'race'], help="Modèles chargés au démarrage")
+    args = parser.parse_args()
+
+    from face_detector import FaceDetector
+    from thread_budget import ThreadBudget, configure_process_threads, format_thread_settings
+
+    # Avant le chargement des modèles: TensorFlow lit son nombre de threads à l'initialisation
+    budget = ThreadBudget()
+    print(f"Budget CPU: {budget.describe()}")
+    print(format_thread_settings(configure_process_threads(budget=budget)))
+
+    detector = FaceDetector(
+        backend=args.backend,
+        analyzer=args.analyzer,
+        preload_actions=args.preload or None
+    )
+    batcher = DynamicBatcher(detector, args.max_batch, args.max_latency_ms, args.max_queue)
+    server = create_server(detector, args.host, args.port, batcher)
+
+    host, port = server.server_address[:2]
+    print(f"Service d'inférence à l'écoute sur http://{host}:{port} "
+          f"(lots de {batcher.max_batch_size}, {batcher.max_latency * 1000:.0f} ms max, "
+          f"file de {batcher.queue.maxsize})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nArrêt du service")
+    finally:
+        server.server_close()
+        batcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import os
+import threading
+from collections import Counter, deque
+
+import numpy as np
+
+POLICY_ACTIONS = ('drop_frames', 'defer_attributes', 'skip_annotations')
+
+POLICY_LABELS = {
+    'drop_frames': "Abandonner les frames trop anciennes",
+    'defer_attributes': "Différer l'analyse des attributs",
+    'skip_annotations': "Ne pas rafraîchir les annotations"
+}
+
+
+def get_latency_budget_ms():
+    """Budget de latence capture -> affichage (LIVE_LATENCY_BUDGET_MS, défaut 500 ms)"""
+    return float(os.getenv('LIVE_LATENCY_BUDGET_MS', '500'))
+
+
+def get_policy_actions():
+    """Actions autorisées en cas de dépassement (LIVE_LATENCY_POLICY, défaut toutes)"""
+    value = os.getenv('LIVE_LATENCY_POLICY', ','.join(POLICY_ACTIONS))
+    return [action.strip() for action in value.split(',') if action.strip() in POLICY_ACTIONS]
+
+
+class LatencyMonitor:
+    """Latences par étape d'une frame, de la capture à l'affichage, et compteurs de la politique
+
+    Étapes: queue (capture -> début du traitement), processing (début -> publication),
+    display (publication -> affichage) et end_to_end (capture -> affichage); le traitement est aussi
+    décomposé (tracking, tracking_deferred, annotation). Chaque étape garde une fenêtre glissante
+    (percentiles) et une moyenne exponentielle (estimations de la politique).
+    """
+
+    STAGES = ('queue', 'processing', 'display', 'end_to_end')
+
+    def __init__(self, window_size=300, smoothing=0.2):
+        """Initialise le suivi
+        Args:
+            window_size: Mesures conservées par étape
+            smoothing: Poids d'une nouvelle mesure dans la moyenne exponentielle
+        """
+        self._lock = threading.Lock()
+        self.window_size = window_size
+        self.smoothing = smoothing
+        self._samples = {stage: deque(maxlen=window_size) for stage in self.STAGES}
+        self._averages = {}
+        self.counters = Counter()
+
+    def record(self, stage, seconds):
+        """Ajoute la durée d'une étape (en secondes)"""
+        with self._lock:
+            if stage not in self._samples:
+                self._samples[stage] = deque(maxlen=self.window_size)
+            self._samples[stage].append(seconds)
+            previous = self._averages.get(stage)
+            self._averages[stage] = seconds if previous is None else previous + self.smoothing * (seconds - previous)
+
+    def average(self, stage):
+        """Moyenne exponentielle d'une étape en secondes (0 sans mesure)"""
+        with self._lock:
+            return self._averages.get(stage, 0.0)
+
+    def count(self, event, increment=1):
+        """Incrémente un compteur (frames abandonnées, annotations sautées...)"""
+        with self._lock:
+            self.counters[event] += increment
+
+    def percentiles(self, stage, quantiles=(50, 95, 99)):
+        """Percentiles d'une étape
+        Returns:
+            Dictionnaire {'p50': ms, ...} (vide sans mesure)
+        """
+        with self._lock:
+            samples = list(self._samples.get(stage, ()))
+        if not samples:
+            return {}
+        values = np.percentile(np.array(samples) * 1000, quantiles)
+        return {f"p{quantile}": float(value) for quantile, value in zip(quantiles, values)}
+
+    def snapshot(self):
+        """Instantané pour l'affichage
+        Returns:
+            Dictionnaire (percentiles par étape, compteurs)
+        """
+        with self._lock:
+            counters = Counter(self.counters)
+        return {
+            'stages': {stage: self.percentiles(stage) for stage in self.STAGES},
+            'counters': counters
+        }
+
+    def clear(self):
+        with self._lock:
+            for samples in self._samples.values():
+                samples.clear()
+            self._averages = {}
+            self.counters = Counter()
+
+
+class LatencyPolicy:
+    """Décide, frame par frame, comment rester dans le budget de latence
+
+    La latence prévue d'une frame est son âge au début du traitement, plus les durées moyennes
+    de traitement et d'affichage. En dépassement, les actions autorisées s'appliquent par ordre
+    de coût pour l'opérateur: différer l'analyse des attributs, puis ne pas redessiner les
+    annotations; une frame déjà trop ancienne pour être affichée à temps est abandonnée (jamais
+    plus de max_consecutive_drops d'affilée, pour que l'affichage reste vivant).
+    """
+
+    def __init__(self, monitor, budget_ms=None, actions=None, max_consecutive_drops=5):
+        """Initialise la politique
+        Args:
+            monitor: LatencyMonitor de la session (mesures et compteurs)
+            budget_ms: Budget capture -> affichage (LIVE_LATENCY_BUDGET_MS, défaut 500)
+            actions: Actions autorisées (LIVE_LATENCY_POLICY, défaut toutes)
+            max_consecutive_drops: Frames abandonnées d'affilée au maximum
+        """
+        self.monitor = monitor
+        self.max_consecutive_drops = max_consecutive_drops
+        self.budget = 0.0
+        self.actions = set()
+        self.configure(budget_ms or get_latency_budget_ms(), get_policy_actions() if actions is None else actions)
+        self._consecutive_drops = 0
+
+    def configure(self, budget_ms, actions):
+        """Met à jour le budget et les actions (appelé par l'interface à chaque rerun)"""
+        self.budget = budget_ms / 1000
+        self.actions = set(actions) & set(POLICY_ACTIONS)
+
+    def decide(self, age):
+        """Traitement d'une frame
+        Args:
+            age: Temps écoulé depuis la capture au début du traitement (secondes)
+        Returns:
+            Dictionnaire (drop, defer_attributes, skip_annotations)
+        """
+        decision = {'drop': False, 'defer_attributes': False, 'skip_annotations': False}
+        monitor = self.monitor
+        display = monitor.average('display')
+
+        if ('drop_frames' in self.actions and age + display > self.budget
+                and self._consecutive_drops < self.max_consecutive_drops):
+            self._consecutive_drops += 1
+            monitor.count('dropped')
+            decision['drop'] = True
+            return decision
+        self._consecutive_drops = 0
+
+        tracking = monitor.average('tracking')
+        annotation = monitor.average('annotation')
+        if 'defer_attributes' in self.actions and age + tracking + annotation + display > self.budget:
+            decision['defer_attributes'] = True
+            monitor.count('deferred')
+            tracking = monitor.average('tracking_deferred') or tracking
+
+        if 'skip_annotations' in self.actions and age + tracking + annotation + display > self.budget:
+            decision['skip_annotations'] = True
+            monitor.count('annotations_skipped')
+
+        return decision
@@ -0,0 +1,91 @@
+import os
+import threading
+from collections import Counter, OrderedDict, deque
+
+
+class LiveStats:
+    """Statistiques temps réel maintenues de façon incrémentale (O(1) par détection)
+
+    Les compteurs et les histogrammes par attribut couvrent toute la session. La fenêtre des
+    détections récentes (affichage / export) et la mémoire des identifiants de visages sont bornées:
+    les identifiants étant croissants, un visage oublié ne réapparaît pas en pratique et le nombre
+    de visages uniques reste exact.
+    """
+
+    ATTRIBUTES = ('age_estimation', 'gender_classification', 'emotion', 'ethnicity_estimation')
+
+    def __init__(self, window_size=100, max_face_ids=None):
+        """Initialise les statistiques
+        Args:
+            window_size: Nombre de détections récentes conservées
+            max_face_ids: Identifiants de visages mémorisés (LIVE_STATS_MAX_FACE_IDS, défaut 10000)
+        """
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=window_size)
+        self.max_face_ids = max_face_ids or int(os.getenv('LIVE_STATS_MAX_FACE_IDS', '10000'))
+        self.total_detections = 0
+        self.unique_faces = OrderedDict()
+        self.unique_count = 0
+        self.histograms = {attribute: Counter() for attribute in self.ATTRIBUTES}
+
+    def add(self, detection):
+        """Prend en compte une détection"""
+        with self._lock:
+            self._add(detection)
+
+    def add_many(self, detections):
+        """Prend en compte les détections d'une frame"""
+        with self._lock:
+            for detection in detections:
+                self._add(detection)
+
+    def _add(self, detection):
+        self.total_detections += 1
+        face_id = detection['face_id']
+        if face_id in self.unique_faces:
+            self.unique_faces.move_to_end(face_id)
+        else:
+            self.unique_faces[face_id] = None
+            self.unique_count += 1
+            if len(self.unique_faces) > self.max_face_ids:
+                self.unique_faces.popitem(last=False)
+        for attribute, histogram in self.histograms.items():
+            value = detection.get(attribute)
+            if value is not None:
+                histogram[value] += 1
+        self.recent.append(detection)
+
+    def clear(self):
+        """Réinitialise toutes les statistiques"""
+        with self._lock:
+            self.recent.clear()
+            self.total_detections = 0
+            self.unique_faces = OrderedDict()
+            self.unique_count = 0
+            self.histograms = {attribute: Counter() for attribute in self.ATTRIBUTES}
+
+    def get_recent(self, count=None):
+        """Retourne les détections récentes (les plus anciennes d'abord)
+        Args:
+            count: Nombre de détections (None = toute la fenêtre)
+        """
+        with self._lock:
+            recent = list(self.recent)
+        return recent[-count:] if count else recent
+
+    def get_histogram(self, attribute):
+        """Retourne une copie de l'histogramme d'un attribut"""
+        with self._lock:
+            return Counter(self.histograms.get(attribute, {}))
+
+    def snapshot(self):
+        """Instantané cohérent des compteurs pour l'affichage
+        Returns:
+            Dictionnaire (total, visages uniques, histogrammes)
+        """
+        with self._lock:
+            return {
+                'total_detections': self.total_detections,
+                'unique_faces': self.unique_count,
+                'histograms': {attribute: Counter(histogram) for attribute, histogram in self.histograms.items()}
+            }
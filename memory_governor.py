@@ -0,0 +1,135 @@
+import os
+import sys
+
+import numpy as np
+
+
+def estimate_size(obj, _seen=None):
+    """Estime la mémoire occupée par une structure (parcours récursif, tableaux numpy inclus)
+    Args:
+        obj: Objet à mesurer
+    Returns:
+        Taille approximative en octets
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is None else 0)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(key, _seen) + estimate_size(value, _seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _seen) for item in obj)
+    elif hasattr(obj, '__iter__') and hasattr(obj, 'maxlen'):
+        size += sum(estimate_size(item, _seen) for item in list(obj))
+    return size
+
+
+def get_process_memory_mb():
+    """Mémoire résidente du processus (None si indisponible)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+
+        # ru_maxrss est un pic (Ko sous Linux, octets sous macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        return None
+
+
+class MemoryGovernor:
+    """Budgets mémoire des sessions temps réel de longue durée
+
+    Supprime l'état des tracks expirés, borne les historiques (détections, console) et
+    rend compte de la mémoire occupée par chaque structure.
+    """
+
+    def __init__(self, max_detections=None, max_console_chars=None, check_interval=None):
+        """Initialise le gouverneur
+        Args:
+            max_detections: Détections conservées par détecteur (MEMORY_MAX_DETECTIONS, défaut 10000)
+            max_console_chars: Taille maximale de la console (MEMORY_MAX_CONSOLE_CHARS, défaut 20000)
+            check_interval: Frames entre deux contrôles (MEMORY_CHECK_INTERVAL, défaut 100)
+        """
+        self.max_detections = max_detections or int(os.getenv('MEMORY_MAX_DETECTIONS', '10000'))
+        self.max_console_chars = max_console_chars or int(os.getenv('MEMORY_MAX_CONSOLE_CHARS', '20000'))
+        self.check_interval = check_interval or int(os.getenv('MEMORY_CHECK_INTERVAL', '100'))
+
+        self.pruned_tracks = 0
+        self.trimmed_detections = 0
+        self.trimmed_console_chars = 0
+
+    def enforce(self, detector):
+        """Applique les budgets à un détecteur (appelé depuis le thread qui le possède)
+        Args:
+            detector: FaceDetector
+        """
+        orphans = [face_id for face_id in detector.emotion_stability if face_id not in detector.tracked_faces]
+        for face_id in orphans:
+            del detector.emotion_stability[face_id]
+        self.pruned_tracks += len(orphans)
+
+        excess = len(detector.detections) - self.max_detections
+        if excess > 0:
+            del detector.detections[:excess]
+            self.trimmed_detections += excess
+
+        detector.trim_analysis_cache()
+
+    def trim_console(self, text):
+        """Conserve la fin de la console au-delà du budget
+        Args:
+            text: Contenu de la console
+        Returns:
+            Contenu borné
+        """
+        if len(text) <= self.max_console_chars:
+            return text
+        cut = len(text) - self.max_console_chars
+        newline = text.find('\n', cut)
+        cut = newline + 1 if newline != -1 else cut
+        self.trimmed_console_chars += cut
+        return "[... logs précédents tronqués ...]\n" + text[cut:]
+
+    def report(self, structures):
+        """Mémoire occupée par structure
+        Args:
+            structures: Dictionnaire nom -> structure mesurée
+        Returns:
+            Liste de dictionnaires (structure, entrées, mémoire en Ko)
+        """
+        rows = []
+        for name, structure in structures.items():
+            if structure is None:
+                continue
+            try:
+                size = estimate_size(structure)
+            except RuntimeError:
+                # Structure modifiée par un worker pendant le parcours: taille de surface seulement
+                size = sys.getsizeof(structure)
+            rows.append({
+                'Structure': name,
+                'Entrées': 1 if isinstance(structure, (np.ndarray, str)) else len(structure),
+                'Mémoire (Ko)': round(size / 1024, 1)
+            })
+        return rows
+
+    def get_stats(self):
+        """Compteurs des évictions effectuées"""
+        return {
+            'pruned_tracks': self.pruned_tracks,
+            'trimmed_detections': self.trimmed_detections,
+            'trimmed_console_chars': self.trimmed_console_chars,
+            'process_memory_mb': get_process_memory_mb()
+        }
@@ -7,6 +7,15 @@ import io
 import sys
 from contextlib import redirect_stdout, redirect_stderr
 from face_detector import FaceDetector
+from profiler import AnalysisProfiler, profiling_enabled_from_env
+from checkpoint import AnalysisCheckpoint, compute_file_hash, make_job_key
+from result_cache import ResultCache
+from results_store import ATTRIBUTE_COLUMNS, ResultsStore, results_store_enabled
+from detector_backends import BACKENDS, available_backends, backend_signature, default_backend_name
+from detection_profiles import describe_profile, load_profiles
+from video_analysis import analyze_video, compute_sampling_step, render_annotated_video
+from thread_budget import ThreadBudget, apply_thread_settings, format_thread_settings
+from face_gallery import get_reid_settings
 
 def run_mode1():
     """Interface du Mode 1: Upload Vidéo"""
@@ -36,6 +45,37 @@ def run_mode1():
         
         use_gpu = st.checkbox("Accélération matériel (GPU)", value=False)
         
+        enable_profiling = st.checkbox(
+            "Profilage (cProfile / tracemalloc)", 
+            value=profiling_enabled_from_env(),
+            help="Mesure les fonctions coûteuses et les allocations mémoire sur les premières frames"
+        )
+        
+        store_results = st.checkbox(
+            "Enregistrer dans la base SQLite", 
+            value=results_store_enabled(),
+            help="Conserve les détections dans une base indexée interrogeable (visage, attribut, intervalle)"
+        )
+        
+        backends = available_backends()
+        detector_backend = st.selectbox(
+            "Détecteur de visages", 
+            backends, 
+            index=backends.index(default_backend_name()) if default_backend_name() in backends else 0,
+            format_func=lambda name: BACKENDS[name].label,
+            help="Backends DNN disponibles si leurs modèles sont présents dans le dossier models/"
+        )
+        
+        profiles = load_profiles()
+        detection_profile = None
+        if profiles:
+            detection_profile = st.selectbox(
+                "Profil de détection", 
+                [None] + list(profiles), 
+                format_func=lambda name: "Aucun (réglages du détecteur)" if name is None else describe_profile(name, profiles[name]),
+                help="Profils calibrés par calibrate_detection.py (remplacent le détecteur choisi)"
+            )
+        
         st.subheader("Paramètres de tracking")
         detection_interval = st.slider(
             "Intervalle de détection (frames)", 
@@ -46,6 +86,49 @@ def run_mode1():
             help="Fréquence de recherche de nouveaux visages (plus élevé = plus rapide)"
         )
         
+        st.subheader("Échantillonnage")
+        enable_sampling = st.checkbox(
+            "Mode échantillonnage", 
+            value=False,
+            help="N'analyse qu'une frame sur N: les autres sont sautées sans décodage (plus rapide)"
+        )
+        sampling_unit = st.radio(
+            "Unité d'échantillonnage", 
+            ["frames", "millisecondes"], 
+            horizontal=True, 
+            disabled=not enable_sampling
+        )
+        if sampling_unit == "frames":
+            sampling_interval = st.number_input(
+                "Analyser une frame toutes les (frames)", 
+                min_value=1, 
+                max_value=300, 
+                value=10, 
+                disabled=not enable_sampling
+            )
+        else:
+            sampling_interval = st.number_input(
+                "Analyser une frame toutes les (ms)", 
+                min_value=10, 
+                max_value=10000, 
+                value=500, 
+                step=50, 
+                disabled=not enable_sampling
+            )
+        interpolate_results = st.checkbox(
+            "Interpoler la vidéo annotée", 
+            value=False, 
+            disabled=not enable_sampling,
+            help="Décode toutes les frames pour produire une vidéo annotée à pleine cadence"
+        )
+        
+        st.subheader("Sortie")
+        analytics_only = st.checkbox(
+            "Mode analytique (CSV uniquement)", 
+            value=False,
+            help="N'annote ni n'encode la vidéo pendant l'analyse: la vidéo annotée peut être générée ensuite à partir des détections"
+        )
+        
         st.header("Upload Vidéo")
         uploaded_file = st.file_uploader(
             "Choisissez un fichier vidéo",
@@ -64,10 +147,35 @@ def run_mode1():
             for key, value in file_details.items():
                 st.write(f"- {key}: {value}")
             
-            if st.button("Analyser la Vidéo", type="primary"):
+            analysis_params = {
+                'age': analyze_age, 'gender': analyze_gender, 
+                'emotion': analyze_emotion, 'ethnicity': analyze_ethnicity,
+                'detection_interval': detection_interval,
+                'sampling_interval': sampling_interval if enable_sampling else None,
+                'sampling_unit': sampling_unit, 'interpolate': interpolate_results,
+                'detector': {
+                    **FaceDetector.DETECTION_SETTINGS,
+                    'reid': get_reid_settings(),
+                    **(backend_signature(profiles[detection_profile]['backend'], profiles[detection_profile]['params'])
+                       if detection_profile else backend_signature(detector_backend))
+                }
+            }
+            job_key = get_job_key(uploaded_file, analysis_params)
+            can_resume = AnalysisCheckpoint(job_key).exists()
+            
+            resume = False
+            if can_resume:
+                st.warning("Une analyse interrompue de cette vidéo avec ces paramètres peut être reprise.")
+                resume = st.button("Reprendre l'Analyse", type="primary")
+            
+            if st.button("Analyser la Vidéo", type="secondary" if can_resume else "primary") or resume:
                 process_video(
                     uploaded_file, temperature, analyze_age, analyze_gender, 
-                    analyze_emotion, analyze_ethnicity, use_gpu, detection_interval
+                    analyze_emotion, analyze_ethnicity, use_gpu, detection_interval,
+                    enable_profiling,
+                    sampling_interval if enable_sampling else None, sampling_unit,
+                    interpolate_results, job_key, resume, detector_backend, detection_profile,
+                    analysis_params if store_results else None, not analytics_only
                 )
     
     with col2:
@@ -80,7 +188,7 @@ def run_mode1():
                     del st.session_state.console_output
                 st.rerun()
             
-            display_results()
+            display_results(uploaded_file)
         else:
             st.info("Uploadez une vidéo et lancez l'analyse pour voir les résultats ici.")
     
@@ -102,9 +210,29 @@ def run_mode1():
             disabled=True
         )
 
+def get_job_key(uploaded_file, analysis_params):
+    """Retourne la clé d'analyse (contenu de la vidéo + paramètres) du fichier uploadé
+    Args:
+        uploaded_file: Fichier uploadé
+        analysis_params: Paramètres qui influent sur le résultat
+    Returns:
+        Clé utilisée par le cache de résultats et les points de reprise
+    """
+    # L'empreinte du contenu n'est calculée qu'une fois par fichier uploadé
+    file_key = (uploaded_file.name, uploaded_file.size, getattr(uploaded_file, 'file_id', None))
+    if st.session_state.get('upload_hash_key') != file_key:
+        st.session_state.upload_hash = compute_file_hash(uploaded_file)
+        st.session_state.upload_hash_key = file_key
+    
+    return make_job_key(st.session_state.upload_hash, analysis_params)
+
 def process_video(uploaded_file, temperature, analyze_age, analyze_gender, 
-                 analyze_emotion, analyze_ethnicity, use_gpu, detection_interval):
-    """Traite la vidéo uploadée"""
+                 analyze_emotion, analyze_ethnicity, use_gpu, detection_interval,
+                 enable_profiling=False, sampling_interval=None, sampling_unit="frames",
+                 interpolate_results=False, job_key=None, resume=False, detector_backend=None,
+                 detection_profile=None, store_params=None, render=True):
+    """Traite la vidéo uploadée (détections enregistrées en base SQLite si store_params est renseigné,
+    vidéo annotée produite pendant l'analyse si render est vrai)"""
     
     console_output = io.StringIO()
     
@@ -114,87 +242,96 @@ def process_video(uploaded_file, temperature, analyze_age, analyze_gender,
             print(f"Fichier: {uploaded_file.name}")
             print(f"Paramètres: Age={analyze_age}, Genre={analyze_gender}, Emotion={analyze_emotion}, Ethnie={analyze_ethnicity}")
             print(f"GPU: {use_gpu}")
+            print(format_thread_settings(apply_thread_settings(ThreadBudget().per_job)))
+            
+            result_cache = ResultCache() if job_key else None
+            if result_cache and not resume:
+                cached_results = result_cache.get(job_key)
+                if cached_results is not None:
+                    print(f"Résultats trouvés dans le cache ({job_key}): analyse non relancée")
+                    print(f"{len(cached_results['detections'])} détections restaurées")
+                    cached_results['detector'] = None
+                    cached_results['profiling_report_path'] = None
+                    cached_results['processing_completed'] = True
+                    cached_results['from_cache'] = True
+                    cached_results['source_hash'] = st.session_state.get('upload_hash')
+                    if render and not cached_results.get('output_video_path'):
+                        print("Vidéo annotée absente du cache (analyse sans rendu): génération à la demande")
+                    if store_params is not None:
+                        store_detections(cached_results, uploaded_file.name, store_params)
+                    st.session_state.video_results = cached_results
+                    print("=== TRAITEMENT TERMINÉ (CACHE) ===")
+                    st.success("✅ Résultats récupérés depuis le cache.")
+                    return
+            
+            checkpoint = AnalysisCheckpoint(job_key) if job_key else None
+            if checkpoint and not resume:
+                checkpoint.clear()
+            
+            profiler = AnalysisProfiler(label="mode1") if enable_profiling else None
+            if profiler:
+                print(f"Profilage activé sur {profiler.max_frames} frames")
             
             with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
+                uploaded_file.seek(0)
                 tmp_file.write(uploaded_file.read())
                 input_path = tmp_file.name
             
             print(f"Fichier temporaire créé: {input_path}")
             
-            detector = FaceDetector(use_gpu=use_gpu)
+            detector = FaceDetector(use_gpu=use_gpu, backend=detector_backend, detection_profile=detection_profile)
             detector.detection_interval = detection_interval
-            print("Détecteur initialisé")
+            print(f"Détecteur initialisé ({detector.detector_backend.label})")
+            if detection_profile:
+                print(f"Profil de détection: {detection_profile}")
             print(f"Intervalle de détection configuré: {detection_interval} frames")
             
-            cap = cv2.VideoCapture(input_path)
-            if not cap.isOpened():
-                raise Exception("Impossible d'ouvrir la vidéo")
-            
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            
-            print(f"Vidéo: {total_frames} frames, {fps} FPS, {width}x{height}")
-            
-            output_path = tempfile.mktemp(suffix='_analyzed.mp4')
-            fourcc = cv2.VideoWriter.fourcc(*'mp4v')
-            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+            if checkpoint:
+                print(f"Points de reprise toutes les {checkpoint.interval_frames} frames: {checkpoint.directory}")
             
-            print("Début de l'analyse avec système de tracking...")
-            print(f"Détection de nouveaux visages toutes les {detector.detection_interval} frames")
+            cap = cv2.VideoCapture(input_path)
+            fps = cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0
+            cap.release()
+            sampling_step = compute_sampling_step(sampling_interval, sampling_unit, fps)
             
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            all_detections = []
-            frame_count = 0
-            
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                timestamp = f"{int(frame_count // fps // 3600):02d}:{int((frame_count // fps) % 3600 // 60):02d}:{int(frame_count // fps % 60):02d}"
-                
-                detections = detector.process_frame_with_tracking(
-                    frame, frame_count, timestamp,
-                    analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity
-                )
-                
-                if detections:
-                    all_detections.extend(detections)
-                    detector.detections.extend(detections)
-                    
-                    if frame_count % detector.detection_interval == 0:
-                        print(f"Frame {frame_count}: {len(detections)} visage(s) tracké(s)")
-                
-                annotated_frame = detector.draw_annotations(
-                    frame, detections,
-                    analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity
-                )
-                
-                out.write(annotated_frame)
-                
-                frame_count += 1
-                
-                progress = (frame_count / total_frames)
+            def update_progress(frame_count, total_frames):
+                progress = min(frame_count / total_frames, 1.0) if total_frames > 0 else 0
                 progress_bar.progress(progress)
                 status_text.text(f"Traitement: {frame_count}/{total_frames} frames")
             
-            cap.release()
-            out.release()
+            results = analyze_video(
+                input_path, detector,
+                analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity,
+                sampling_step=sampling_step, interpolate=interpolate_results,
+                profiler=profiler, checkpoint=checkpoint, progress_callback=update_progress,
+                render=render
+            )
             
-            print(f"Analyse terminée. {len(all_detections)} détections au total")
+            progress_bar.progress(1.0)
             
-            st.session_state.video_results = {
-                'detections': all_detections,
-                'detector': detector,
-                'output_video_path': output_path,
-                'total_frames': total_frames,
-                'fps': fps,
-                'processing_completed': True
-            }
+            profiling_report_path = None
+            if profiler:
+                profiler.finish()
+                profiling_report_path = profiler.save_report()
+                print(f"Rapport de profilage sauvegardé: {profiling_report_path}")
+            
+            if result_cache:
+                result_cache.put(job_key, {
+                    key: value for key, value in results.items() 
+                    if key not in ('detector', 'output_video_path')
+                }, results['output_video_path'])
+                print("Résultats enregistrés dans le cache")
+            
+            if store_params is not None:
+                store_detections(results, uploaded_file.name, store_params)
+            
+            results['profiling_report_path'] = profiling_report_path
+            results['processing_completed'] = True
+            results['source_hash'] = st.session_state.get('upload_hash')
+            st.session_state.video_results = results
             
             print("Résultats sauvegardés")
             print("=== TRAITEMENT TERMINÉ ===")
@@ -210,32 +347,80 @@ def process_video(uploaded_file, temperature, analyze_age, analyze_gender,
     finally:
         st.session_state.console_output = console_output.getvalue()
 
-def display_results():
-    """Affiche les résultats de l'analyse"""
+def store_detections(results, source, params):
+    """Enregistre les détections d'une analyse dans une nouvelle session de la base SQLite
+    Args:
+        results: Résultats de l'analyse (complétés par la session et le chemin de la base)
+        source: Nom de la vidéo
+        params: Paramètres d'analyse
+    """
+    store = ResultsStore()
+    try:
+        session_id = store.create_session('upload', source, params)
+        store.add_detections(session_id, results['detections'])
+        store.flush()
+    finally:
+        store.close()
+    
+    results['results_db_path'] = store.path
+    results['results_db_session'] = session_id
+    print(f"Détections enregistrées en base: session {session_id} ({store.path})")
+
+def display_results(uploaded_file=None):
+    """Affiche les résultats de l'analyse
+    Args:
+        uploaded_file: Vidéo actuellement uploadée (source du rendu différé)
+    """
     results = st.session_state.video_results
     detections = results['detections']
-    detector = results['detector']
     
+    store = None
+    session_id = results.get('results_db_session')
+    if session_id is not None and os.path.exists(results['results_db_path']):
+        store = ResultsStore(results['results_db_path'])
+    
+    try:
+        display_result_metrics(results, detections, store, session_id)
+        display_result_tables(results, detections)
+        if detections:
+            display_render_options(results, uploaded_file)
+        if store:
+            display_store_queries(store, session_id)
+    finally:
+        if store:
+            store.close()
+
+def display_result_metrics(results, detections, store=None, session_id=None):
+    """Affiche les indicateurs de l'analyse (calculés par la base SQLite si disponible)"""
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Frames analysées", results['total_frames'])
+        st.metric("Frames analysées", results.get('analyzed_frames', results['total_frames']))
     
     with col2:
-        st.metric("Détections totales", len(detections))
+        st.metric("Détections totales", store.count_detections(session_id) if store else len(detections))
     
     with col3:
-        unique_faces = len(set(d['face_id'] for d in detections))
+        if store:
+            unique_faces = store.count_unique_faces(session_id)
+        else:
+            unique_faces = len(set(d['face_id'] for d in detections))
         st.metric("Visages uniques", unique_faces)
     
     with col4:
-        if 'processing_completed' in results:
+        if results.get('from_cache'):
+            st.metric("Statut", "✅ Cache")
+        elif 'processing_completed' in results:
             st.metric("Statut", "✅ Terminé")
         else:
             st.metric("Statut", "🔄 En cours")
-    
+
+def display_result_tables(results, detections):
+    """Affiche les détections et les téléchargements"""
     if detections:
-        df = detector.get_detections_dataframe()
+        import pandas as pd
+        
+        df = pd.DataFrame(detections)
         
         display_df = df.drop('bbox', axis=1, errors='ignore')
         st.dataframe(display_df, use_container_width=True)
@@ -252,7 +437,7 @@ def display_results():
             )
         
         with col2:
-            if os.path.exists(results['output_video_path']):
+            if results.get('output_video_path') and os.path.exists(results['output_video_path']):
                 with open(results['output_video_path'], 'rb') as f:
                     st.download_button(
                         label="Télécharger Vidéo",
@@ -261,4 +446,121 @@ def display_results():
                         mime="video/mp4"
                     )
     else:
-        st.warning("Aucun visage détecté dans la vidéo.") 
\ No newline at end of file
+        st.warning("Aucun visage détecté dans la vidéo.")
+    
+    report_path = results.get('profiling_report_path')
+    if report_path and os.path.exists(report_path):
+        with open(report_path, 'rb') as f:
+            st.download_button(
+                label="Télécharger Rapport de Profilage",
+                data=f.read(),
+                file_name=os.path.basename(report_path),
+                mime="text/plain"
+            ) 
+
+def display_render_options(results, uploaded_file):
+    """Rendu différé de la vidéo annotée à partir des détections (sans nouvelle analyse)"""
+    
+    has_video = bool(results.get('output_video_path')) and os.path.exists(results['output_video_path'])
+    
+    with st.expander("🎬 Vidéo annotée (rendu à partir des détections)", expanded=not has_video):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            show_age = st.checkbox("Age", value=True, key="render_age")
+        with col2:
+            show_gender = st.checkbox("Genre", value=True, key="render_gender")
+        with col3:
+            show_emotion = st.checkbox("Emotion", value=True, key="render_emotion")
+        with col4:
+            show_ethnicity = st.checkbox("Ethnie", value=True, key="render_ethnicity")
+        
+        sampling_step = results.get('sampling_step', 1)
+        interpolate = st.checkbox(
+            "Interpoler à pleine cadence", 
+            value=False, 
+            disabled=sampling_step == 1,
+            key="render_interpolate"
+        )
+        
+        if not st.button("Générer la vidéo annotée", key="render_video"):
+            return
+        
+        # Le rendu relit la vidéo d'origine: elle doit être celle de l'analyse
+        if uploaded_file is None or st.session_state.get('upload_hash') != results.get('source_hash'):
+            st.warning("Uploadez la vidéo analysée pour générer la vidéo annotée.")
+            return
+        
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
+            uploaded_file.seek(0)
+            tmp_file.write(uploaded_file.read())
+            input_path = tmp_file.name
+        
+        progress_bar = st.progress(0)
+        try:
+            results['output_video_path'] = render_annotated_video(
+                input_path, results['detections'],
+                show_age, show_gender, show_emotion, show_ethnicity,
+                sampling_step=sampling_step, interpolate=interpolate,
+                progress_callback=lambda frame_count, total_frames: progress_bar.progress(
+                    min(frame_count / total_frames, 1.0) if total_frames > 0 else 0
+                )
+            )
+        except Exception as e:
+            st.error(f"Erreur lors du rendu: {str(e)}")
+            return
+        finally:
+            os.unlink(input_path)
+        
+        st.rerun()
+
+def display_store_queries(store, session_id, key_prefix=""):
+    """Requêtes sur une session enregistrée en base SQLite (sans recharger les détections)
+    Args:
+        store: ResultsStore ouvert
+        session_id: Session interrogée
+        key_prefix: Préfixe des clés de widgets (page appelante)
+    """
+    
+    with st.expander(f"🔎 Requêtes (base SQLite, session {session_id})"):
+        face_counts = store.list_face_ids(session_id)
+        if not face_counts:
+            st.info("Aucune détection enregistrée pour cette session.")
+            return
+        
+        face_id = st.selectbox(
+            "Visage", 
+            list(face_counts), 
+            format_func=lambda face: f"{face} ({face_counts[face]} détections)",
+            key=f"{key_prefix}store_face_id"
+        )
+        frames = store.face_frames(session_id, face_id)
+        st.write(f"**{len(frames)} frame(s)**, de {frames[0][1]} à {frames[-1][1]}")
+        st.write(", ".join(str(frame_number) for frame_number, _ in frames[:200]) + (" ..." if len(frames) > 200 else ""))
+        
+        st.markdown("---")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            attribute = st.selectbox(
+                "Attribut", 
+                ATTRIBUTE_COLUMNS, 
+                index=ATTRIBUTE_COLUMNS.index('emotion'), 
+                key=f"{key_prefix}store_attribute"
+            )
+        with col2:
+            start = st.text_input("Début (MM:SS ou HH:MM:SS)", value="", key=f"{key_prefix}store_start")
+        with col3:
+            end = st.text_input("Fin (MM:SS ou HH:MM:SS)", value="", key=f"{key_prefix}store_end")
+        st.caption("Bornes mesurées depuis le début de la session (position dans la vidéo, ou durée depuis le démarrage de la caméra)")
+        
+        try:
+            counts = store.attribute_counts(session_id, attribute, start.strip() or None, end.strip() or None)
+        except ValueError as e:
+            st.error(str(e))
+            return
+        
+        if counts:
+            for value, count in counts.items():
+                st.write(f"- {value}: {count}")
+        else:
+            st.info("Aucune valeur sur cet intervalle.")
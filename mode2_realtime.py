@@ -1,73 +1,36 @@
 import streamlit as st
 import cv2
-import numpy as np
 import threading
 import time
 from datetime import datetime
 import io
+import os
 import sys
 from contextlib import redirect_stdout, redirect_stderr
 from face_detector import FaceDetector
-from PIL import Image
-import requests
+from camera_capture import DroidCamCapture, LatestFrameCapture
+from profiler import AnalysisProfiler, profiling_enabled_from_env
+from realtime_worker import RealtimeState, RealtimeWorker
+from frame_ring import SharedMemoryRealtimeWorker
+from session_recorder import ReplayCapture, ReplayFrameSource, SessionRecorder
+from attribute_pool import AttributeAnalysisPool
+from frame_transport import JPEGFrameEncoder
+from live_stats import LiveStats
+from multi_camera import CameraSource, SharedDetectorPool
+from detector_backends import BACKENDS, available_backends, default_backend_name
+from detection_profiles import describe_profile, load_profiles
+from attribute_analyzers import get_actions
+from memory_governor import MemoryGovernor
+from latency_budget import POLICY_ACTIONS, POLICY_LABELS, LatencyPolicy, get_latency_budget_ms, get_policy_actions
+from results_store import ResultsStore, results_store_enabled
+from mode1_upload import display_store_queries
+from thread_budget import ThreadBudget, apply_thread_settings, format_thread_settings
 import urllib.request
 import socket
 
-class DroidCamCapture:
-    """Capture DroidCam non-bloquante (bugged)"""
-    
-    def __init__(self, url):
-        self.url = url.strip()
-        self.is_opened = False
-        self.cached_frame = None
-        
-    def open(self):
-        """Test rapide de connexion"""
-        try:
-            response = requests.get(self.url, timeout=3)
-            if response.status_code == 200 and len(response.content) > 1000:
-                self.is_opened = True
-                nparr = np.frombuffer(response.content, np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                if frame is not None:
-                    self.cached_frame = frame
-                return True
-            return False
-        except:
-            return False
-    
-    def isOpened(self):
-        return self.is_opened
-    
-    def read(self):
-        """Retourne la frame cachée sans faire de requête bloquante"""
-        if self.cached_frame is not None:
-            return True, self.cached_frame.copy()
-        return False, None
-    
-    def refresh_frame(self):
-        """Met à jour la frame cachée (à appeler manuellement)"""
-        if not self.is_opened:
-            return False
-        try:
-            response = requests.get(self.url, timeout=2)
-            if response.status_code == 200:
-                nparr = np.frombuffer(response.content, np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                if frame is not None:
-                    self.cached_frame = frame
-                    return True
-        except:
-            pass
-        return False
-    
-    def set(self, prop, value):
-        pass
-    
-    def release(self):
-        self.is_opened = False
-
-
+# Relance de la page (métriques, console) en auto-actualisation; entre deux relances seules les
+# nouvelles frames sont envoyées au navigateur
+PAGE_REFRESH_SECONDS = 1.0
 
 
 def run_mode2():
@@ -100,6 +63,62 @@ def run_mode2():
         
         use_gpu = st.checkbox("Accélération matériel (GPU)", value=False, key="rt_gpu")
         
+        # Le profilage suit le worker d'une seule caméra: indisponible avec le pool multi-caméras
+        multi_camera_selected = st.session_state.get('camera_source') == "Multi-caméras"
+        enable_profiling = st.checkbox(
+            "Profilage (cProfile / tracemalloc)", 
+            value=profiling_enabled_from_env(), 
+            key="rt_profiling",
+            disabled=multi_camera_selected,
+            help="Mesure les fonctions coûteuses et les allocations mémoire sur les premières frames"
+        )
+        if multi_camera_selected:
+            st.caption("Profilage indisponible en mode multi-caméras (une seule source requise)")
+        
+        async_analysis = st.checkbox(
+            "Analyse réelle asynchrone (DeepFace)", 
+            value=False, 
+            key="rt_async_analysis",
+            help="Analyse les nouveaux visages en arrière-plan sans bloquer le flux vidéo"
+        )
+        
+        backends = available_backends()
+        detector_backend = st.selectbox(
+            "Détecteur de visages", 
+            backends, 
+            index=backends.index(default_backend_name()) if default_backend_name() in backends else 0,
+            format_func=lambda name: BACKENDS[name].label,
+            key="rt_detector_backend",
+            help="Backends DNN disponibles si leurs modèles sont présents dans le dossier models/"
+        )
+        
+        profiles = load_profiles()
+        detection_profile = None
+        if profiles:
+            detection_profile = st.selectbox(
+                "Profil de détection", 
+                [None] + list(profiles), 
+                format_func=lambda name: "Aucun (réglages du détecteur)" if name is None else describe_profile(name, profiles[name]),
+                key="rt_detection_profile",
+                help="Profils calibrés par calibrate_detection.py (remplacent le détecteur choisi)"
+            )
+        
+        shm_detection = st.checkbox(
+            "Détection multi-processus (mémoire partagée)", 
+            value=False, 
+            key="rt_shm_detection",
+            help="Détecte chaque frame dans des processus séparés, alimentés sans copie par un anneau de frames partagé"
+        )
+        shm_processes = None
+        if shm_detection:
+            shm_processes = st.slider(
+                "Processus de détection", 
+                min_value=1, 
+                max_value=max(1, os.cpu_count() or 1), 
+                value=min(2, os.cpu_count() or 1),
+                key="rt_shm_processes"
+            )
+        
         st.subheader("Paramètres de tracking")
         detection_interval = st.slider(
             "Intervalle de détection (frames)", 
@@ -111,16 +130,58 @@ def run_mode2():
             help="Fréquence de recherche de nouveaux visages"
         )
         
+        st.subheader("Affichage")
+        display_quality = st.slider(
+            "Qualité JPEG", 
+            min_value=30, 
+            max_value=95, 
+            value=JPEGFrameEncoder().quality, 
+            step=5,
+            key="rt_jpeg_quality",
+            help="Qualité de compression des images envoyées au navigateur"
+        )
+        display_width = st.select_slider(
+            "Largeur d'affichage (px)", 
+            options=[320, 480, 640, 800, 960, 1280], 
+            value=640,
+            key="rt_display_width"
+        )
+        
+        st.subheader("Budget de latence")
+        latency_budget_ms = st.slider(
+            "Budget capture -> affichage (ms)", 
+            min_value=100, 
+            max_value=3000, 
+            value=int(get_latency_budget_ms()), 
+            step=50,
+            key="rt_latency_budget",
+            help="Délai maximal visé entre la capture d'une frame et son affichage"
+        )
+        policy_actions = st.multiselect(
+            "Actions en cas de dépassement", 
+            POLICY_ACTIONS, 
+            default=get_policy_actions(),
+            format_func=lambda action: POLICY_LABELS[action],
+            key="rt_latency_policy",
+            help="Appliquées dans l'ordre: attributs différés, puis annotations non redessinées; "
+                 "une frame déjà trop ancienne est abandonnée"
+        )
+        
         st.header("Configuration Caméra")
         
         camera_source = st.radio(
             "Source vidéo:",
-            ["Webcam locale", "DroidCam (URL)", "Webcam USB"],
+            ["Webcam locale", "DroidCam (URL)", "Webcam USB", "Multi-caméras", "Rejeu (enregistrement)"],
             key="camera_source"
         )
         
         droidcam_url = ""
         camera_id = 0
+        multi_sources = ""
+        pool_workers = 2
+        replay_path = ""
+        replay_speed = 1.0
+        record_session = False
         
         if camera_source == "DroidCam (URL)":
             droidcam_url = st.text_input(
@@ -140,13 +201,55 @@ def run_mode2():
                 help="0=webcam par défaut, 1+=caméras USB"
             )
         
+        elif camera_source == "Multi-caméras":
+            multi_sources = st.text_area(
+                "Sources (une par ligne)",
+                placeholder="0\n1\nhttp://192.168.1.168:4747/video",
+                help="ID de caméra USB ou URL DroidCam, une source par ligne"
+            )
+            pool_workers = st.slider(
+                "Workers de détection partagés", 
+                min_value=1, 
+                max_value=8, 
+                value=SharedDetectorPool().num_workers,
+                help="Nombre fixe de workers répartis équitablement entre les caméras"
+            )
+        
+        elif camera_source == "Rejeu (enregistrement)":
+            replay_path = st.text_input(
+                "Fichier d'enregistrement (.frec)",
+                value=st.session_state.get('last_recording_path', ''),
+                help="Session enregistrée depuis ce mode, rejouée comme une caméra"
+            )
+            replay_speed = st.select_slider(
+                "Vitesse de rejeu", 
+                options=[0.5, 1.0, 2.0, 4.0, 0.0], 
+                value=1.0,
+                format_func=lambda speed: "Maximale" if speed == 0 else f"x{speed:g}"
+            )
+        
+        if camera_source not in ("Multi-caméras", "Rejeu (enregistrement)"):
+            record_session = st.checkbox(
+                "Enregistrer la session", 
+                value=False, 
+                key="rt_record_session",
+                help="Sauvegarde les frames capturées et leurs horodatages pour un rejeu reproductible"
+            )
+        
+        store_results = st.checkbox(
+            "Enregistrer dans la base SQLite", 
+            value=results_store_enabled(), 
+            key="rt_store_results",
+            help="Conserve toutes les détections de la session dans une base indexée interrogeable"
+        )
+        
         st.header("Contrôles")
         
         if 'camera_running' not in st.session_state:
             st.session_state.camera_running = False
         
-        if 'realtime_detections' not in st.session_state:
-            st.session_state.realtime_detections = []
+        if 'live_stats' not in st.session_state:
+            st.session_state.live_stats = LiveStats()
         
         if 'video_capture' not in st.session_state:
             st.session_state.video_capture = None
@@ -155,7 +258,24 @@ def run_mode2():
         
         with col_start:
             if st.button("🎥 Démarrer Caméra", type="primary"):
-                start_camera(camera_source, camera_id, droidcam_url, use_gpu, detection_interval)
+                # Seuls les modèles des attributs activés sont chargés, et seulement pour l'analyse réelle
+                preload_actions = get_actions(
+                    analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity
+                ) if async_analysis else None
+                
+                if camera_source == "Multi-caméras":
+                    start_multi_camera(
+                        multi_sources, use_gpu, detection_interval, 
+                        async_analysis, pool_workers, detector_backend, preload_actions,
+                        detection_profile, store_results
+                    )
+                else:
+                    start_camera(
+                        camera_source, camera_id, droidcam_url, use_gpu, detection_interval, 
+                        enable_profiling, async_analysis, detector_backend, preload_actions,
+                        shm_processes, record_session, replay_path, replay_speed, detection_profile,
+                        store_results
+                    )
         
         with col_stop:
             if st.button("⏹️ Arrêter Caméra"):
@@ -163,7 +283,8 @@ def run_mode2():
         
         with col_clear:
             if st.button("🗑️ Effacer Données"):
-                st.session_state.realtime_detections = []
+                st.session_state.live_stats.clear()
+                close_results_store()
                 st.success("Données effacées")
                 st.rerun()
     
@@ -191,42 +312,72 @@ def run_mode2():
             
 
         
-        # Traitement de la caméra si active
-        if st.session_state.camera_running and st.session_state.video_capture:
-            col_refresh, col_auto, col_detect = st.columns(3)
+        # Affichage du flux traité en continu par le worker de session
+        if st.session_state.camera_running and st.session_state.get('rt_worker'):
+            worker = st.session_state.rt_worker
+            worker.update_settings(
+                analyze_age, 
+                analyze_gender, 
+                analyze_emotion, 
+                analyze_ethnicity, 
+                detection_interval
+            )
+            worker.policy.configure(latency_budget_ms, policy_actions)
             
-            with col_refresh:
-                if st.button("Actualiser Image"):
-                    # Actualiser la frame DroidCam
-                    if hasattr(st.session_state.video_capture, 'refresh_frame'):
-                        if st.session_state.video_capture.refresh_frame():
-                            st.success("Image actualisée")
-                        else:
-                            st.error("Échec actualisation")
+            col_capture, col_auto, col_detect = st.columns(3)
+            
+            with col_capture:
+                # Capture continue: le thread de capture maintient la frame la plus récente
+                capture_stats = st.session_state.video_capture.get_stats()
+                st.caption(
+                    f"Capture: {capture_stats['capture_fps']:.1f} FPS - "
+                    f"Analyse: {st.session_state.rt_state.processing_fps:.1f} FPS - "
+                    f"{capture_stats['frames_dropped']} frame(s) ignorée(s)"
+                )
             
             with col_auto:
                 auto_refresh = st.checkbox("Auto-actualisation", value=True)
+                refresh_delay = st.slider(
+                    "Cadence d'affichage (ms)", 
+                    min_value=50, 
+                    max_value=1000, 
+                    value=200, 
+                    step=50,
+                    key="rt_refresh_delay",
+                    help="Fréquence de rafraîchissement de la page (l'analyse continue indépendamment)"
+                )
             
             with col_detect:
                 if st.button("🔍 Forcer Détection"):
-                    # Forcer une nouvelle détection en réinitialisant le compteur
-                    st.session_state.frame_count = 0
+                    # Forcer une nouvelle détection sur la prochaine frame
+                    worker.force_detection()
                     st.success("Détection forcée")
             
-            # Traiter la frame avec détection des visages
-            process_camera_frame(
+            sync_worker_state()
+            display_camera_frame(video_placeholder, display_quality, display_width)
+            display_latency_stats(st.session_state.rt_state, latency_budget_ms, refresh_delay)
+            
+            # Auto-actualisation non-bloquante: seul l'affichage dépend de cette cadence.
+            # Entre deux reruns (métriques), seules les nouvelles frames sont envoyées à l'emplacement
+            if auto_refresh:
+                refresh_until = time.time() + PAGE_REFRESH_SECONDS
+                while time.time() < refresh_until:
+                    time.sleep(refresh_delay / 1000)
+                    display_camera_frame(video_placeholder, display_quality, display_width, force=False)
+                st.rerun()
+        elif st.session_state.camera_running and st.session_state.get('multi_pool'):
+            display_multi_camera(
                 video_placeholder, 
                 analyze_age, 
                 analyze_gender, 
                 analyze_emotion, 
                 analyze_ethnicity, 
-                detection_interval
+                detection_interval,
+                display_quality,
+                display_width,
+                latency_budget_ms,
+                policy_actions
             )
-            
-            # Auto-actualisation non-bloquante
-            if auto_refresh:
-                time.sleep(0.5)  # Réduire le délai pour plus de fluidité
-                st.rerun()
         else:
             video_placeholder.info("Cliquez sur 'Démarrer Caméra' pour commencer")
         
@@ -234,8 +385,16 @@ def run_mode2():
         display_realtime_stats()
         
         # Export des données
-        if st.session_state.realtime_detections:
+        if st.session_state.live_stats.recent:
             export_realtime_data()
+        
+        # Rapport de profilage
+        if st.session_state.get('rt_profiler'):
+            export_profiling_report()
+        
+        # Mémoire de la session
+        if st.session_state.get('memory_governor'):
+            display_memory_report()
     
     # Zone Console (pleine largeur)
     st.markdown("---")
@@ -260,78 +419,190 @@ def run_mode2():
     
 
 
-def start_camera(camera_source, camera_id, droidcam_url, use_gpu, detection_interval):
-    """Démarre la capture caméra"""
+def open_video_source(video_source, recorder=None):
+    """Ouvre une source vidéo (ID de caméra ou URL DroidCam) avec capture continue
+    Args:
+        video_source: ID de caméra (int) ou URL du flux
+        recorder: SessionRecorder optionnel (enregistrement des frames capturées)
+    Returns:
+        Tuple (LatestFrameCapture démarrée, lignes de console)
+    """
+    console_output = ""
+    
+    if isinstance(video_source, str):
+        clean_url = video_source.replace('htpp://', 'http://').strip()
+        console_output += f"Connexion DroidCam: {clean_url}\n"
+        
+        cap = DroidCamCapture(clean_url)
+        if not cap.open(timeout=10):
+            error = cap.last_error or "aucune image reçue"
+            if 'timed out' in error.lower() or 'timeout' in error.lower():
+                raise Exception(f"Timeout de connexion - Vérifiez l'IP et le port ({error})")
+            raise Exception(f"Impossible de se connecter - Vérifiez que DroidCam est démarré ({error})")
+        
+        console_output += f"Content-Type: {cap.reader.content_type or 'unknown'}\n"
+        console_output += "DroidCam connecté avec succès\n"
+    else:
+        cap = cv2.VideoCapture(video_source)
+        
+        if not cap.isOpened():
+            raise Exception(f"Impossible d'ouvrir la source vidéo: {video_source}")
+        
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        cap.set(cv2.CAP_PROP_FPS, 30)
+    
+    # Capture continue sur un thread dédié: on analyse toujours la frame la plus récente
+    return LatestFrameCapture(cap, recorder=recorder).start(), console_output
+
+def release_session():
+    """Arrête les workers et libère les caméras de la session en cours"""
+    
+    if st.session_state.get('rt_worker'):
+        st.session_state.rt_worker.stop()
+        st.session_state.rt_worker = None
+    if st.session_state.get('multi_pool'):
+        st.session_state.multi_pool.stop()
+        st.session_state.multi_pool = None
+    if st.session_state.get('rt_attribute_pool'):
+        st.session_state.rt_attribute_pool.shutdown()
+        st.session_state.rt_attribute_pool = None
+    if st.session_state.get('video_capture'):
+        st.session_state.video_capture.release()
+        st.session_state.video_capture = None
+    if st.session_state.get('rt_results_store'):
+        # Les workers sont arrêtés: plus aucune détection en attente d'écriture
+        st.session_state.rt_results_store.flush()
+    st.session_state.rt_state = None
+    st.session_state.rt_encoder = None
+    st.session_state.rt_encoders = {}
+
+def open_results_store(source, params):
+    """Ouvre la base SQLite et y crée la session temps réel
+    Returns:
+        Tuple (ResultsStore, identifiant de session)
+    """
+    close_results_store()
+    store = ResultsStore()
+    session_id = store.create_session('realtime', source, params)
+    st.session_state.rt_results_store = store
+    st.session_state.rt_results_session = session_id
+    return store, session_id
+
+def close_results_store():
+    """Ferme la base SQLite de la session précédente (détections en attente écrites)"""
+    store = st.session_state.get('rt_results_store')
+    if store:
+        store.close()
+    st.session_state.rt_results_store = None
+    st.session_state.rt_results_session = None
+
+def start_camera(camera_source, camera_id, droidcam_url, use_gpu, detection_interval, 
+                 enable_profiling=False, async_analysis=False, detector_backend=None,
+                 preload_actions=None, shm_processes=None, record_session=False, replay_path="",
+                 replay_speed=1.0, detection_profile=None, store_results=False):
+    """Démarre la capture caméra (détection multi-processus si shm_processes est renseigné)"""
     
     console_output = f"[{datetime.now().strftime('%H:%M:%S')}] Démarrage de la caméra\n"
+    
+    # Une seule session de traitement à la fois: arrêter la session précédente
+    release_session()
+    
     console_output += f"Source: {camera_source}\n"
     
     try:
-        if camera_source == "DroidCam (URL)" and droidcam_url:
-            video_source = droidcam_url
-            console_output += f"URL DroidCam: {droidcam_url}\n"
+        if camera_source == "Rejeu (enregistrement)":
+            if not replay_path or not os.path.exists(replay_path):
+                raise Exception(f"Enregistrement introuvable: {replay_path}")
+            replay = ReplayCapture(replay_path, replay_speed)
+            if replay_speed == 0:
+                # Vitesse maximale: le worker lit chaque frame enregistrée, aucune n'est abandonnée
+                cap = ReplayFrameSource(replay).start()
+            else:
+                cap = LatestFrameCapture(replay).start()
+            console_output += f"Rejeu: {replay_path} (vitesse {'maximale' if replay_speed == 0 else f'x{replay_speed:g}'})\n"
         else:
-            video_source = int(camera_id)
-            console_output += f"ID Caméra: {camera_id}\n"
-        
-        if camera_source == "DroidCam (URL)":
-            if not isinstance(video_source, str) or not video_source.strip():
-                raise Exception("URL DroidCam invalide ou vide")
-            
-            clean_url = video_source.replace('htpp://', 'http://').strip()
-            console_output += f"Connexion DroidCam: {clean_url}\n"
+            if camera_source == "DroidCam (URL)":
+                video_source = droidcam_url
+                console_output += f"URL DroidCam: {droidcam_url}\n"
+                if not isinstance(video_source, str) or not video_source.strip():
+                    raise Exception("URL DroidCam invalide ou vide")
+            else:
+                video_source = int(camera_id)
+                console_output += f"ID Caméra: {camera_id}\n"
             
-            console_output += "Test préliminaire de l'URL...\n"
+            recorder = SessionRecorder() if record_session else None
             try:
-                test_response = requests.get(clean_url, timeout=10)
-                console_output += f"Test direct: Code {test_response.status_code}\n"
-                console_output += f"Content-Type: {test_response.headers.get('content-type', 'unknown')}\n"
-                console_output += f"Taille réponse: {len(test_response.content)} bytes\n"
-                
-                if test_response.status_code != 200:
-                    raise Exception(f"URL ne répond pas correctement (Code: {test_response.status_code})")
-                    
-            except requests.exceptions.ConnectTimeout:
-                raise Exception(f"Timeout de connexion - Vérifiez l'IP et le port")
-            except requests.exceptions.ConnectionError:
-                raise Exception(f"Impossible de se connecter - Vérifiez que DroidCam est démarré")
-            except Exception as e:
-                raise Exception(f"Erreur de test: {str(e)}")
-            
-            cap = DroidCamCapture(clean_url)
-            if not cap.open():
-                raise Exception(f"Test OK mais capture échoue pour {clean_url}")
-                
-            console_output += "DroidCam connecté avec succès\n"
-        else:
-            cap = cv2.VideoCapture(video_source)
-            
-            if not cap.isOpened():
-                raise Exception(f"Impossible d'ouvrir la source vidéo: {video_source}")
-            
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            cap.set(cv2.CAP_PROP_FPS, 30)
+                cap, source_log = open_video_source(video_source, recorder)
+            except Exception:
+                if recorder:
+                    recorder.close()
+                raise
+            console_output += source_log
+            if recorder:
+                st.session_state.last_recording_path = recorder.path
+                console_output += f"Enregistrement de la session: {recorder.path}\n"
+        
+        console_output += format_thread_settings(apply_thread_settings(ThreadBudget().per_job)) + "\n"
         
-        detector = FaceDetector(use_gpu=use_gpu)
+        detector = FaceDetector(
+            use_gpu=use_gpu, backend=detector_backend, preload_actions=preload_actions,
+            detection_profile=detection_profile
+        )
         detector.detection_interval = detection_interval
         
-        console_output += "Test du détecteur de visages...\n"
-        if detector.face_cascade.empty():
-            console_output += "ATTENTION: Classificateur de visages non chargé!\n"
+        if async_analysis:
+            detector.attribute_pool = AttributeAnalysisPool(detector.analyze_face_real)
+            st.session_state.rt_attribute_pool = detector.attribute_pool
+            console_output += f"Analyse asynchrone: {detector.attribute_pool.max_workers} worker(s), "
+            console_output += f"file max {detector.attribute_pool.max_pending}\n"
+        
+        console_output += f"Détecteur de visages: {detector.detector_backend.label}\n"
+        if detection_profile:
+            console_output += f"Profil de détection: {detection_profile}\n"
+        
+        profiler = AnalysisProfiler(label="mode2") if enable_profiling else None
+        governor = MemoryGovernor()
+        store = session_id = None
+        if store_results:
+            store, session_id = open_results_store(camera_source, {
+                'camera_id': camera_id, 'droidcam_url': droidcam_url, 'replay_path': replay_path,
+                'detector': detector_backend, 'detection_profile': detection_profile,
+                'detection_interval': detection_interval
+            })
+            console_output += f"Détections enregistrées en base: session {session_id} ({store.path})\n"
+        
+        state = RealtimeState(st.session_state.live_stats, store, session_id)
+        policy = LatencyPolicy(state.latency)
+        if shm_processes:
+            worker = SharedMemoryRealtimeWorker(
+                cap, detector, state, num_processes=shm_processes, backend=detector_backend,
+                detection_profile=detection_profile, profiler=profiler, governor=governor, policy=policy
+            ).start()
         else:
-            console_output += "Classificateur de visages chargé avec succès\n"
+            worker = RealtimeWorker(cap, detector, state, profiler=profiler, governor=governor, policy=policy).start()
         
+        # Le détecteur n'est référencé que par le worker: il est libéré avec la session
         st.session_state.video_capture = cap
-        st.session_state.face_detector = detector
+        st.session_state.memory_governor = governor
+        st.session_state.rt_state = state
+        st.session_state.rt_worker = worker
         st.session_state.camera_running = True
         st.session_state.frame_count = 0
+        st.session_state.rt_profiler = profiler
+        st.session_state.rt_encoder = JPEGFrameEncoder()
         
         console_output += "Caméra initialisée avec succès\n"
         console_output += f"Résolution: 640x480\n"
         console_output += f"Détecteur initialisé (GPU: {use_gpu})\n"
         console_output += f"Intervalle détection: {detection_interval} frames\n"
-        console_output += f"Mode temps réel: détection forcée toutes les 5 frames max\n"
+        if shm_processes:
+            console_output += f"Détection multi-processus: {shm_processes} processus (chaque frame)\n"
+        else:
+            console_output += f"Mode temps réel: détection toutes les {worker.effective_detection_interval} frames\n"
+        console_output += "Worker de traitement continu démarré\n"
+        if enable_profiling:
+            console_output += f"Profilage activé sur {st.session_state.rt_profiler.max_frames} frames\n"
         
         st.success("Caméra démarrée avec succès!")
         
@@ -342,21 +613,157 @@ def start_camera(camera_source, camera_id, droidcam_url, use_gpu, detection_inte
     
     st.session_state.console_output_rt = console_output
 
+def start_multi_camera(multi_sources, use_gpu, detection_interval, async_analysis, pool_workers,
+                       detector_backend=None, preload_actions=None, detection_profile=None,
+                       store_results=False):
+    """Démarre plusieurs caméras servies par un pool de détection partagé"""
+    
+    console_output = f"[{datetime.now().strftime('%H:%M:%S')}] Démarrage multi-caméras\n"
+    
+    release_session()
+    
+    try:
+        sources = [line.strip() for line in multi_sources.splitlines() if line.strip()]
+        if not sources:
+            raise Exception("Aucune source configurée")
+        
+        pool = SharedDetectorPool(pool_workers)
+        # Workers de détection dans ce processus: OpenCV partage la part du job entre eux
+        thread_settings = apply_thread_settings(ThreadBudget().threads_per_worker(pool.num_workers))
+        console_output += format_thread_settings(thread_settings) + "\n"
+        governor = MemoryGovernor()
+        attribute_pool = None
+        
+        # Une session commune aux caméras: les identifiants de visages sont préfixés par caméra
+        store = session_id = None
+        if store_results:
+            store, session_id = open_results_store(", ".join(sources), {
+                'detector': detector_backend, 'detection_profile': detection_profile,
+                'detection_interval': detection_interval
+            })
+        
+        try:
+            for index, value in enumerate(sources, start=1):
+                name = f"cam{index}"
+                video_source = int(value) if value.isdigit() else value
+                console_output += f"Source {name}: {value}\n"
+                
+                cap, source_log = open_video_source(video_source)
+                console_output += source_log
+                
+                # Tracker propre à chaque caméra, identifiants préfixés pour rester uniques
+                # Les modèles d'attributs sont partagés: un seul pré-chargement pour toutes les caméras
+                detector = FaceDetector(
+                    use_gpu=use_gpu, backend=detector_backend, 
+                    preload_actions=preload_actions if index == 1 else None,
+                    detection_profile=detection_profile
+                )
+                detector.detection_interval = detection_interval
+                detector.face_id_prefix = f"{name}_face"
+                
+                if async_analysis:
+                    if attribute_pool is None:
+                        attribute_pool = AttributeAnalysisPool(detector.analyze_face_real)
+                    detector.attribute_pool = attribute_pool
+                
+                state = RealtimeState(st.session_state.live_stats, store, session_id)
+                worker = RealtimeWorker(cap, detector, state, governor=governor, policy=LatencyPolicy(state.latency))
+                pool.add_source(CameraSource(name, cap, worker))
+        except Exception:
+            pool.stop()
+            if attribute_pool:
+                attribute_pool.shutdown()
+            raise
+        
+        pool.start()
+        
+        st.session_state.multi_pool = pool
+        st.session_state.memory_governor = governor
+        st.session_state.rt_attribute_pool = attribute_pool
+        st.session_state.camera_running = True
+        st.session_state.frame_count = 0
+        st.session_state.rt_profiler = None
+        st.session_state.rt_encoders = {}
+        
+        console_output += f"{len(sources)} caméra(s) initialisée(s)\n"
+        console_output += f"Pool de détection partagé: {pool.num_workers} worker(s)\n"
+        console_output += f"Détecteur de visages: {detector.detector_backend.label}\n"
+        console_output += f"Intervalle détection: {detection_interval} frames (appliqué: {worker.effective_detection_interval})\n"
+        if attribute_pool:
+            console_output += f"Analyse asynchrone partagée: {attribute_pool.max_workers} worker(s)\n"
+        if store:
+            console_output += f"Détections enregistrées en base: session {session_id} ({store.path})\n"
+        
+        st.success(f"{len(sources)} caméra(s) démarrée(s) avec succès!")
+        
+    except Exception as e:
+        console_output += f"ERREUR: {str(e)}\n"
+        st.error(f"Erreur lors du démarrage: {str(e)}")
+        st.session_state.camera_running = False
+    
+    st.session_state.console_output_rt = console_output
+
 def stop_camera():
     """Arrête la capture caméra"""
     
+    worker = st.session_state.get('rt_worker')
+    if worker:
+        worker.stop()
+        st.session_state.rt_worker = None
+    sync_worker_state()
+    
     console_output = st.session_state.get('console_output_rt', '')
     console_output += f"\n[{datetime.now().strftime('%H:%M:%S')}] Arrêt de la caméra\n"
     
     try:
-        if st.session_state.video_capture:
-            st.session_state.video_capture.release()
-            st.session_state.video_capture = None
+        attribute_pool = st.session_state.get('rt_attribute_pool')
+        if attribute_pool:
+            pool_stats = attribute_pool.get_stats()
+            console_output += (
+                f"Analyses asynchrones: {pool_stats['completed']} terminées, "
+                f"{pool_stats['rejected']} refusées, {pool_stats['cancelled']} annulées\n"
+            )
+        
+        gallery = worker.detector.reid_gallery if worker else None
+        if gallery is not None:
+            reid_stats = gallery.get_stats()
+            console_output += (
+                f"Ré-identification: {reid_stats['matches']} visage(s) revenu(s), "
+                f"{reid_stats['size']} en galerie\n"
+            )
+        
+        multi_pool = st.session_state.get('multi_pool')
+        if multi_pool:
+            for source_stats in multi_pool.get_stats():
+                console_output += (
+                    f"{source_stats['source']}: {source_stats['frames_processed']} frames, "
+                    f"latence p95 {source_stats['latency_p95_ms']:.0f} ms\n"
+                )
+        
+        capture = st.session_state.get('video_capture')
+        recorder = capture.recorder if capture else None
+        
+        release_session()
+        
+        if recorder:
+            recording = recorder.get_stats()
+            console_output += (
+                f"Session enregistrée: {recording['path']} ({recording['frames_written']} frames, "
+                f"{recording['size_mb']:.1f} Mo, {recording['frames_dropped']} abandonnée(s))\n"
+            )
         
         st.session_state.camera_running = False
         
-        total_detections = len(st.session_state.realtime_detections)
+        profiler = st.session_state.get('rt_profiler')
+        if profiler:
+            profiler.finish()
+            report_path = profiler.save_report()
+            console_output += f"Rapport de profilage sauvegardé: {report_path}\n"
+        
+        total_detections = st.session_state.live_stats.total_detections
         console_output += f"Total détections: {total_detections}\n"
+        if st.session_state.get('rt_results_store'):
+            console_output += f"Session {st.session_state.rt_results_session} enregistrée en base\n"
         console_output += "Caméra arrêtée\n"
         
         st.success("⏹️ Caméra arrêtée")
@@ -367,83 +774,258 @@ def stop_camera():
     
     st.session_state.console_output_rt = console_output
 
-def process_camera_frame(placeholder, analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity, detection_interval):
-    """Traite une frame de la caméra"""
+def sync_worker_state():
+    """Recopie l'état publié par le worker dans la session Streamlit"""
     
-    if not st.session_state.video_capture or not st.session_state.camera_running:
+    if st.session_state.get('multi_pool'):
+        sources = st.session_state.multi_pool.sources
+        states = [source.state for source in sources]
+        prefixes = [f"{source.name} " for source in sources]
+    elif st.session_state.get('rt_state'):
+        states = [st.session_state.rt_state]
+        prefixes = [""]
+    else:
         return
     
+    st.session_state.frame_count = sum(state.frame_count for state in states)
+    
+    for state, prefix in zip(states, prefixes):
+        lines = state.drain_logs()
+        if lines and 'console_output_rt' in st.session_state:
+            st.session_state.console_output_rt += "".join(f"{prefix}{line}\n" for line in lines)
+    
+    governor = st.session_state.get('memory_governor')
+    if governor and 'console_output_rt' in st.session_state:
+        st.session_state.console_output_rt = governor.trim_console(st.session_state.console_output_rt)
+
+def display_camera_frame(placeholder, display_quality, display_width, force=True):
+    """Affiche la dernière frame annotée publiée par le worker
+    Args:
+        placeholder: Emplacement de l'image
+        display_quality: Qualité JPEG
+        display_width: Largeur d'affichage
+        force: Affiche aussi une frame inchangée (premier affichage d'un rerun: la page est reconstruite)
+    """
+    
+    state = st.session_state.rt_state
+    
+    if not st.session_state.get('rt_encoder'):
+        st.session_state.rt_encoder = JPEGFrameEncoder()
+    encoder = st.session_state.rt_encoder
+    encoder.configure(display_quality, display_width)
+    
     try:
-        if hasattr(st.session_state.video_capture, 'refresh_frame'):
-            st.session_state.video_capture.refresh_frame()
+        annotated_frame, frame_seq = state.get_frame()
         
-        ret, frame = st.session_state.video_capture.read()
-        
-        if not ret or frame is None:
-            placeholder.error("Pas de frame disponible")
+        if annotated_frame is None:
+            if state.last_error:
+                placeholder.error(f"Erreur traitement frame: {state.last_error}")
+            else:
+                placeholder.info("En attente de la première frame...")
             return
         
-        if hasattr(st.session_state, 'face_detector'):
-            detector = st.session_state.face_detector
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            frame_count = st.session_state.get('frame_count', 0)
-            
-            original_interval = detector.detection_interval
-            detector.detection_interval = min(5, detection_interval)
-            
-            detections = detector.process_frame_with_tracking(
-                frame, frame_count, timestamp,
-                analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity
-            )
-            
-            detector.detection_interval = original_interval
-            
-            if detections:
-                st.session_state.realtime_detections.extend(detections)
-                
-                if len(st.session_state.realtime_detections) > 100:
-                    st.session_state.realtime_detections = st.session_state.realtime_detections[-100:]
-            
-            annotated_frame = detector.draw_annotations(
-                frame, detections,
-                analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity
-            )
-            
-            cv2.putText(annotated_frame, f"Frame: {frame_count}", (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            cv2.putText(annotated_frame, f"Visages: {len(detections)}", (10, 60), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            cv2.putText(annotated_frame, f"Total: {len(st.session_state.realtime_detections)}", (10, 90), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
-            detection_status = "DETECTION ACTIVE" if frame_count % detector.detection_interval == 0 else "TRACKING"
-            cv2.putText(annotated_frame, detection_status, (10, 120), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-            
-            st.session_state.frame_count = frame_count + 1
-            
-            if detections and 'console_output_rt' in st.session_state:
-                st.session_state.console_output_rt += f"[{timestamp}] {len(detections)} visage(s) détecté(s)\n"
-            
-        else:
-            annotated_frame = frame
+        # JPEG encodé une seule fois en BGR; une frame inchangée déjà affichée n'est pas renvoyée
+        jpeg, encoded_width, fresh = encoder.encode(annotated_frame, frame_seq)
+        if not fresh and not force:
+            return
         
-        frame_rgb = cv2.cvtColor(annotated_frame, cv2.COLOR_BGR2RGB)
-        image = Image.fromarray(frame_rgb)
+        transport_stats = encoder.get_stats()
+        placeholder.image(
+            jpeg, 
+            caption=(
+                f"Flux caméra en temps réel - {transport_stats['last_bytes'] / 1024:.1f} Ko/frame, "
+                f"encodage {transport_stats['avg_encode_ms']:.1f} ms"
+            ), 
+            width=encoded_width,
+            output_format="JPEG"
+        )
         
-        placeholder.image(image, caption="Flux caméra en temps réel", width=640)
+        worker = st.session_state.get('rt_worker')
+        state.mark_displayed(frame_seq, worker.policy.budget if worker and worker.policy else None)
         
     except Exception as e:
-        placeholder.error(f"Erreur traitement frame: {str(e)}")
+        placeholder.error(f"Erreur affichage frame: {str(e)}")
         if 'console_output_rt' in st.session_state:
-            st.session_state.console_output_rt += f"\nErreur frame: {str(e)}\n"
+            st.session_state.console_output_rt += f"\nErreur affichage: {str(e)}\n"
+
+def display_multi_camera(placeholder, analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity, 
+                         detection_interval, display_quality, display_width, latency_budget_ms=None,
+                         policy_actions=None):
+    """Affiche les flux et métriques d'une session multi-caméras"""
+    
+    pool = st.session_state.multi_pool
+    encoders = st.session_state.rt_encoders
+    
+    for source in pool.sources:
+        source.worker.update_settings(
+            analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity, detection_interval
+        )
+        if source.worker.policy and latency_budget_ms:
+            source.worker.policy.configure(latency_budget_ms, policy_actions or [])
+    
+    auto_refresh = st.checkbox("Auto-actualisation", value=True, key="rt_multi_auto")
+    refresh_delay = st.slider(
+        "Cadence d'affichage (ms)", 
+        min_value=50, 
+        max_value=1000, 
+        value=200, 
+        step=50,
+        key="rt_multi_refresh_delay"
+    )
+    
+    sync_worker_state()
+    
+    slots = {}
+    with placeholder.container():
+        columns = st.columns(2)
+        for index, source in enumerate(pool.sources):
+            with columns[index % 2]:
+                slots[source.name] = st.empty()
+            encoder = encoders.setdefault(source.name, JPEGFrameEncoder())
+            encoder.configure(display_quality, display_width // 2)
+            display_source_frame(slots[source.name], source, encoder)
+        
+        import pandas as pd
+        st.dataframe(pd.DataFrame(pool.get_stats()).round(1), use_container_width=True)
+    
+    if auto_refresh:
+        # Entre deux reruns, seules les caméras ayant publié une nouvelle frame sont renvoyées
+        refresh_until = time.time() + PAGE_REFRESH_SECONDS
+        while time.time() < refresh_until:
+            time.sleep(refresh_delay / 1000)
+            for source in pool.sources:
+                display_source_frame(slots[source.name], source, encoders[source.name], force=False)
+        st.rerun()
+
+def display_source_frame(slot, source, encoder, force=True):
+    """Affiche la dernière frame d'une caméra de la session multi-caméras
+    Args:
+        slot: Emplacement de l'image
+        source: CameraSource
+        encoder: JPEGFrameEncoder de la caméra
+        force: Affiche aussi une frame inchangée (premier affichage d'un rerun)
+    """
+    
+    annotated_frame, frame_seq = source.state.get_frame()
+    if annotated_frame is None:
+        if force:
+            slot.info(f"{source.name}: en attente de la première frame...")
+        return
+    
+    jpeg, encoded_width, fresh = encoder.encode(annotated_frame, frame_seq)
+    if not fresh and not force:
+        return
+    
+    source_stats = source.get_stats()
+    end_to_end = source.state.latency.percentiles('end_to_end', (95,))
+    slot.image(
+        jpeg, 
+        caption=(
+            f"{source.name} - {source_stats['processing_fps']:.1f} FPS, "
+            f"latence p50 {source_stats['latency_p50_ms']:.0f} ms / "
+            f"p95 {source_stats['latency_p95_ms']:.0f} ms"
+            + (f" (affichage p95 {end_to_end['p95']:.0f} ms)" if end_to_end else "")
+        ), 
+        width=encoded_width,
+        output_format="JPEG"
+    )
+    source.state.mark_displayed(
+        frame_seq, source.worker.policy.budget if source.worker.policy else None
+    )
+
+def display_latency_stats(state, latency_budget_ms, refresh_delay):
+    """Affiche les latences capture -> affichage et les décisions de la politique de latence"""
+    
+    snapshot = state.latency.snapshot()
+    end_to_end = snapshot['stages']['end_to_end']
+    counters = snapshot['counters']
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Latence p50", f"{end_to_end['p50']:.0f} ms" if end_to_end else "-")
+    with col2:
+        st.metric("Latence p95", f"{end_to_end['p95']:.0f} ms" if end_to_end else "-")
+    with col3:
+        st.metric("Latence p99", f"{end_to_end['p99']:.0f} ms" if end_to_end else "-")
+    with col4:
+        displayed = counters['displayed']
+        st.metric("Hors budget", f"{counters['over_budget'] / displayed * 100:.1f} %" if displayed else "-")
+    
+    capture_stats = st.session_state.video_capture.get_stats()
+    st.caption(
+        f"Budget {latency_budget_ms} ms - frames abandonnées: {counters['dropped']} (politique), "
+        f"{capture_stats['frames_dropped']} (capture) - annotations sautées: {counters['annotations_skipped']} - "
+        f"analyses différées: {counters['deferred']}"
+    )
+    
+    if refresh_delay >= latency_budget_ms:
+        st.warning("La cadence d'affichage dépasse le budget de latence: le budget ne peut pas être tenu.")
+    
+    with st.expander("Latence par étape"):
+        import pandas as pd
+        labels = {
+            'queue': "Capture -> traitement",
+            'processing': "Traitement",
+            'display': "Publication -> affichage",
+            'end_to_end': "Capture -> affichage"
+        }
+        rows = [
+            {'Étape': labels[stage], **{key: round(value, 1) for key, value in percentiles.items()}}
+            for stage, percentiles in snapshot['stages'].items() if percentiles
+        ]
+        if rows:
+            st.dataframe(pd.DataFrame(rows), use_container_width=True)
+
+def display_memory_report():
+    """Affiche la mémoire occupée par chaque structure de la session"""
+    
+    governor = st.session_state.memory_governor
+    
+    if st.session_state.get('multi_pool'):
+        workers = [(f"{source.name} ", source.worker) for source in st.session_state.multi_pool.sources]
+    elif st.session_state.get('rt_worker'):
+        workers = [("", st.session_state.rt_worker)]
+    else:
+        workers = []
+    
+    structures = {}
+    for prefix, worker in workers:
+        detector = worker.detector
+        structures[f"{prefix}Visages suivis"] = detector.tracked_faces
+        structures[f"{prefix}Stabilité émotions"] = detector.emotion_stability
+        structures[f"{prefix}Cache d'analyse"] = detector.analysis_cache
+        structures[f"{prefix}Historique détections"] = detector.detections
+        if detector.reid_gallery is not None:
+            structures[f"{prefix}Galerie de ré-identification"] = vars(detector.reid_gallery)
+        structures[f"{prefix}Dernière frame"] = worker.state.latest_frame
+    
+    live_stats = st.session_state.live_stats
+    structures["Détections récentes"] = live_stats.recent
+    structures["Identifiants de visages"] = live_stats.unique_faces
+    structures["Console"] = st.session_state.get('console_output_rt')
+    
+    with st.expander("Mémoire de la session"):
+        stats = governor.get_stats()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            memory_mb = stats['process_memory_mb']
+            st.metric("Processus", f"{memory_mb:.0f} Mo" if memory_mb is not None else "N/A")
+        with col2:
+            st.metric("Tracks purgés", stats['pruned_tracks'])
+        with col3:
+            st.metric("Détections évincées", stats['trimmed_detections'])
+        
+        import pandas as pd
+        st.dataframe(pd.DataFrame(governor.report(structures)), use_container_width=True)
 
 def display_realtime_stats():
     """Affiche les statistiques temps réel"""
     
     st.subheader("Statistiques")
     
-    total_detections = len(st.session_state.realtime_detections)
+    live_stats = st.session_state.live_stats
+    stats = live_stats.snapshot()
+    total_detections = stats['total_detections']
     frame_count = st.session_state.get('frame_count', 0)
     
     col1, col2, col3, col4 = st.columns(4)
@@ -461,52 +1043,53 @@ def display_realtime_stats():
             st.metric("Statut", "🔴 Arrêté")
     
     with col4:
-        if total_detections > 0:
-            unique_faces = len(set(d['face_id'] for d in st.session_state.realtime_detections))
-            st.metric("Visages uniques", unique_faces)
-        else:
-            st.metric("Visages uniques", "0")
+        st.metric("Visages uniques", stats['unique_faces'])
+    
+    recent_detections = live_stats.get_recent(10)
     
-    if st.session_state.realtime_detections:
+    if recent_detections:
         st.subheader("Dernières Détections")
         
-        recent_detections = st.session_state.realtime_detections[-10:]
+        import pandas as pd
+        df = pd.DataFrame(recent_detections)
+        display_df = df.drop(['bbox', 'analysis_pending'], axis=1, errors='ignore')
+        st.dataframe(display_df, use_container_width=True)
         
-        if recent_detections:
-            import pandas as pd
-            df = pd.DataFrame(recent_detections)
-            display_df = df.drop('bbox', axis=1, errors='ignore')
-            st.dataframe(display_df, use_container_width=True)
+        if total_detections >= 5:
+            col1, col2 = st.columns(2)
             
-            if len(st.session_state.realtime_detections) >= 5:
-                all_df = pd.DataFrame(st.session_state.realtime_detections)
-                
-                col1, col2 = st.columns(2)
-                
-                if 'gender_classification' in all_df.columns:
-                    with col1:
-                        gender_counts = all_df['gender_classification'].value_counts()
-                        st.write("**Répartition Genre:**")
-                        for gender, count in gender_counts.items():
-                            st.write(f"- {gender}: {count}")
-                
-                if 'emotion' in all_df.columns:
-                    with col2:
-                        emotion_counts = all_df['emotion'].value_counts()
-                        st.write("**Émotions Dominantes:**")
-                        for emotion, count in emotion_counts.head(3).items():
-                            st.write(f"- {emotion}: {count}")
+            gender_counts = stats['histograms']['gender_classification']
+            if gender_counts:
+                with col1:
+                    st.write("**Répartition Genre:**")
+                    for gender, count in gender_counts.most_common():
+                        st.write(f"- {gender}: {count}")
+            
+            emotion_counts = stats['histograms']['emotion']
+            if emotion_counts:
+                with col2:
+                    st.write("**Émotions Dominantes:**")
+                    for emotion, count in emotion_counts.most_common(3):
+                        st.write(f"- {emotion}: {count}")
+    
+    store = st.session_state.get('rt_results_store')
+    if store:
+        # Interrogation à la demande: la page est rafraîchie en continu pendant la capture
+        if st.checkbox("Interroger la base SQLite", value=False, key="rt_store_query"):
+            display_store_queries(store, st.session_state.rt_results_session, key_prefix="rt_")
 
 def export_realtime_data():
     """Export des données temps réel"""
     
     st.subheader("Export")
     
-    if st.session_state.realtime_detections:
+    recent_detections = st.session_state.live_stats.get_recent()
+    
+    if recent_detections:
         import pandas as pd
-        df = pd.DataFrame(st.session_state.realtime_detections)
+        df = pd.DataFrame(recent_detections)
         
-        export_df = df.drop('bbox', axis=1, errors='ignore')
+        export_df = df.drop(['bbox', 'analysis_pending'], axis=1, errors='ignore')
         csv_data = export_df.to_csv(index=False, sep=';')
         
         col1, col2 = st.columns(2)
@@ -522,7 +1105,39 @@ def export_realtime_data():
         with col2:
             st.metric("Entrées à exporter", len(df))
         
+        store = st.session_state.get('rt_results_store')
+        if store and not st.session_state.camera_running:
+            session_id = st.session_state.rt_results_session
+            session_df = pd.DataFrame(store.get_detections(session_id))
+            st.download_button(
+                label=f"📥 Télécharger la session complète ({len(session_df)} détections)",
+                data=session_df.drop('bbox', axis=1, errors='ignore').to_csv(index=False, sep=';'),
+                file_name=f"detections_session_{session_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv",
+                key="rt_store_export"
+            )
+        
         st.write("**Aperçu des données:**")
         st.dataframe(export_df.head(), use_container_width=True)
     else:
-        st.info("Aucune donnée à exporter") 
\ No newline at end of file
+        st.info("Aucune donnée à exporter")
+
+def export_profiling_report():
+    """Export du rapport de profilage temps réel"""
+    
+    profiler = st.session_state.rt_profiler
+    
+    st.subheader("Profilage")
+    
+    if profiler.finished:
+        st.write(f"Fenêtre terminée: {profiler.frames_profiled} frames profilées")
+    else:
+        st.write(f"Profilage en cours: {profiler.frames_profiled}/{profiler.max_frames} frames")
+    
+    st.download_button(
+        label="📥 Télécharger Rapport de Profilage",
+        data=profiler.get_report(),
+        file_name=f"profiling_mode2_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+        mime="text/plain",
+        key="rt_profiling_report"
+    )
@@ -0,0 +1,131 @@
+import os
+import threading
+from collections import deque
+
+
+class CameraSource:
+    """Source d'une session multi-caméras: capture, tracker et état propres à la caméra"""
+
+    def __init__(self, name, capture, worker):
+        """Initialise la source
+        Args:
+            name: Nom affiché de la source
+            capture: LatestFrameCapture démarrée
+            worker: RealtimeWorker de la source (non démarré: exécuté par le pool partagé)
+        """
+        self.name = name
+        self.capture = capture
+        self.worker = worker
+        self.state = worker.state
+
+        self.last_seq = 0
+        self.busy = False
+        self.frames_processed = 0
+        self.latencies = deque(maxlen=100)
+
+    def get_stats(self):
+        """Statistiques de la source (cadence, latence capture -> publication)
+        Returns:
+            Dictionnaire de métriques
+        """
+        latencies = sorted(self.latencies)
+        capture_stats = self.capture.get_stats()
+        return {
+            'source': self.name,
+            'frames_processed': self.frames_processed,
+            'processing_fps': self.state.processing_fps,
+            'capture_fps': capture_stats['capture_fps'],
+            'frames_dropped': capture_stats['frames_dropped'],
+            'latency_p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+            'latency_p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000 if latencies else 0.0
+        }
+
+
+class SharedDetectorPool:
+    """Pool fixe de workers de détection partagé entre plusieurs caméras
+
+    Les sources sont servies à tour de rôle (round-robin): chaque worker prend la prochaine source
+    ayant une frame nouvelle et non déjà en cours de traitement. Une source n'est jamais traitée par
+    deux workers à la fois, ce qui préserve la cohérence de son tracker.
+    """
+
+    def __init__(self, num_workers=None):
+        """Initialise le pool
+        Args:
+            num_workers: Nombre de workers (DETECTOR_POOL_WORKERS, défaut 2)
+        """
+        self.num_workers = num_workers or int(os.getenv('DETECTOR_POOL_WORKERS', '2'))
+        self.sources = []
+
+        self._lock = threading.Lock()
+        self._cursor = 0
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def add_source(self, source):
+        """Ajoute une source au pool"""
+        with self._lock:
+            self.sources.append(source)
+
+    def start(self):
+        """Démarre les workers"""
+        self._stop_event.clear()
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._run, name=f"SharedDetector-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """Arrête les workers puis libère les captures"""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        for source in self.sources:
+            source.capture.release()
+
+    def _next_ready_source(self):
+        """Sélectionne équitablement la prochaine source ayant une frame à traiter
+        Returns:
+            Tuple (source, frame, horodatage de capture) ou None
+        """
+        with self._lock:
+            count = len(self.sources)
+            for offset in range(count):
+                index = (self._cursor + offset) % count
+                source = self.sources[index]
+                if source.busy:
+                    continue
+                ret, frame, seq, captured_at = source.capture.read_latest()
+                if not ret or seq == source.last_seq:
+                    continue
+                source.busy = True
+                source.last_seq = seq
+                self._cursor = (index + 1) % count
+                return source, frame, captured_at
+        return None
+
+    def _run(self):
+        """Boucle d'un worker partagé"""
+        while not self._stop_event.is_set():
+            item = self._next_ready_source()
+            if item is None:
+                self._stop_event.wait(0.005)
+                continue
+
+            source, frame, captured_at = item
+            try:
+                if source.worker.handle_frame(frame, captured_at):
+                    source.frames_processed += 1
+                    source.latencies.append(source.worker.last_latency)
+            finally:
+                with self._lock:
+                    source.busy = False
+
+    def get_stats(self):
+        """Statistiques par source
+        Returns:
+            Liste de dictionnaires de métriques
+        """
+        return [source.get_stats() for source in self.sources]
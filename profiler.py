@@ -0,0 +1,161 @@
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+
+def profiling_enabled_from_env():
+    """Indique si le profilage est activé via la variable PROFILING_ENABLED
+    Returns:
+        True si le profilage est demandé dans l'environnement (.env)
+    """
+    return os.getenv('PROFILING_ENABLED', 'false').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class AnalysisProfiler:
+    """Profilage opt-in (cProfile + tracemalloc) sur une fenêtre bornée de frames"""
+
+    def __init__(self, max_frames=None, top_n=None, label="analyse"):
+        """Initialise le profileur
+        Args:
+            max_frames: Nombre de frames profilées avant arrêt automatique
+            top_n: Nombre de fonctions / sites d'allocation dans le rapport
+            label: Nom de l'exécution profilée (utilisé dans le rapport)
+        """
+        self.max_frames = max_frames or int(os.getenv('PROFILING_FRAMES', '100'))
+        self.top_n = top_n or int(os.getenv('PROFILING_TOP_N', '20'))
+        self.label = label
+
+        self.profile = cProfile.Profile()
+        self.frames_profiled = 0
+        self.active = False
+        self.finished = False
+        self.error = None
+
+        self.started_at = None
+        self.finished_at = None
+        self.start_snapshot = None
+        self.end_snapshot = None
+        self.peak_memory = 0
+        self._owns_tracemalloc = False
+
+    def _start_window(self):
+        """Démarre la fenêtre de profilage (tracemalloc + horodatage)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._owns_tracemalloc = True
+        else:
+            tracemalloc.reset_peak()
+        self.start_snapshot = tracemalloc.take_snapshot()
+        self.started_at = datetime.now()
+        self.active = True
+
+    def start_frame(self):
+        """Démarre la mesure d'une frame"""
+        if self.finished:
+            return
+        if not self.active:
+            self._start_window()
+        try:
+            self.profile.enable()
+        except ValueError as e:
+            # Un autre profileur est déjà actif sur ce processus
+            self.error = str(e)
+            self.finish()
+
+    def end_frame(self):
+        """Termine la mesure d'une frame et clôt la fenêtre si elle est pleine"""
+        if not self.active or self.finished:
+            return
+        self.profile.disable()
+        self.frames_profiled += 1
+        if self.frames_profiled >= self.max_frames:
+            self.finish()
+
+    @contextmanager
+    def frame(self):
+        """Context manager encadrant le traitement d'une frame"""
+        self.start_frame()
+        try:
+            yield
+        finally:
+            self.end_frame()
+
+    def finish(self):
+        """Clôt la fenêtre de profilage et capture l'instantané mémoire final"""
+        if self.finished:
+            return
+        self.finished = True
+        self.finished_at = datetime.now()
+        if not self.active:
+            return
+        self.profile.disable()
+        if tracemalloc.is_tracing():
+            self.end_snapshot = tracemalloc.take_snapshot()
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+                self._owns_tracemalloc = False
+
+    def get_report(self):
+        """Construit le rapport texte (fonctions chaudes et sites d'allocation)
+        Returns:
+            Rapport de profilage sous forme de texte
+        """
+        lines = [
+            f"=== Rapport de profilage: {self.label} ===",
+            f"Début: {self.started_at.strftime('%Y-%m-%d %H:%M:%S') if self.started_at else '-'}",
+            f"Fin: {self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else 'en cours'}",
+            f"Frames profilées: {self.frames_profiled}/{self.max_frames}",
+        ]
+        if self.error:
+            lines.append(f"Avertissement: {self.error}")
+
+        if self.frames_profiled > 0:
+            stream = io.StringIO()
+            stats = pstats.Stats(self.profile, stream=stream)
+            stats.strip_dirs().sort_stats('cumulative').print_stats(self.top_n)
+            lines.append("")
+            lines.append(f"--- Top {self.top_n} fonctions (temps cumulé) ---")
+            lines.append(stream.getvalue().strip())
+
+            stream = io.StringIO()
+            stats = pstats.Stats(self.profile, stream=stream)
+            stats.strip_dirs().sort_stats('tottime').print_stats(self.top_n)
+            lines.append("")
+            lines.append(f"--- Top {self.top_n} fonctions (temps propre) ---")
+            lines.append(stream.getvalue().strip())
+
+        if self.start_snapshot is not None:
+            end_snapshot = self.end_snapshot
+            if end_snapshot is None and tracemalloc.is_tracing():
+                end_snapshot = tracemalloc.take_snapshot()
+            if end_snapshot is not None:
+                lines.append("")
+                lines.append(f"--- Top {self.top_n} sites d'allocation (croissance) ---")
+                if self.peak_memory:
+                    lines.append(f"Pic mémoire tracé: {self.peak_memory / (1024 * 1024):.2f} MB")
+                diff = end_snapshot.compare_to(self.start_snapshot, 'lineno')
+                for stat in diff[:self.top_n]:
+                    lines.append(str(stat))
+
+        return "\n".join(lines) + "\n"
+
+    def save_report(self, output_dir=None):
+        """Sauvegarde le rapport sur disque
+        Args:
+            output_dir: Dossier de sortie (PROFILING_OUTPUT_DIR ou dossier temporaire)
+        Returns:
+            Chemin du fichier créé
+        """
+        output_dir = output_dir or os.getenv('PROFILING_OUTPUT_DIR', tempfile.gettempdir())
+        os.makedirs(output_dir, exist_ok=True)
+        filename = f"profiling_{self.label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+        path = os.path.join(output_dir, filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.get_report())
+        return path
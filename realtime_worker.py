@@ -0,0 +1,306 @@
+import cv2
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from latency_budget import LatencyMonitor
+from live_stats import LiveStats
+
+# Intervalle de détection maximal en temps réel (les visages bougent plus vite qu'en vidéo)
+MAX_DETECTION_INTERVAL = 5
+
+
+class RealtimeState:
+    """État partagé thread-safe entre le worker temps réel et l'interface Streamlit"""
+
+    def __init__(self, stats=None, store=None, session_id=None):
+        """Initialise l'état
+        Args:
+            stats: LiveStats de la session (créées si absentes)
+            store: ResultsStore optionnel où les détections publiées sont enregistrées
+            session_id: Session de la base SQLite
+        """
+        self.stats = stats or LiveStats()
+        self.store = store
+        self.session_id = session_id
+        self.latency = LatencyMonitor()
+        self._lock = threading.Lock()
+
+        self.latest_frame = None
+        self.latest_captured_at = None
+        self.latest_published_at = None
+        self.frame_seq = 0
+        self._displayed_seq = 0
+        self.frame_count = 0
+        self.processing_fps = 0.0
+        self.last_error = None
+        # Bornée: les lignes s'accumulent tant qu'aucun navigateur ne rafraîchit la page
+        self._log_lines = deque(maxlen=500)
+
+    def publish(self, annotated_frame, detections, frame_count, processing_fps, captured_at=None):
+        """Publie le résultat d'une frame traitée
+        Args:
+            annotated_frame: Frame annotée (BGR)
+            detections: Détections de la frame
+            frame_count: Nombre de frames traitées
+            processing_fps: Cadence de traitement mesurée
+            captured_at: Horodatage de capture de la frame
+        """
+        with self._lock:
+            self.latest_frame = annotated_frame
+            self.latest_captured_at = captured_at
+            self.latest_published_at = time.time()
+            self.frame_seq += 1
+            self.frame_count = frame_count
+            self.processing_fps = processing_fps
+        if detections:
+            self.stats.add_many(detections)
+            if self.store:
+                # Durée depuis le début de la session: l'horodatage HH:MM:SS est l'heure murale
+                self.store.add_detections(self.session_id, detections,
+                                          captured_at if captured_at is not None else time.time())
+
+    def get_frame(self):
+        """Retourne la dernière frame annotée
+        Returns:
+            Tuple (frame, numéro de séquence)
+        """
+        with self._lock:
+            return self.latest_frame, self.frame_seq
+
+    def mark_displayed(self, frame_seq, budget=None):
+        """Horodate l'affichage d'une frame publiée (première fois seulement)
+        Args:
+            frame_seq: Numéro de séquence affiché (get_frame)
+            budget: Budget de latence en secondes (compte les frames affichées hors budget)
+        """
+        displayed_at = time.time()
+        with self._lock:
+            if frame_seq <= self._displayed_seq or frame_seq != self.frame_seq or self.latest_captured_at is None:
+                return
+            self._displayed_seq = frame_seq
+            captured_at, published_at = self.latest_captured_at, self.latest_published_at
+
+        self.latency.record('display', displayed_at - published_at)
+        self.latency.record('end_to_end', displayed_at - captured_at)
+        self.latency.count('displayed')
+        if budget is not None and displayed_at - captured_at > budget:
+            self.latency.count('over_budget')
+
+    @property
+    def total_detections(self):
+        return self.stats.total_detections
+
+    def log(self, message):
+        """Ajoute une ligne à la console (consommée par l'interface)"""
+        with self._lock:
+            self._log_lines.append(message)
+
+    def drain_logs(self):
+        """Retourne et vide les lignes de console en attente"""
+        with self._lock:
+            lines = list(self._log_lines)
+            self._log_lines.clear()
+            return lines
+
+    def set_error(self, error):
+        with self._lock:
+            self.last_error = error
+
+
+class RealtimeWorker:
+    """Worker de session: capture -> détection/tracking -> annotation au rythme de la caméra"""
+
+    def __init__(self, capture, detector, state, profiler=None, governor=None, policy=None):
+        """Initialise le worker
+        Args:
+            capture: LatestFrameCapture démarrée
+            detector: FaceDetector dédié à la session
+            state: RealtimeState partagé avec l'interface
+            profiler: AnalysisProfiler optionnel
+            governor: MemoryGovernor optionnel (budgets mémoire du détecteur)
+            policy: LatencyPolicy optionnelle (budget de latence, sur state.latency)
+        """
+        self.capture = capture
+        self.detector = detector
+        self.state = state
+        self.profiler = profiler
+        self.governor = governor
+        self.policy = policy
+
+        self.analyze_age = True
+        self.analyze_gender = True
+        self.analyze_emotion = True
+        self.analyze_ethnicity = True
+        self.detection_interval = detector.detection_interval
+
+        self.frame_count = 0
+        self.last_latency = None
+        self.started_at = time.time()
+        self.first_frame_latency = None
+        self._fps_window_start = time.time()
+        self._fps_window_frames = 0
+        self._processing_fps = 0.0
+        self._force_detection = False
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def update_settings(self, analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity,
+                        detection_interval):
+        """Met à jour les options d'analyse (appelé par l'interface à chaque rerun)"""
+        self.analyze_age = analyze_age
+        self.analyze_gender = analyze_gender
+        self.analyze_emotion = analyze_emotion
+        self.analyze_ethnicity = analyze_ethnicity
+        self.detection_interval = detection_interval
+
+    @property
+    def effective_detection_interval(self):
+        """Intervalle de détection appliqué (plafonné à MAX_DETECTION_INTERVAL frames en temps réel)"""
+        return min(MAX_DETECTION_INTERVAL, self.detection_interval)
+
+    def force_detection(self):
+        """Demande une détection complète sur la prochaine frame"""
+        self._force_detection = True
+
+    def start(self):
+        """Démarre le thread de traitement"""
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="RealtimeWorker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Arrête le thread de traitement"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        """Boucle principale: traite chaque nouvelle frame dès qu'elle est capturée"""
+        last_seq = 0
+
+        while not self._stop_event.is_set():
+            ret, frame, seq, captured_at = self.capture.read_latest(timeout=0.5)
+            if not ret or frame is None or seq == last_seq:
+                continue
+            last_seq = seq
+            self.handle_frame(frame, captured_at)
+
+    def handle_frame(self, frame, captured_at, faces=None):
+        """Traite une frame et publie le résultat dans l'état partagé
+        Args:
+            frame: Frame BGR
+            captured_at: Horodatage de capture
+            faces: Boîtes déjà détectées hors de ce thread (None: détection par le worker)
+        Returns:
+            True si la frame a été traitée sans erreur (False si abandonnée par la politique de latence)
+        """
+        started_at = time.time()
+        latency = self.state.latency
+        latency.record('queue', started_at - captured_at)
+
+        decision = self.policy.decide(started_at - captured_at) if self.policy else None
+        if decision and decision['drop']:
+            return False
+
+        if self.profiler:
+            self.profiler.start_frame()
+        try:
+            annotated_frame, detections = self._process(frame, captured_at, faces, decision)
+        except Exception as e:
+            self.state.set_error(str(e))
+            self.state.log(f"Erreur frame: {str(e)}")
+            return False
+        finally:
+            if self.profiler:
+                self.profiler.end_frame()
+
+        self._fps_window_frames += 1
+        elapsed = time.time() - self._fps_window_start
+        if elapsed >= 1.0:
+            self._processing_fps = self._fps_window_frames / elapsed
+            self._fps_window_start = time.time()
+            self._fps_window_frames = 0
+
+        self.state.publish(annotated_frame, detections, self.frame_count, self._processing_fps, captured_at)
+        self.last_latency = time.time() - captured_at
+        latency.record('processing', time.time() - started_at)
+
+        if self.governor and self.frame_count % self.governor.check_interval == 0:
+            self.governor.enforce(self.detector)
+
+        if self.first_frame_latency is None:
+            self.first_frame_latency = time.time() - self.started_at
+            self.state.log(f"Première frame traitée en {self.first_frame_latency * 1000:.0f} ms")
+        return True
+
+    def _process(self, frame, captured_at, faces=None, decision=None):
+        """Détecte, suit et annote une frame
+        Args:
+            frame: Frame BGR
+            captured_at: Horodatage de capture
+            faces: Boîtes déjà détectées (None: détection selon l'intervalle)
+            decision: Décision de la politique de latence (attributs différés, annotations sautées)
+        Returns:
+            Tuple (frame annotée, détections)
+        """
+        if self._force_detection:
+            self._force_detection = False
+            self.frame_count = 0
+
+        detector = self.detector
+        timestamp = datetime.fromtimestamp(captured_at).strftime("%H:%M:%S")
+        frame_count = self.frame_count
+
+        # Plafond local au worker: l'intervalle du détecteur (et de ses points de reprise) reste intact
+        detection_interval = self.effective_detection_interval
+        defer_analysis = bool(decision and decision['defer_attributes'])
+        detector.defer_analysis = defer_analysis
+
+        start = time.time()
+        detections = detector.process_frame_with_tracking(
+            frame, frame_count, timestamp,
+            self.analyze_age, self.analyze_gender, self.analyze_emotion, self.analyze_ethnicity,
+            faces=faces, detection_interval=detection_interval
+        )
+        self.state.latency.record('tracking_deferred' if defer_analysis else 'tracking', time.time() - start)
+
+        if decision and decision['skip_annotations']:
+            # Budget dépassé: la frame est affichée telle que capturée, sans redessiner les annotations
+            # (copie: la frame peut être une vue sur l'anneau en mémoire partagée, réutilisé ensuite)
+            self.frame_count = frame_count + 1
+            return frame.copy(), detections
+
+        start = time.time()
+        annotated_frame = detector.draw_annotations(
+            frame, detections,
+            self.analyze_age, self.analyze_gender, self.analyze_emotion, self.analyze_ethnicity
+        )
+
+        cv2.putText(annotated_frame, f"Frame: {frame_count}", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        cv2.putText(annotated_frame, f"Visages: {len(detections)}", (10, 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        cv2.putText(annotated_frame, f"Total: {self.state.total_detections + len(detections)}", (10, 90),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+        detection_active = faces is not None or frame_count % detection_interval == 0
+        detection_status = "DETECTION ACTIVE" if detection_active else "TRACKING"
+        cv2.putText(annotated_frame, detection_status, (10, 120),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+
+        self.frame_count = frame_count + 1
+
+        if detections and frame_count % detection_interval == 0:
+            self.state.log(f"[{timestamp}] {len(detections)} visage(s) détecté(s)")
+        self.state.latency.record('annotation', time.time() - start)
+
+        return annotated_frame, detections
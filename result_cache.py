@@ -0,0 +1,178 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from checkpoint import json_default
+
+
+class ResultCache:
+    """Cache disque des résultats d'analyse vidéo, adressé par contenu
+
+    Une entrée par clé d'analyse (empreinte de la vidéo + paramètres, voir checkpoint.make_job_key)
+    contenant les détections et la vidéo annotée. Les entrées expirent après un TTL et le cache
+    est borné en taille: les entrées les moins récemment utilisées sont évincées en premier.
+    Les résultats sont stockés en JSON, jamais en pickle: un fichier déposé dans le répertoire
+    du cache ne peut pas exécuter de code.
+    """
+
+    def __init__(self, base_dir=None, max_bytes=None, ttl_seconds=None):
+        """Initialise le cache
+        Args:
+            base_dir: Répertoire du cache (RESULT_CACHE_DIR, défaut répertoire temporaire)
+            max_bytes: Taille maximale (RESULT_CACHE_MAX_MB, défaut 2048 Mo)
+            ttl_seconds: Durée de vie d'une entrée (RESULT_CACHE_TTL_HOURS, défaut 168 h)
+        """
+        self.base_dir = base_dir or os.getenv('RESULT_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'face_detector_cache')
+        self.max_bytes = max_bytes or int(float(os.getenv('RESULT_CACHE_MAX_MB', '2048')) * 1024 * 1024)
+        self.ttl_seconds = ttl_seconds or float(os.getenv('RESULT_CACHE_TTL_HOURS', '168')) * 3600
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry_dir(self, key):
+        return os.path.join(self.base_dir, key)
+
+    def _read_meta(self, key):
+        try:
+            with open(os.path.join(self._entry_dir(key), 'meta.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, key, meta):
+        meta_path = os.path.join(self._entry_dir(key), 'meta.json')
+        tmp_path = meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def _remove(self, key):
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def get(self, key):
+        """Retourne les résultats mis en cache
+        Args:
+            key: Clé d'analyse
+        Returns:
+            Dictionnaire des résultats (vidéo annotée copiée hors du cache) ou None
+        """
+        with self._lock:
+            meta = self._read_meta(key)
+            if meta is None:
+                self.misses += 1
+                return None
+
+            if time.time() - meta['created_at'] > self.ttl_seconds:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            entry_dir = self._entry_dir(key)
+            try:
+                with open(os.path.join(entry_dir, 'results.json'), 'r', encoding='utf-8') as f:
+                    results = json.load(f)
+            except (OSError, ValueError):
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            for detection in results.get('detections', []):
+                detection['bbox'] = tuple(detection['bbox'])
+
+            # La vidéo est copiée: le cache peut l'évincer pendant que l'utilisateur la télécharge
+            cached_video = os.path.join(entry_dir, 'video.mp4')
+            if os.path.exists(cached_video):
+                output_path = tempfile.mktemp(suffix='_analyzed.mp4')
+                shutil.copyfile(cached_video, output_path)
+                results['output_video_path'] = output_path
+
+            meta['last_access'] = time.time()
+            meta['hits'] = meta.get('hits', 0) + 1
+            self._write_meta(key, meta)
+            self.hits += 1
+            return results
+
+    def put(self, key, results, video_path=None):
+        """Enregistre les résultats d'une analyse
+        Args:
+            key: Clé d'analyse
+            results: Dictionnaire sérialisable des résultats
+            video_path: Vidéo annotée à conserver
+        """
+        with self._lock:
+            entry_dir = self._entry_dir(key)
+            tmp_dir = entry_dir + '.tmp'
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+
+            with open(os.path.join(tmp_dir, 'results.json'), 'w', encoding='utf-8') as f:
+                json.dump(results, f, default=json_default)
+            if video_path and os.path.exists(video_path):
+                shutil.copyfile(video_path, os.path.join(tmp_dir, 'video.mp4'))
+
+            size = sum(os.path.getsize(os.path.join(tmp_dir, name)) for name in os.listdir(tmp_dir))
+            now = time.time()
+
+            self._remove(key)
+            os.replace(tmp_dir, entry_dir)
+            self._write_meta(key, {'created_at': now, 'last_access': now, 'size': size, 'hits': 0})
+
+            self._evict()
+
+    def _entries(self):
+        """Liste les entrées (clé, métadonnées) présentes sur disque"""
+        if not os.path.isdir(self.base_dir):
+            return []
+        entries = []
+        for key in os.listdir(self.base_dir):
+            if key.endswith('.tmp'):
+                continue
+            meta = self._read_meta(key)
+            if meta is not None:
+                entries.append((key, meta))
+        return entries
+
+    def _evict(self):
+        """Supprime les entrées expirées puis les moins récemment utilisées au-delà de la taille maximale"""
+        now = time.time()
+        entries = []
+        for key, meta in self._entries():
+            if now - meta['created_at'] > self.ttl_seconds:
+                self._remove(key)
+                self.evictions += 1
+            else:
+                entries.append((key, meta))
+
+        total_size = sum(meta['size'] for _, meta in entries)
+        for key, meta in sorted(entries, key=lambda item: item[1]['last_access']):
+            if total_size <= self.max_bytes:
+                break
+            self._remove(key)
+            total_size -= meta['size']
+            self.evictions += 1
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def get_stats(self):
+        """Statistiques du cache
+        Returns:
+            Dictionnaire (entrées, taille, succès/échecs, évictions)
+        """
+        with self._lock:
+            entries = self._entries()
+        return {
+            'entries': len(entries),
+            'size_mb': sum(meta['size'] for _, meta in entries) / (1024 * 1024),
+            'max_size_mb': self.max_bytes / (1024 * 1024),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,272 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+ATTRIBUTE_COLUMNS = ('age_estimation', 'gender_classification', 'ethnicity_estimation', 'emotion')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    mode TEXT NOT NULL,
+    source TEXT,
+    params TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    frame_number INTEGER NOT NULL,
+    timestamp TEXT,
+    elapsed_s REAL,
+    face_id TEXT NOT NULL,
+    x INTEGER, y INTEGER, w INTEGER, h INTEGER,
+    age_estimation TEXT,
+    gender_classification TEXT,
+    ethnicity_estimation TEXT,
+    emotion TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_detections_session_face ON detections(session_id, face_id, frame_number);
+CREATE INDEX IF NOT EXISTS idx_detections_session_frame ON detections(session_id, frame_number);
+CREATE INDEX IF NOT EXISTS idx_detections_session_elapsed ON detections(session_id, elapsed_s);
+"""
+
+
+def timestamp_seconds(value):
+    """Convertit un horodatage (SS, MM:SS ou HH:MM:SS) en secondes
+    Raises:
+        ValueError: Horodatage invalide
+    """
+    try:
+        parts = [int(part) for part in value.strip().split(':')]
+    except ValueError:
+        parts = []
+    if not 1 <= len(parts) <= 3 or any(part < 0 for part in parts):
+        raise ValueError(f"Horodatage invalide: {value}")
+    parts = [0] * (3 - len(parts)) + parts
+    return parts[0] * 3600 + parts[1] * 60 + parts[2]
+
+
+def results_store_enabled():
+    """Indique si l'enregistrement SQLite est activé par défaut (RESULTS_DB_ENABLED, défaut false)"""
+    return os.getenv('RESULTS_DB_ENABLED', 'false').lower() in ('1', 'true', 'yes', 'on')
+
+
+class ResultsStore:
+    """Base SQLite indexée des détections, par session d'analyse
+
+    Mode WAL: l'interface lit pendant que les workers écrivent. Les détections sont mises en
+    tampon et insérées par lots (une transaction par lot). Les filtres temporels portent sur
+    elapsed_s, secondes écoulées depuis le début de la session: position dans la vidéo en mode
+    upload, temps depuis le démarrage en temps réel (l'horodatage HH:MM:SS d'une session temps
+    réel est l'heure murale, une session qui passe minuit mélangerait deux jours).
+    """
+
+    def __init__(self, path=None, batch_size=None):
+        """Ouvre (ou crée) la base
+        Args:
+            path: Fichier SQLite (RESULTS_DB_PATH, défaut dossier temporaire)
+            batch_size: Détections par lot d'insertion (RESULTS_DB_BATCH_SIZE, défaut 500)
+        """
+        self.path = path or os.getenv('RESULTS_DB_PATH',
+                                      os.path.join(tempfile.gettempdir(), 'face_results.sqlite3'))
+        self.batch_size = batch_size or int(os.getenv('RESULTS_DB_BATCH_SIZE', '500'))
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self._session_origins = {}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def create_session(self, mode, source=None, params=None):
+        """Crée une session
+        Args:
+            mode: 'upload' ou 'realtime'
+            source: Nom du fichier ou de la caméra
+            params: Paramètres d'analyse (JSON)
+        Returns:
+            Identifiant de la session
+        """
+        created_at = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO sessions (mode, source, params, created_at) VALUES (?, ?, ?, ?)",
+                (mode, source, json.dumps(params, default=str) if params is not None else None, created_at)
+            )
+            self._conn.commit()
+            self._session_origins[cursor.lastrowid] = created_at
+            return cursor.lastrowid
+
+    def _session_origin(self, session_id):
+        # Appelé sous le verrou
+        if session_id not in self._session_origins:
+            row = self._conn.execute("SELECT created_at FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            self._session_origins[session_id] = row[0] if row else 0.0
+        return self._session_origins[session_id]
+
+    def add_detections(self, session_id, detections, captured_at=None):
+        """Ajoute des détections au tampon (insérées par lots de batch_size)
+        Args:
+            session_id: Session
+            detections: Détections (horodatage HH:MM:SS dans la vidéo en mode upload)
+            captured_at: Horodatage epoch de capture des détections temps réel (durée depuis le
+                début de la session); None: durée lue dans l'horodatage de chaque détection
+        """
+        with self._lock:
+            origin = self._session_origin(session_id) if captured_at is not None else None
+
+        rows = []
+        for detection in detections:
+            x, y, w, h = detection.get('bbox') or (None, None, None, None)
+            timestamp = detection.get('timestamp')
+            if origin is not None:
+                elapsed = captured_at - origin
+            else:
+                elapsed = timestamp_seconds(timestamp) if timestamp else None
+            rows.append((
+                session_id, detection['frame_number'], timestamp, elapsed, detection['face_id'],
+                x, y, w, h, *(detection.get(column) for column in ATTRIBUTE_COLUMNS)
+            ))
+
+        with self._lock:
+            self._pending.extend(rows)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        """Insère les détections en attente"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO detections (session_id, frame_number, timestamp, elapsed_s, face_id, x, y, w, h, "
+                "age_estimation, gender_classification, ethnicity_estimation, emotion) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._pending
+            )
+        self._pending = []
+
+    def _query(self, sql, params=()):
+        # Les lectures voient aussi les détections encore en tampon
+        with self._lock:
+            self._flush_locked()
+            return self._conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _time_filter(start=None, end=None):
+        clauses, params = [], []
+        if start:
+            clauses.append("elapsed_s >= ?")
+            params.append(timestamp_seconds(start))
+        if end:
+            # Borne incluse: toute la seconde de fin (durées temps réel fractionnaires)
+            clauses.append("elapsed_s < ?")
+            params.append(timestamp_seconds(end) + 1)
+        return "".join(f" AND {clause}" for clause in clauses), params
+
+    def count_detections(self, session_id):
+        return self._query("SELECT COUNT(*) FROM detections WHERE session_id = ?", (session_id,))[0][0]
+
+    def count_unique_faces(self, session_id):
+        return self._query(
+            "SELECT COUNT(DISTINCT face_id) FROM detections WHERE session_id = ?", (session_id,)
+        )[0][0]
+
+    def list_face_ids(self, session_id):
+        """Identifiants des visages d'une session, avec leur nombre de détections"""
+        rows = self._query(
+            "SELECT face_id, COUNT(*) FROM detections WHERE session_id = ? GROUP BY face_id ORDER BY face_id",
+            (session_id,)
+        )
+        return {row[0]: row[1] for row in rows}
+
+    def face_frames(self, session_id, face_id):
+        """Frames où un visage apparaît
+        Returns:
+            Liste de tuples (numéro de frame, horodatage)
+        """
+        rows = self._query(
+            "SELECT frame_number, timestamp FROM detections WHERE session_id = ? AND face_id = ? "
+            "ORDER BY frame_number", (session_id, face_id)
+        )
+        return [(row[0], row[1]) for row in rows]
+
+    def attribute_counts(self, session_id, attribute, start=None, end=None):
+        """Répartition d'un attribut, éventuellement entre deux instants (inclus)
+        Args:
+            session_id: Session
+            attribute: Colonne d'attribut (ATTRIBUTE_COLUMNS)
+            start, end: Bornes optionnelles depuis le début de la session (SS, MM:SS ou HH:MM:SS)
+        Returns:
+            Dictionnaire valeur -> nombre de détections
+        """
+        if attribute not in ATTRIBUTE_COLUMNS:
+            raise ValueError(f"Attribut inconnu: {attribute}")
+        time_filter, params = self._time_filter(start, end)
+        rows = self._query(
+            f"SELECT {attribute}, COUNT(*) FROM detections WHERE session_id = ?{time_filter} "
+            f"AND {attribute} IS NOT NULL GROUP BY {attribute} ORDER BY COUNT(*) DESC",
+            (session_id, *params)
+        )
+        return {row[0]: row[1] for row in rows}
+
+    def get_detections(self, session_id, face_id=None, start=None, end=None, limit=None, offset=0):
+        """Détections d'une session au format des listes en mémoire
+        Args:
+            session_id: Session
+            face_id: Filtre sur un visage
+            start, end: Bornes optionnelles depuis le début de la session (SS, MM:SS ou HH:MM:SS)
+            limit, offset: Pagination
+        Returns:
+            Liste de dictionnaires (face_id, timestamp, elapsed_s, frame_number, bbox, attributs)
+        """
+        time_filter, params = self._time_filter(start, end)
+        sql = f"SELECT * FROM detections WHERE session_id = ?{time_filter}"
+        params = [session_id, *params]
+        if face_id:
+            sql += " AND face_id = ?"
+            params.append(face_id)
+        # Le compteur de frames temps réel repart de zéro à chaque redétection forcée
+        sql += " ORDER BY elapsed_s, frame_number, id"
+        if limit:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+
+        detections = []
+        for row in self._query(sql, params):
+            detection = {
+                'face_id': row['face_id'],
+                'timestamp': row['timestamp'],
+                'elapsed_s': row['elapsed_s'],
+                'frame_number': row['frame_number'],
+                'bbox': (row['x'], row['y'], row['w'], row['h'])
+            }
+            detection.update({column: row[column] for column in ATTRIBUTE_COLUMNS if row[column] is not None})
+            detections.append(detection)
+        return detections
+
+    def list_sessions(self):
+        rows = self._query("SELECT id, mode, source, created_at FROM sessions ORDER BY id DESC")
+        return [dict(row) for row in rows]
+
+    def delete_session(self, session_id):
+        with self._lock:
+            self._flush_locked()
+            with self._conn:
+                self._conn.execute("DELETE FROM detections WHERE session_id = ?", (session_id,))
+                self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Enregistrement et rejeu des sessions caméra du mode 2
+
+Format .frec: en-tête (signature puis métadonnées JSON sur une ligne), puis une suite
+d'enregistrements <horodatage de capture float64><taille uint32><image JPEG>.
+"""
+
+import argparse
+import json
+import os
+import queue
+import struct
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+MAGIC = b'FREC1\n'
+RECORD_HEADER = struct.Struct('<dI')
+
+
+def default_recording_path():
+    """Chemin d'un nouvel enregistrement (SESSION_RECORD_DIR, défaut dossier temporaire)"""
+    directory = os.getenv('SESSION_RECORD_DIR', os.path.join(tempfile.gettempdir(), 'face_sessions'))
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.frec")
+
+
+class SessionRecorder:
+    """Enregistre les frames capturées avec leur horodatage de capture
+
+    L'encodage JPEG et l'écriture se font sur un thread dédié: la capture n'est jamais
+    ralentie, les frames sont abandonnées (et comptées) si la file d'écriture est pleine.
+    """
+
+    def __init__(self, path=None, jpeg_quality=None, max_pending=64):
+        """Initialise l'enregistreur
+        Args:
+            path: Fichier .frec (défaut: default_recording_path())
+            jpeg_quality: Qualité JPEG (SESSION_RECORD_JPEG_QUALITY, défaut 90)
+            max_pending: Frames en attente d'écriture au-delà desquelles elles sont abandonnées
+        """
+        self.path = path or default_recording_path()
+        self.jpeg_quality = jpeg_quality or int(os.getenv('SESSION_RECORD_JPEG_QUALITY', '90'))
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.bytes_written = 0
+
+        self._file = open(self.path, 'wb')
+        self._file.write(MAGIC)
+        self._file.write(json.dumps({
+            'created_at': time.time(),
+            'jpeg_quality': self.jpeg_quality
+        }).encode('utf-8') + b'\n')
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="SessionRecorder", daemon=True)
+        self._thread.start()
+
+    def write(self, frame, captured_at):
+        """Ajoute une frame (appelé par le thread de capture, non bloquant)"""
+        try:
+            self._queue.put_nowait((frame, captured_at))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def _run(self):
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, captured_at = item
+            ok, buffer = cv2.imencode('.jpg', frame, params)
+            if not ok:
+                self.frames_dropped += 1
+                continue
+            data = buffer.tobytes()
+            self._file.write(RECORD_HEADER.pack(captured_at, len(data)))
+            self._file.write(data)
+            self.frames_written += 1
+            self.bytes_written += RECORD_HEADER.size + len(data)
+
+    def close(self):
+        """Termine l'écriture des frames en attente puis ferme le fichier"""
+        if self._file.closed:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def get_stats(self):
+        return {
+            'path': self.path,
+            'frames_written': self.frames_written,
+            'frames_dropped': self.frames_dropped,
+            'size_mb': self.bytes_written / (1024 * 1024)
+        }
+
+
+def read_recording(path):
+    """Parcourt un enregistrement
+    Args:
+        path: Fichier .frec
+    Returns:
+        Générateur de tuples (horodatage de capture, frame BGR)
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Fichier d'enregistrement invalide: {path}")
+        f.readline()
+
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+            captured_at, length = RECORD_HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                # Enregistrement interrompu en cours d'écriture
+                break
+            yield captured_at, cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+class ReplayCapture:
+    """Source rejouant un enregistrement avec l'interface des captures (read, isOpened, release)
+
+    À vitesse 1 les frames sont restituées au rythme d'origine; speed > 1 accélère le rejeu,
+    speed = 0 restitue les frames sans attente.
+    """
+
+    def __init__(self, path, speed=1.0, loop=False):
+        """Initialise le rejeu
+        Args:
+            path: Fichier .frec
+            speed: Facteur de vitesse (0 = vitesse maximale)
+            loop: Reprend au début en fin d'enregistrement
+        """
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.frames_replayed = 0
+        self.original_captured_at = None
+
+        self._frames = read_recording(path)
+        self._first_original = None
+        self._started_at = None
+        self._opened = True
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self, with_timestamp=False):
+        """Retourne la frame suivante, à l'instant prévu par la vitesse de rejeu
+        Args:
+            with_timestamp: Retourne aussi l'horodatage de capture enregistré, ramené sur l'horloge
+                du rejeu (début du rejeu + écart depuis la première frame, divisé par la vitesse):
+                les écarts entre frames sont ceux de l'enregistrement
+        Returns:
+            Tuple (succès, frame), ou (succès, frame, horodatage de capture) avec with_timestamp
+        """
+        if not self._opened:
+            return (False, None, None) if with_timestamp else (False, None)
+
+        try:
+            captured_at, frame = next(self._frames)
+        except StopIteration:
+            if not self.loop:
+                self._opened = False
+                return (False, None, None) if with_timestamp else (False, None)
+            self._frames = read_recording(self.path)
+            self._first_original = None
+            return self.read(with_timestamp)
+
+        if self._first_original is None:
+            self._first_original = captured_at
+            self._started_at = time.time()
+
+        due = self._started_at + (captured_at - self._first_original) / (self.speed if self.speed > 0 else 1.0)
+        if self.speed > 0:
+            delay = due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+        self.original_captured_at = captured_at
+        self.frames_replayed += 1
+        return (True, frame, due) if with_timestamp else (True, frame)
+
+    def set(self, prop, value):
+        pass
+
+    def release(self):
+        self._opened = False
+        self._frames.close()
+
+
+class ReplayFrameSource:
+    """Rejeu à vitesse maximale pour le worker du mode 2, sans frame abandonnée
+
+    Même interface que LatestFrameCapture, sans thread de capture ni tampon: chaque appel à
+    read_latest lit la frame suivante de l'enregistrement. Le worker reçoit toutes les frames,
+    dans l'ordre, à son propre rythme, comme dans replay_session.
+    """
+
+    def __init__(self, replay):
+        """Initialise la source
+        Args:
+            replay: ReplayCapture (vitesse 0)
+        """
+        self.replay = replay
+        self.frames_captured = 0
+        self.read_failures = 0
+        self.started_at = None
+        self._sequence = 0
+
+    def start(self):
+        self.started_at = time.time()
+        return self
+
+    def read_latest(self, timeout=None):
+        """Lit la frame suivante de l'enregistrement
+        Args:
+            timeout: Pause en fin d'enregistrement (évite une boucle active du worker)
+        Returns:
+            Tuple (succès, frame, numéro de séquence, horodatage de capture enregistré)
+        """
+        ret, frame, captured_at = self.replay.read(with_timestamp=True)
+        if not ret:
+            self.read_failures += 1
+            if timeout:
+                time.sleep(timeout)
+            return False, None, self._sequence, None
+        self._sequence += 1
+        self.frames_captured += 1
+        return True, frame, self._sequence, captured_at
+
+    def read(self):
+        ret, frame, _, _ = self.read_latest()
+        return ret, frame
+
+    def get_stats(self):
+        elapsed = time.time() - self.started_at if self.started_at else 0
+        return {
+            'frames_captured': self.frames_captured,
+            'frames_consumed': self.frames_captured,
+            'frames_dropped': 0,
+            'read_failures': self.read_failures,
+            'capture_fps': self.frames_captured / elapsed if elapsed > 0 else 0.0
+        }
+
+    def isOpened(self):
+        return self.replay.isOpened()
+
+    def set(self, prop, value):
+        pass
+
+    def release(self):
+        self.replay.release()
+
+
+def replay_session(path, speed=0.0, backend=None, detection_interval=30, flags=(True, True, True, True),
+                   max_frames=None, latency_budget_ms=None):
+    """Rejoue un enregistrement dans le pipeline du mode 2 sans interface
+    Args:
+        path: Fichier .frec
+        speed: Vitesse de rejeu (0 = chaque frame traitée dans l'ordre, sans abandon)
+        backend: Backend de détection
+        detection_interval: Intervalle de détection (frames)
+        flags: (âge, genre, émotion, ethnicité)
+        max_frames: Arrêt après ce nombre de frames traitées
+        latency_budget_ms: Budget de latence appliqué par la politique (None: sans politique)
+    Returns:
+        Dictionnaire de métriques
+    """
+    from camera_capture import LatestFrameCapture
+    from face_detector import FaceDetector
+    from latency_budget import LatencyPolicy
+    from memory_governor import MemoryGovernor, get_process_memory_mb
+    from realtime_worker import RealtimeState, RealtimeWorker
+
+    detector = FaceDetector(backend=backend)
+    detector.detection_interval = detection_interval
+    governor = MemoryGovernor()
+    state = RealtimeState()
+    policy = LatencyPolicy(state.latency, latency_budget_ms) if latency_budget_ms else None
+    replay = ReplayCapture(path, speed)
+    latencies = []
+    started = time.perf_counter()
+
+    if speed > 0:
+        # Rejeu temps réel: même chemin que la caméra (capture continue, frames abandonnées si en retard)
+        capture = LatestFrameCapture(replay).start()
+        worker = RealtimeWorker(capture, detector, state, governor=governor, policy=policy)
+        worker.update_settings(*flags, detection_interval)
+        worker.start()
+        last_frame_count = 0
+        while replay.isOpened() and (max_frames is None or worker.frame_count < max_frames):
+            time.sleep(0.05)
+            if worker.frame_count != last_frame_count and worker.last_latency is not None:
+                latencies.append(worker.last_latency)
+                last_frame_count = worker.frame_count
+        worker.stop()
+        capture_stats = capture.get_stats()
+        capture.release()
+        frames_dropped = capture_stats['frames_dropped']
+    else:
+        # Vitesse maximale: entrée identique d'un rejeu à l'autre, chaque frame est traitée
+        worker = RealtimeWorker(None, detector, state, governor=governor, policy=policy)
+        worker.update_settings(*flags, detection_interval)
+        while max_frames is None or worker.frame_count < max_frames:
+            ret, frame, captured_at = replay.read(with_timestamp=True)
+            if not ret:
+                break
+            read_at = time.time()
+            # Horodatage enregistré: latence mesurée par rapport à la chronologie de l'enregistrement
+            # (une frame lue en avance sur celle-ci ne compte qu'à partir de sa lecture)
+            worker.handle_frame(frame, captured_at)
+            latencies.append(time.time() - max(captured_at, read_at))
+        replay.release()
+        frames_dropped = 0
+
+    elapsed = time.perf_counter() - started
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'frames_replayed': replay.frames_replayed,
+        'frames_processed': worker.frame_count,
+        'frames_dropped': frames_dropped,
+        'processing_fps': worker.frame_count / elapsed if elapsed > 0 else 0.0,
+        'latency_p50_ms': float(np.percentile(latencies_ms, 50)) if len(latencies_ms) else None,
+        'latency_p95_ms': float(np.percentile(latencies_ms, 95)) if len(latencies_ms) else None,
+        'frames_dropped_policy': state.latency.counters['dropped'],
+        'annotations_skipped': state.latency.counters['annotations_skipped'],
+        'attributes_deferred': state.latency.counters['deferred'],
+        'total_detections': state.total_detections,
+        'unique_faces': state.stats.unique_count,
+        'process_memory_mb': get_process_memory_mb(),
+        'errors': state.last_error
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rejoue une session caméra enregistrée dans le pipeline du mode 2")
+    parser.add_argument('recording', help="Fichier .frec")
+    parser.add_argument('--speed', type=float, default=0.0,
+                        help="Vitesse de rejeu (1 = temps réel, 2 = accéléré, 0 = maximale sans abandon)")
+    parser.add_argument('--backend', default=None, help="Backend de détection")
+    parser.add_argument('--detection-interval', type=int, default=30, help="Intervalle de détection (frames)")
+    parser.add_argument('--max-frames', type=int, default=None, help="Frames traitées au maximum")
+    parser.add_argument('--latency-budget-ms', type=float, default=None,
+                        help="Applique la politique de latence avec ce budget (actions LIVE_LATENCY_POLICY)")
+    parser.add_argument('--json', default=None, help="Fichier JSON de sortie (comparaison entre versions)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.recording):
+        print(f"Enregistrement introuvable: {args.recording}")
+        sys.exit(1)
+
+    result = replay_session(args.recording, args.speed, args.backend, args.detection_interval,
+                            max_frames=args.max_frames, latency_budget_ms=args.latency_budget_ms)
+
+    for key, value in result.items():
+        print(f"  {key:<20} {value:.2f}" if isinstance(value, float) else f"  {key:<20} {value}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'recording': args.recording, 'speed': args.speed, **result}, f, indent=2)
+        print(f"\nRapport sauvegardé: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
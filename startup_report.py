@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Rapport de temps de démarrage (imports à froid et latence de la première frame)
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+DEFAULT_MODULES = [
+    'streamlit', 'cv2', 'numpy', 'pandas', 'deepface',
+    'face_detector', 'mode1_upload', 'mode2_realtime'
+]
+
+
+def measure_import_time(module):
+    """Mesure l'import d'un module dans un interpréteur neuf (aucun module déjà en cache)
+    Args:
+        module: Nom du module
+    Returns:
+        Durée en secondes, ou None si le module n'est pas installé
+    """
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; "
+        "print(time.perf_counter() - start)"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def measure_first_frame(backend=None, actions=None, width=640, height=480):
+    """Mesure l'initialisation du détecteur et le traitement de la première frame
+    Args:
+        backend: Backend de détection
+        actions: Actions dont les modèles sont pré-chargés (None: aucune)
+        width, height: Résolution de la frame de test
+    Returns:
+        Dictionnaire des durées en secondes
+    """
+    start = time.perf_counter()
+    from face_detector import FaceDetector
+    import_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    detector = FaceDetector(backend=backend, preload_actions=actions)
+    init_time = time.perf_counter() - start
+
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    start = time.perf_counter()
+    detections = detector.process_frame_with_tracking(frame, 0, "00:00:00")
+    detector.draw_annotations(frame, detections)
+    first_frame_time = time.perf_counter() - start
+
+    return {
+        'face_detector_import_s': import_time,
+        'detector_init_s': init_time,
+        'first_frame_s': first_frame_time,
+        'first_frame_latency_s': import_time + init_time + first_frame_time
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesure les temps de démarrage de l'application")
+    parser.add_argument('--modules', nargs='+', default=DEFAULT_MODULES, help="Modules dont l'import est mesuré")
+    parser.add_argument('--backend', default=None, help="Backend de détection pour la première frame")
+    parser.add_argument('--preload', nargs='*', default=None, choices=['age', 'gender', 'emotion', 'race'],
+                        help="Actions dont les modèles sont pré-chargés")
+    parser.add_argument('--json', default=None, help="Fichier JSON de sortie (suivi des régressions)")
+    parser.add_argument('--max-import-ms', type=float, default=None,
+                        help="Échec si l'import d'un module de l'application dépasse ce budget")
+    args = parser.parse_args()
+
+    imports = {module: measure_import_time(module) for module in args.modules}
+
+    print("Imports à froid:")
+    for module, duration in imports.items():
+        value = f"{duration * 1000:8.0f} ms" if duration is not None else "  non installé"
+        print(f"  {module:<20} {value}")
+
+    first_frame = measure_first_frame(args.backend, args.preload)
+    print("Première frame:")
+    for key, duration in first_frame.items():
+        print(f"  {key:<24} {duration * 1000:8.0f} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'timestamp': time.time(), 'imports': imports, 'first_frame': first_frame}, f, indent=2)
+        print(f"\nRapport sauvegardé: {args.json}")
+
+    if args.max_import_ms is not None:
+        app_modules = ('face_detector', 'mode1_upload', 'mode2_realtime')
+        over_budget = [
+            module for module, duration in imports.items()
+            if module in app_modules and duration is not None and duration * 1000 > args.max_import_ms
+        ]
+        if over_budget:
+            print(f"\nBudget d'import dépassé ({args.max_import_ms:.0f} ms): {', '.join(over_budget)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+import pytest
+
+from camera_capture import MJPEGStreamReader, MultipartJPEGParser
+
+
+def encode_frame(value):
+    return cv2.imencode('.jpg', np.full((48, 64, 3), value, np.uint8))[1].tobytes()
+
+
+class MJPEGHandler(BaseHTTPRequestHandler):
+    """Flux multipart JPEG type DroidCam; la connexion est coupée après frames_per_connection images"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.connections += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=--frame')
+        self.end_headers()
+        try:
+            for index in range(self.server.frames_per_connection):
+                jpeg = encode_frame(index * 10 % 256)
+                self.wfile.write(b'--frame\r\nContent-Type: image/jpeg\r\n'
+                                 + b'Content-Length: %d\r\n\r\n' % len(jpeg) + jpeg + b'\r\n')
+                self.wfile.flush()
+                time.sleep(0.01)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+@pytest.fixture
+def mjpeg_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MJPEGHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.frames_per_connection = 1000
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_reader_receives_frames(mjpeg_server):
+    reader = MJPEGStreamReader(f"http://127.0.0.1:{mjpeg_server.server_address[1]}/video")
+    reader.start()
+    try:
+        assert reader.wait_for_frame(timeout=5)
+        first_seq = reader.latest_sequence
+        assert reader.wait_for_sequence(first_seq, timeout=2) > first_seq
+
+        ret, frame = reader.read()
+        assert ret
+        assert frame.shape == (48, 64, 3)
+        assert reader.connected
+        assert 'multipart' in reader.content_type
+    finally:
+        reader.stop()
+
+
+def test_reader_reconnects_after_disconnect(mjpeg_server):
+    mjpeg_server.frames_per_connection = 5
+    reader = MJPEGStreamReader(f"http://127.0.0.1:{mjpeg_server.server_address[1]}/video",
+                               initial_backoff=0.05, max_backoff=0.1)
+    reader.start()
+    try:
+        deadline = time.time() + 5
+        while mjpeg_server.connections < 3 and time.time() < deadline:
+            time.sleep(0.05)
+        assert mjpeg_server.connections >= 3
+        assert reader.reconnects >= 2
+        assert reader.frames_received >= 1
+    finally:
+        reader.stop()
+
+
+def test_parser_handles_split_chunks():
+    jpeg = encode_frame(128)
+    stream = b''.join(b'--b\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n' for _ in range(5))
+    parser = MultipartJPEGParser('--b')
+    frames = []
+    for start in range(0, len(stream), 7):
+        frames += parser.feed(stream[start:start + 7])
+    assert len(frames) >= 4
+    assert all(frame == jpeg for frame in frames)
@@ -0,0 +1,95 @@
+import json
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+import checkpoint as checkpoint_module
+from checkpoint import AnalysisCheckpoint, json_default
+from face_detector import FaceDetector
+from video_analysis import analyze_video
+
+
+def detection(frame_number):
+    return {'face_id': 'face_0001', 'frame_number': frame_number, 'timestamp': '00:00:00',
+            'bbox': (np.int32(10), 10, 50, 50), 'emotion': 'Happy'}
+
+
+def test_round_trip_restores_tuples_and_numpy_values(tmp_path):
+    checkpoint = AnalysisCheckpoint('job', base_dir=str(tmp_path))
+    checkpoint.save({'frame_offset': 30, 'detections_count': 2, 'embedding': np.ones(3, np.float32)},
+                    [detection(0), detection(10)])
+
+    state, detections = checkpoint.load()
+    assert state['frame_offset'] == 30
+    assert state['embedding'] == [1.0, 1.0, 1.0]
+    assert [d['frame_number'] for d in detections] == [0, 10]
+    assert detections[0]['bbox'] == (10, 10, 50, 50)
+
+
+def test_lines_beyond_saved_state_are_truncated(tmp_path):
+    checkpoint = AnalysisCheckpoint('job', base_dir=str(tmp_path))
+    checkpoint.save({'frame_offset': 20, 'detections_count': 2}, [detection(0), detection(10)])
+    valid_size = os.path.getsize(checkpoint.detections_path)
+
+    # Arrêt brutal pendant la sauvegarde suivante: une ligne complète puis une ligne coupée,
+    # l'état n'a pas été remplacé
+    with open(checkpoint.detections_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(detection(20), default=json_default) + '\n')
+        f.write('{"face_id": "face_0')
+
+    state, detections = checkpoint.load()
+    assert state['detections_count'] == 2
+    assert [d['frame_number'] for d in detections] == [0, 10]
+    assert os.path.getsize(checkpoint.detections_path) == valid_size
+
+
+def test_interrupted_state_write_keeps_previous_checkpoint(tmp_path, monkeypatch):
+    checkpoint = AnalysisCheckpoint('job', base_dir=str(tmp_path))
+    checkpoint.save({'frame_offset': 20, 'detections_count': 1}, [detection(0)])
+
+    def interrupted_dump(state, f, **kwargs):
+        f.write('{"frame_offset": 40, "detec')
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(checkpoint_module.json, 'dump', interrupted_dump)
+    with pytest.raises(KeyboardInterrupt):
+        checkpoint.save({'frame_offset': 40, 'detections_count': 2}, [detection(20)])
+    monkeypatch.undo()
+
+    state, detections = checkpoint.load()
+    assert state['frame_offset'] == 20
+    assert [d['frame_number'] for d in detections] == [0]
+
+
+def write_video(path, frames=60, size=(160, 120)):
+    out = cv2.VideoWriter(path, cv2.VideoWriter.fourcc(*'mp4v'), 30, size)
+    for index in range(frames):
+        out.write(np.full((size[1], size[0], 3), index * 4 % 256, np.uint8))
+    out.release()
+
+
+def test_analysis_resumes_from_saved_frame(tmp_path):
+    video_path = str(tmp_path / 'clip.mp4')
+    write_video(video_path)
+    checkpoint = AnalysisCheckpoint('job', base_dir=str(tmp_path / 'checkpoints'), interval_frames=20)
+
+    def interrupt(frame_count, total_frames):
+        if frame_count == 30:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        analyze_video(video_path, FaceDetector(backend='haar'), checkpoint=checkpoint,
+                      progress_callback=interrupt, render=False)
+    assert checkpoint.load()[0]['frame_offset'] == 20
+
+    resumed_frames = []
+    results = analyze_video(video_path, FaceDetector(backend='haar'), checkpoint=checkpoint,
+                            progress_callback=lambda frame_count, total: resumed_frames.append(frame_count),
+                            render=False)
+
+    assert results['resumed_from'] == 20
+    assert resumed_frames[0] == 21
+    assert results['analyzed_frames'] == 60
+    assert not checkpoint.exists()
@@ -0,0 +1,96 @@
+import numpy as np
+
+from face_detector import FaceDetector
+from face_gallery import FaceGallery, ThumbnailEmbedder, get_reid_settings, reid_enabled
+from validate_reid import evaluate_threshold, pair_similarities, suggest_threshold
+
+
+def unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_reid_disabled_by_default(monkeypatch):
+    monkeypatch.delenv('FACE_REID_ENABLED', raising=False)
+    assert not reid_enabled()
+    assert get_reid_settings() is None
+
+
+def test_settings_read_without_gallery(monkeypatch):
+    monkeypatch.setenv('FACE_REID_ENABLED', 'true')
+    monkeypatch.setenv('FACE_REID_EMBEDDER', ThumbnailEmbedder.name)
+    monkeypatch.setenv('FACE_REID_GALLERY_SIZE', '1000000000')
+    monkeypatch.delenv('FACE_REID_THRESHOLD', raising=False)
+    settings = get_reid_settings()
+    assert settings == {'embedder': 'thumbnail', 'max_size': 1000000000, 'ttl_frames': 1800,
+                        'refresh_frames': 30, 'threshold': 0.85}
+
+
+def test_explicit_zero_threshold_is_kept():
+    gallery = FaceGallery(max_size=4, ttl_frames=100, threshold=0.0, embedder=ThumbnailEmbedder())
+    assert gallery.threshold == 0.0
+
+    gallery.add('face_0001', unit([1, 0, 0]), {'attributes': {}}, frame_number=10)
+    assert gallery.match(unit([0.1, 1, 0]), frame_number=20)[0] == 'face_0001'
+
+
+def test_gallery_dimension_follows_embedder():
+    gallery = FaceGallery(max_size=4, ttl_frames=100, threshold=0.9, embedder=ThumbnailEmbedder())
+    assert gallery._embeddings is None
+    assert gallery.match(unit(np.ones(512)), frame_number=0) is None
+
+    gallery.add('face_0001', unit(np.arange(512) + 1), {'attributes': {}}, frame_number=10)
+    assert gallery._embeddings.shape == (4, 512)
+
+    restored = FaceGallery(max_size=4, ttl_frames=100, threshold=0.9, embedder=ThumbnailEmbedder())
+    restored.load_state(gallery.get_state())
+    assert restored.match(unit(np.arange(512) + 1), frame_number=20)[0] == 'face_0001'
+
+
+def test_threshold_rates_on_labelled_pairs():
+    embeddings = np.stack([unit([1, 0.1, 0]), unit([1, 0.2, 0]), unit([0, 1, 0.1]), unit([0.7, 0.7, 0])])
+    labels = np.array(['a', 'a', 'b', 'c'])
+
+    same, different = pair_similarities(embeddings, labels)
+    assert len(same) == 1 and len(different) == 5
+
+    rates = evaluate_threshold(same, different, 0.5)
+    assert rates['missed_reid_rate'] == 0.0
+    assert rates['false_merge_rate'] == 0.6
+
+    threshold = suggest_threshold(different, 0.0)
+    assert evaluate_threshold(same, different, threshold)['false_merge_rate'] == 0.0
+    assert threshold > different.max()
+
+
+class CountingEmbedder(ThumbnailEmbedder):
+    """Vignette comptant les inférences (lots de nouveaux visages, rafraîchissements)"""
+
+    def __init__(self):
+        self.batches = []
+        self.single = 0
+
+    def embed(self, image, bbox):
+        self.single += 1
+        return super().embed(image, bbox)
+
+    def embed_boxes(self, image, bboxes):
+        self.batches.append(len(bboxes))
+        return super().embed_boxes(image, bboxes)
+
+
+def test_tracker_batches_new_faces_and_throttles_refresh():
+    embedder = CountingEmbedder()
+    detector = FaceDetector(backend='haar')
+    detector.defer_analysis = True
+    detector.reid_gallery = FaceGallery(max_size=4, ttl_frames=100, threshold=0.9, embedder=embedder,
+                                        refresh_frames=30)
+    image = (np.random.RandomState(0).rand(240, 320, 3) * 255).astype(np.uint8)
+    faces = [(10, 10, 60, 60), (200, 100, 60, 60)]
+
+    for frame_number in range(0, 60, 5):
+        detector.process_frame_with_tracking(image, frame_number, "00:00:00", faces=faces)
+
+    assert embedder.batches == [2]
+    # Un seul rafraîchissement par track (frame 30) sur 12 frames de détection
+    assert embedder.single == 2
@@ -0,0 +1,61 @@
+import queue
+import time
+
+import numpy as np
+import pytest
+
+from frame_ring import SharedFrameRing, SharedMemoryDetectionPool
+
+FRAME_SHAPE = (48, 64, 3)
+
+
+def make_frame(value):
+    return np.full(FRAME_SHAPE, value, np.uint8)
+
+
+def test_out_of_order_release_never_overwrites_frame_in_flight():
+    pool = SharedMemoryDetectionPool(FRAME_SHAPE, num_processes=1, slots=3)
+    pool.ring = SharedFrameRing(FRAME_SHAPE, pool.slots)
+    try:
+        for value in (1, 2, 3):
+            assert pool.submit(make_frame(value), time.time()) == value
+        assert pool.submit(make_frame(9), time.time()) is None
+
+        # Résultat de la séquence 2 arrivé avant celui de la séquence 1
+        pool.release(2)
+        assert pool.submit(make_frame(4), time.time()) == 4
+
+        for seq in (1, 3, 4):
+            frame = pool.frame(seq)
+            assert frame is not None
+            assert frame[0, 0, 0] == seq
+        assert pool.frame(2) is None
+        assert pool.frames_dropped == 1
+    finally:
+        pool.stop()
+
+
+def test_detection_processes_return_results():
+    pool = SharedMemoryDetectionPool(FRAME_SHAPE, num_processes=1, slots=2, backend='haar').start()
+    try:
+        seq = pool.submit(make_frame(0), 123.0)
+        results = []
+        deadline = time.time() + 30
+        while not results and time.time() < deadline:
+            results = pool.poll(timeout=0.5)
+        assert results == [(seq, 123.0, [])]
+        pool.release(seq)
+        assert pool.get_stats()['in_flight'] == 0
+    finally:
+        pool.stop()
+
+
+def test_failed_start_stops_processes_and_unlinks_ring():
+    pool = SharedMemoryDetectionPool(FRAME_SHAPE, num_processes=1, backend='haar')
+
+    # Processus pas encore prêt à l'échéance
+    with pytest.raises(queue.Empty):
+        pool.start(timeout=0.01)
+
+    assert pool.ring is None
+    assert pool._processes == []
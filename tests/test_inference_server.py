@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+from face_detector import FaceDetector
+from inference_server import DynamicBatcher, create_server
+
+
+class StubAnalyzer:
+    """Analyseur factice: échoue sur les visages blancs, comme DeepFace sur une entrée invalide"""
+
+    name = 'stub'
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.release = threading.Event()
+        self.release.set()
+        self.entered = threading.Event()
+
+    def analyze(self, face_image, actions):
+        if face_image.mean() > 200:
+            raise ValueError("visage invalide")
+        return {'age': 35.0, 'emotion': {'happy': 90.0, 'neutral': 10.0}}
+
+    def analyze_batch(self, face_images, actions):
+        self.entered.set()
+        self.release.wait(5)
+        self.batch_sizes.append(len(face_images))
+        # Inférence groupée: une entrée invalide fait échouer tout le lot
+        return [self.analyze(face_image, actions) for face_image in face_images]
+
+
+def encode(value):
+    return cv2.imencode('.jpg', np.full((64, 64, 3), value, np.uint8))[1].tobytes()
+
+
+def post(port, body):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/analyze?gender=0&ethnicity=0",
+                                     data=body, method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.fixture
+def service():
+    detector = FaceDetector(backend='haar')
+    detector.attribute_analyzer = StubAnalyzer()
+    started = []
+
+    def start(**batcher_options):
+        batcher = DynamicBatcher(detector, **batcher_options)
+        server = create_server(detector, '127.0.0.1', 0, batcher)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        started.append((server, batcher))
+        return server.server_address[1], batcher, detector.attribute_analyzer
+
+    yield start
+    for server, batcher in started:
+        batcher.stop()
+        server.shutdown()
+        server.server_close()
+
+
+def test_concurrent_requests_are_batched(service):
+    port, batcher, analyzer = service(max_batch_size=8, max_latency_ms=200)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(lambda _: post(port, encode(100)), range(4)))
+
+    assert [status for status, _ in responses] == [200] * 4
+    assert all(payload['faces'][0]['emotion'] == 'Happy' for _, payload in responses)
+    assert max(analyzer.batch_sizes) > 1
+    assert batcher.get_stats()['avg_batch_size'] > 1
+
+
+def test_failing_face_only_degrades_its_own_request(service):
+    port, batcher, analyzer = service(max_batch_size=8, max_latency_ms=200)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(lambda value: post(port, encode(value)), [100, 255, 100, 100]))
+
+    assert [status for status, _ in responses] == [200] * 4
+    assert max(analyzer.batch_sizes) > 1
+    faces = [payload['faces'][0] for _, payload in responses]
+    assert 'age_estimation' not in faces[1]
+    assert all('age_estimation' in face for index, face in enumerate(faces) if index != 1)
+    assert batcher.get_stats()['failed'] == 0
+
+
+def test_full_queue_is_shed_with_503(service):
+    port, batcher, analyzer = service(max_batch_size=1, max_latency_ms=1, max_queue=1)
+    analyzer.release.clear()
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        # Première requête en cours d'inférence (analyseur bloqué), la deuxième occupe la file
+        in_progress = pool.submit(post, port, encode(100))
+        assert analyzer.entered.wait(5)
+        queued = pool.submit(post, port, encode(100))
+        deadline = time.time() + 5
+        while batcher.queue.qsize() < 1 and time.time() < deadline:
+            time.sleep(0.01)
+
+        status, payload = post(port, encode(100))
+        analyzer.release.set()
+
+        assert status == 503
+        assert in_progress.result()[0] == 200
+        assert queued.result()[0] == 200
+
+    assert batcher.get_stats()['rejected'] == 1
+
+
+def test_stats_endpoint(service):
+    port, batcher, analyzer = service()
+    post(port, encode(100))
+
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats", timeout=5) as response:
+        stats = json.loads(response.read())
+
+    assert stats['requests'] == 1
+    assert stats['completed'] == 1
+    assert stats['batches'] == 1
+    assert stats['latency_p50_ms'] is not None
@@ -0,0 +1,64 @@
+import pytest
+
+from latency_budget import POLICY_ACTIONS, LatencyMonitor, LatencyPolicy
+
+# Moyennes de référence (secondes): 50 ms de tracking, 20 ms d'annotation, 30 ms d'affichage
+TIMINGS = {'tracking': 0.05, 'tracking_deferred': 0.01, 'annotation': 0.02, 'display': 0.03}
+
+
+def make_policy(actions=POLICY_ACTIONS, timings=TIMINGS, budget_ms=200, max_consecutive_drops=5):
+    monitor = LatencyMonitor()
+    for stage, seconds in timings.items():
+        monitor.record(stage, seconds)
+    return LatencyPolicy(monitor, budget_ms, list(actions), max_consecutive_drops), monitor
+
+
+@pytest.mark.parametrize('age, actions, expected', [
+    # Dans le budget: aucune action
+    (0.05, POLICY_ACTIONS, {'drop': False, 'defer_attributes': False, 'skip_annotations': False}),
+    # Affichage hors budget quoi qu'on fasse: frame abandonnée
+    (0.18, POLICY_ACTIONS, {'drop': True, 'defer_attributes': False, 'skip_annotations': False}),
+    # Traitement complet hors budget, analyse différée suffisante (0.11 + 0.01 + 0.02 + 0.03)
+    (0.11, POLICY_ACTIONS, {'drop': False, 'defer_attributes': True, 'skip_annotations': False}),
+    # Même en différant, annotations hors budget (0.15 + 0.01 + 0.02 + 0.03)
+    (0.15, POLICY_ACTIONS, {'drop': False, 'defer_attributes': True, 'skip_annotations': True}),
+    # Abandon non autorisé: les autres actions s'appliquent
+    (0.18, ('defer_attributes', 'skip_annotations'),
+     {'drop': False, 'defer_attributes': True, 'skip_annotations': True}),
+    # Report non autorisé: le tracking complet compte pour les annotations
+    (0.11, ('drop_frames', 'skip_annotations'),
+     {'drop': False, 'defer_attributes': False, 'skip_annotations': True}),
+    # Aucune action autorisée
+    (0.5, (), {'drop': False, 'defer_attributes': False, 'skip_annotations': False}),
+])
+def test_decision(age, actions, expected):
+    policy, _ = make_policy(actions)
+    assert policy.decide(age) == expected
+
+
+def test_decisions_are_counted():
+    policy, monitor = make_policy()
+    policy.decide(0.18)
+    policy.decide(0.15)
+    policy.decide(0.11)
+
+    assert monitor.counters['dropped'] == 1
+    assert monitor.counters['deferred'] == 2
+    assert monitor.counters['annotations_skipped'] == 1
+
+
+def test_consecutive_drops_are_capped():
+    policy, monitor = make_policy(max_consecutive_drops=3)
+
+    drops = [policy.decide(1.0)['drop'] for _ in range(8)]
+
+    # Une frame sur quatre est traitée pour que l'affichage reste vivant
+    assert drops == [True, True, True, False, True, True, True, False]
+    assert monitor.counters['dropped'] == 6
+
+
+def test_processed_frame_resets_drop_streak():
+    policy, _ = make_policy(max_consecutive_drops=2)
+
+    assert [policy.decide(age)['drop'] for age in (1.0, 1.0, 0.05, 1.0, 1.0, 1.0)] == \
+        [True, True, False, True, True, False]
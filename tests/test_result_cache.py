@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+
+import result_cache as result_cache_module
+from result_cache import ResultCache
+
+
+def results(size=0):
+    return {
+        'detections': [{'face_id': 'face_0001', 'frame_number': 0, 'bbox': (np.int64(1), 2, 3, 4)}],
+        'total_frames': 10,
+        'padding': 'x' * size
+    }
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+def test_round_trip_copies_video_out_of_cache(tmp_path):
+    video_path = tmp_path / 'video.mp4'
+    video_path.write_bytes(b'mp4')
+    cache = ResultCache(base_dir=str(tmp_path / 'cache'))
+
+    cache.put('key', results(), str(video_path))
+    cached = cache.get('key')
+
+    assert cached['detections'][0]['bbox'] == (1, 2, 3, 4)
+    assert cached['total_frames'] == 10
+    assert not cached['output_video_path'].startswith(str(tmp_path / 'cache'))
+    with open(cached['output_video_path'], 'rb') as f:
+        assert f.read() == b'mp4'
+    os.unlink(cached['output_video_path'])
+    assert cache.get_stats()['hits'] == 1
+
+
+def test_expired_entry_is_removed(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache_module, 'time', clock)
+    cache = ResultCache(base_dir=str(tmp_path), ttl_seconds=60)
+
+    cache.put('key', results())
+    clock.now += 30
+    assert cache.get('key') is not None
+
+    clock.now += 61
+    assert cache.get('key') is None
+    assert not os.path.exists(os.path.join(str(tmp_path), 'key'))
+    assert cache.get_stats()['misses'] == 1
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache_module, 'time', clock)
+    cache = ResultCache(base_dir=str(tmp_path), max_bytes=2500)
+
+    cache.put('a', results(1000))
+    clock.now += 1
+    cache.put('b', results(1000))
+    clock.now += 1
+    assert cache.get('a') is not None
+    clock.now += 1
+    cache.put('c', results(1000))
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_corrupted_entry_is_a_miss(tmp_path):
+    cache = ResultCache(base_dir=str(tmp_path))
+    cache.put('key', results())
+    with open(os.path.join(str(tmp_path), 'key', 'results.json'), 'w', encoding='utf-8') as f:
+        f.write('{"detections": [')
+
+    assert cache.get('key') is None
+    assert not os.path.exists(os.path.join(str(tmp_path), 'key'))
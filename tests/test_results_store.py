@@ -0,0 +1,33 @@
+from results_store import ResultsStore
+
+
+def detection(frame_number, timestamp, emotion):
+    return {'face_id': 'face_0001', 'frame_number': frame_number, 'timestamp': timestamp,
+            'bbox': (10, 10, 50, 50), 'emotion': emotion}
+
+
+def test_realtime_session_crossing_midnight(tmp_path):
+    store = ResultsStore(str(tmp_path / 'results.sqlite3'))
+    session_id = store.create_session('realtime', 'camera')
+    origin = store._session_origins[session_id]
+
+    # Démarrage à 23:59:50: les horodatages muraux repassent par 00:00:xx
+    store.add_detections(session_id, [detection(0, '23:59:55', 'happy')], origin + 5)
+    store.add_detections(session_id, [detection(1, '00:00:05', 'sad')], origin + 15.5)
+    store.add_detections(session_id, [detection(2, '00:00:25', 'neutral')], origin + 35)
+
+    assert store.attribute_counts(session_id, 'emotion', '00:10', '00:20') == {'sad': 1}
+    assert store.attribute_counts(session_id, 'emotion', None, '00:15') == {'happy': 1, 'sad': 1}
+    assert [d['timestamp'] for d in store.get_detections(session_id)] == ['23:59:55', '00:00:05', '00:00:25']
+    store.close()
+
+
+def test_upload_session_filters_on_video_position(tmp_path):
+    store = ResultsStore(str(tmp_path / 'results.sqlite3'))
+    session_id = store.create_session('upload', 'video.mp4')
+    store.add_detections(session_id, [detection(300, '00:00:10', 'happy'), detection(900, '00:00:30', 'sad')])
+
+    assert store.attribute_counts(session_id, 'emotion', '10', '20') == {'happy': 1}
+    assert store.get_detections(session_id)[1]['elapsed_s'] == 30
+    store.close()
+
@@ -0,0 +1,36 @@
+import time
+
+import numpy as np
+
+from face_detector import FaceDetector
+from realtime_worker import RealtimeState, RealtimeWorker
+from session_recorder import ReplayCapture, ReplayFrameSource, SessionRecorder
+
+
+def record(path, frames=20, interval=0.5):
+    recorder = SessionRecorder(str(path))
+    for index in range(frames):
+        recorder.write(np.full((60, 80, 3), index * 10, np.uint8), 1_600_000_000.0 + index * interval)
+    recorder.close()
+    return str(path)
+
+
+def test_replay_keeps_recorded_frame_spacing(tmp_path):
+    replay = ReplayCapture(record(tmp_path / 'session.frec'), speed=0)
+    timestamps = [replay.read(with_timestamp=True)[2] for _ in range(4)]
+
+    assert np.allclose(np.diff(timestamps), 0.5)
+    assert replay.read()[0]
+
+
+def test_max_speed_source_feeds_every_frame_to_the_worker(tmp_path):
+    source = ReplayFrameSource(ReplayCapture(record(tmp_path / 'session.frec'), speed=0)).start()
+    worker = RealtimeWorker(source, FaceDetector(backend='haar'), RealtimeState()).start()
+
+    deadline = time.time() + 10
+    while worker.frame_count < 20 and time.time() < deadline:
+        time.sleep(0.05)
+    worker.stop()
+
+    assert worker.frame_count == 20
+    assert source.get_stats()['frames_dropped'] == 0
@@ -0,0 +1,140 @@
+import os
+import sys
+
+import cv2
+
+# Bibliothèques de calcul lisant leur nombre de threads dans l'environnement à leur chargement
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+_settings = {}
+
+
+class ThreadBudget:
+    """Budget de threads CPU partagé entre OpenCV, TensorFlow, ONNX Runtime et les pools de workers
+
+    Le budget total est réparti entre les analyses lancées en parallèle (jobs), puis entre les
+    processus d'un job: chaque processus configure ses bibliothèques avec sa part, au lieu de
+    supposer que toute la machine lui est réservée.
+    """
+
+    def __init__(self, total=None, jobs=None):
+        """Initialise le budget
+        Args:
+            total: Threads CPU disponibles (CPU_THREAD_BUDGET, défaut nombre de cœurs)
+            jobs: Analyses simultanées se partageant le budget (CPU_CONCURRENT_JOBS, défaut 1)
+        """
+        self.total = total or int(os.getenv('CPU_THREAD_BUDGET', str(os.cpu_count() or 1)))
+        self.jobs = jobs or int(os.getenv('CPU_CONCURRENT_JOBS', '1'))
+
+    @property
+    def per_job(self):
+        """Threads d'une analyse"""
+        return max(1, self.total // self.jobs)
+
+    def threads_per_worker(self, workers=1):
+        """Threads de calcul de chaque worker (processus ou thread) d'un job réparti sur plusieurs workers"""
+        return max(1, self.per_job // max(1, workers))
+
+    def pool_size(self, requested=None):
+        """Taille d'un pool de workers mono-thread, bornée par la part du job
+        Args:
+            requested: Taille demandée (None: toute la part du job)
+        """
+        return max(1, min(requested or self.per_job, self.per_job))
+
+    def describe(self):
+        return f"{self.total} thread(s), {self.jobs} analyse(s) simultanée(s), {self.per_job} par analyse"
+
+
+def apply_thread_settings(threads, inter_op_threads=1):
+    """Configure les bibliothèques de calcul du processus courant
+    Args:
+        threads: Threads de calcul du processus (OpenCV, TensorFlow intra-op, ONNX Runtime intra-op)
+        inter_op_threads: Opérations indépendantes exécutées en parallèle (TensorFlow, ONNX Runtime)
+    Returns:
+        Réglages effectifs (effective_thread_settings)
+    """
+    threads = max(1, int(threads))
+    _settings.update({'threads': threads, 'inter_op_threads': inter_op_threads})
+
+    cv2.setNumThreads(threads)
+
+    # Lues au chargement des bibliothèques: TensorFlow et les BLAS ne sont importés qu'au premier usage
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = str(inter_op_threads)
+
+    if 'tensorflow' in sys.modules:
+        tf = sys.modules['tensorflow']
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(threads)
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+        except (RuntimeError, AttributeError) as e:
+            # Le runtime TensorFlow ne se reconfigure pas une fois initialisé
+            _settings['tensorflow_error'] = str(e)
+
+    return effective_thread_settings()
+
+
+def configure_process_threads(workers=1, budget=None):
+    """Applique au processus courant sa part du budget, une seule fois par processus
+    Args:
+        workers: Workers du job se partageant le budget (ce processus en est un)
+        budget: ThreadBudget (défaut: variables d'environnement)
+    Returns:
+        Réglages effectifs
+    """
+    if _settings:
+        return effective_thread_settings()
+    budget = budget or ThreadBudget()
+    return apply_thread_settings(budget.threads_per_worker(workers))
+
+
+def get_onnx_session_options():
+    """Options de session ONNX Runtime conformes aux réglages du processus (None sans réglage)"""
+    if not _settings:
+        return None
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = _settings['threads']
+    options.inter_op_num_threads = _settings['inter_op_threads']
+    return options
+
+
+def effective_thread_settings():
+    """Réglages réellement en vigueur dans le processus
+    Returns:
+        Dictionnaire (threads demandés, OpenCV, TensorFlow, ONNX Runtime, variables d'environnement)
+    """
+    report = {
+        'requested_threads': _settings.get('threads'),
+        'opencv_threads': cv2.getNumThreads(),
+        'tensorflow': "non chargé",
+        'onnxruntime_intra_op': _settings.get('threads', "défaut"),
+        'onnxruntime_inter_op': _settings.get('inter_op_threads', "défaut"),
+        'environment': {name: os.environ.get(name) for name in THREAD_ENV_VARS + ('TF_NUM_INTRAOP_THREADS',
+                                                                               'TF_NUM_INTEROP_THREADS')}
+    }
+
+    if 'tensorflow' in sys.modules:
+        threading = sys.modules['tensorflow'].config.threading
+        report['tensorflow'] = {
+            'intra_op': threading.get_intra_op_parallelism_threads(),
+            'inter_op': threading.get_inter_op_parallelism_threads()
+        }
+        if 'tensorflow_error' in _settings:
+            report['tensorflow']['error'] = _settings['tensorflow_error']
+    return report
+
+
+def format_thread_settings(report):
+    """Résumé d'une ligne des réglages effectifs (console)"""
+    tensorflow = report['tensorflow']
+    if isinstance(tensorflow, dict):
+        tensorflow = f"{tensorflow['intra_op']} intra / {tensorflow['inter_op']} inter (0 = auto)"
+    return (
+        f"Threads CPU: OpenCV {report['opencv_threads']}, TensorFlow {tensorflow}, "
+        f"ONNX Runtime {report['onnxruntime_intra_op']} intra / {report['onnxruntime_inter_op']} inter"
+    )
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Validation de l'analyseur ONNX face au chemin DeepFace (concordance des attributs et accélération)
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+from attribute_analyzers import DeepFaceAnalyzer, ONNXAttributeAnalyzer, get_actions, map_analysis_result
+from detector_backends import create_detector_backend
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+ATTRIBUTES = ('age_estimation', 'gender_classification', 'emotion', 'ethnicity_estimation')
+
+
+def load_faces(image_dir, detector_backend=None, max_faces=None):
+    """Extrait les visages des images d'un dossier
+    Args:
+        image_dir: Dossier d'images
+        detector_backend: Backend de détection (sans visage détecté, l'image entière est utilisée)
+        max_faces: Nombre maximal de visages
+    Returns:
+        Liste de visages BGR 224x224
+    """
+    backend = create_detector_backend(detector_backend)
+    faces = []
+
+    for filename in sorted(os.listdir(image_dir)):
+        if not filename.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        image = cv2.imread(os.path.join(image_dir, filename))
+        if image is None:
+            continue
+
+        boxes = backend.detect(image) or [(0, 0, image.shape[1], image.shape[0])]
+        for x, y, w, h in boxes:
+            faces.append(cv2.resize(image[y:y+h, x:x+w], (224, 224)))
+            if max_faces and len(faces) >= max_faces:
+                return faces
+    return faces
+
+
+def run_analyzer(analyzer, faces, actions):
+    """Analyse tous les visages
+    Returns:
+        Tuple (sorties brutes, temps moyen par visage en ms)
+    """
+    analyzer.warmup(actions)
+    results = []
+    start = time.perf_counter()
+    for face in faces:
+        results.append(analyzer.analyze(face, actions))
+    elapsed = time.perf_counter() - start
+    return results, elapsed * 1000 / max(len(faces), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare l'analyseur ONNX à DeepFace sur un dossier d'images")
+    parser.add_argument('image_dir', help="Dossier d'images de visages")
+    parser.add_argument('--quantized', action='store_true', help="Valide les modèles int8")
+    parser.add_argument('--model-dir', default=None, help="Dossier des modèles ONNX")
+    parser.add_argument('--detector', default='haar', help="Backend de détection des visages")
+    parser.add_argument('--max-faces', type=int, default=None)
+    args = parser.parse_args()
+
+    onnx_analyzer = ONNXAttributeAnalyzer(args.model_dir, args.quantized)
+    if not ONNXAttributeAnalyzer.is_available(onnx_analyzer.model_dir, args.quantized):
+        print(f"onnxruntime ou modèles ONNX introuvables dans {onnx_analyzer.model_dir}")
+        print("Exportez-les avec: python export_attribute_models.py --quantize")
+        sys.exit(1)
+
+    faces = load_faces(args.image_dir, args.detector, args.max_faces)
+    if not faces:
+        print(f"Aucune image dans {args.image_dir}")
+        sys.exit(1)
+
+    actions = get_actions()
+    reference, reference_ms = run_analyzer(DeepFaceAnalyzer(), faces, actions)
+    candidate, candidate_ms = run_analyzer(onnx_analyzer, faces, actions)
+
+    agreements = {attribute: 0 for attribute in ATTRIBUTES}
+    age_errors = []
+    for expected_raw, actual_raw in zip(reference, candidate):
+        expected = map_analysis_result(expected_raw)
+        actual = map_analysis_result(actual_raw)
+        for attribute in ATTRIBUTES:
+            if expected.get(attribute) == actual.get(attribute):
+                agreements[attribute] += 1
+        age_errors.append(abs(float(expected_raw['age']) - float(actual_raw['age'])))
+
+    label = "ONNX int8" if args.quantized else "ONNX"
+    print(f"Visages évalués: {len(faces)}")
+    print(f"DeepFace: {reference_ms:.1f} ms/visage")
+    print(f"{label}: {candidate_ms:.1f} ms/visage (accélération x{reference_ms / candidate_ms:.2f})")
+    print("Concordance des attributs:")
+    for attribute, count in agreements.items():
+        print(f"  {attribute:<24} {count / len(faces) * 100:6.1f} %")
+    print(f"  Écart moyen d'âge         {sum(age_errors) / len(age_errors):6.2f} ans")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Validation du seuil de ré-identification sur des visages étiquetés
+
+Le dossier contient un sous-dossier par personne. Toutes les paires de visages sont comparées
+(similarité cosinus, un seul produit matriciel): une paire de personnes différentes au-dessus du
+seuil est une fusion d'identités, une paire de la même personne en dessous est une
+ré-identification manquée.
+"""
+
+import argparse
+import os
+import sys
+
+import cv2
+import numpy as np
+
+from detector_backends import create_detector_backend
+from face_gallery import ONNXFaceEmbedder, ThumbnailEmbedder, get_reid_model_path
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def load_labelled_embeddings(image_dir, embedder, detector_backend=None):
+    """Descripteurs des visages d'un dossier étiqueté
+    Args:
+        image_dir: Dossier contenant un sous-dossier d'images par personne
+        embedder: Descripteur de ré-identification (méthode embed)
+        detector_backend: Backend de détection (sans visage détecté, l'image entière est utilisée)
+    Returns:
+        Tuple (matrice des descripteurs, étiquettes)
+    """
+    backend = create_detector_backend(detector_backend)
+    embeddings, labels = [], []
+
+    for identity in sorted(os.listdir(image_dir)):
+        identity_dir = os.path.join(image_dir, identity)
+        if not os.path.isdir(identity_dir):
+            continue
+        for filename in sorted(os.listdir(identity_dir)):
+            if not filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            image = cv2.imread(os.path.join(identity_dir, filename))
+            if image is None:
+                continue
+            boxes = backend.detect(image) or [(0, 0, image.shape[1], image.shape[0])]
+            # Plus grand visage: les images étiquetées ne montrent qu'une personne
+            embedding = embedder.embed(image, max(boxes, key=lambda box: box[2] * box[3]))
+            if embedding is not None:
+                embeddings.append(embedding)
+                labels.append(identity)
+
+    return np.array(embeddings, dtype=np.float32), np.array(labels)
+
+
+def pair_similarities(embeddings, labels):
+    """Similarités cosinus de toutes les paires distinctes
+    Returns:
+        Tuple (similarités même personne, similarités personnes différentes)
+    """
+    similarities = embeddings @ embeddings.T
+    rows, cols = np.triu_indices(len(labels), k=1)
+    same = labels[rows] == labels[cols]
+    pairs = similarities[rows, cols]
+    return pairs[same], pairs[~same]
+
+
+def evaluate_threshold(same, different, threshold):
+    """Taux d'erreur d'un seuil
+    Returns:
+        Dictionnaire (taux de fusion d'identités, taux de ré-identification manquée)
+    """
+    return {
+        'false_merge_rate': float(np.mean(different >= threshold)) if len(different) else 0.0,
+        'missed_reid_rate': float(np.mean(same < threshold)) if len(same) else 0.0
+    }
+
+
+def suggest_threshold(different, max_false_merge_rate):
+    """Plus petit seuil dont le taux de fusion d'identités reste sous la cible"""
+    if not len(different):
+        return None
+    ordered = np.sort(different)[::-1]
+    # Au plus `allowed` paires différentes peuvent atteindre le seuil
+    allowed = int(np.floor(max_false_merge_rate * len(ordered)))
+    return float(np.nextafter(ordered[allowed], np.inf)) if allowed < len(ordered) else float(ordered[-1])
+
+
+def describe(values):
+    if not len(values):
+        return "aucune paire"
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return f"{len(values)} paires, p5 {p5:.3f}, médiane {p50:.3f}, p95 {p95:.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Valide le seuil de ré-identification sur des visages étiquetés")
+    parser.add_argument('image_dir', help="Dossier avec un sous-dossier d'images par personne")
+    parser.add_argument('--embedder', default=ONNXFaceEmbedder.name,
+                        choices=[ONNXFaceEmbedder.name, ThumbnailEmbedder.name])
+    parser.add_argument('--threshold', type=float, default=None,
+                        help="Seuil évalué (défaut FACE_REID_THRESHOLD ou seuil par défaut du descripteur)")
+    parser.add_argument('--max-false-merge', type=float, default=0.001,
+                        help="Taux de fusion d'identités toléré (défaut 0.1 %%)")
+    parser.add_argument('--detector', default='haar', help="Backend de détection des visages")
+    args = parser.parse_args()
+
+    if args.embedder == ONNXFaceEmbedder.name:
+        if not ONNXFaceEmbedder.is_available():
+            print(f"onnxruntime ou modèle de ré-identification introuvable ({get_reid_model_path()})")
+            print("Exportez-le avec: python export_attribute_models.py --reid")
+            sys.exit(1)
+        embedder = ONNXFaceEmbedder()
+    else:
+        embedder = ThumbnailEmbedder()
+
+    threshold = args.threshold
+    if threshold is None:
+        threshold = float(os.getenv('FACE_REID_THRESHOLD', str(embedder.default_threshold)))
+
+    embeddings, labels = load_labelled_embeddings(args.image_dir, embedder, args.detector)
+    if len(np.unique(labels)) < 2:
+        print(f"Au moins deux personnes étiquetées sont nécessaires dans {args.image_dir}")
+        sys.exit(1)
+
+    same, different = pair_similarities(embeddings, labels)
+    rates = evaluate_threshold(same, different, threshold)
+    suggested = suggest_threshold(different, args.max_false_merge)
+
+    print(f"Visages: {len(labels)}, personnes: {len(np.unique(labels))}, descripteur: {embedder.name}")
+    print(f"Même personne:        {describe(same)}")
+    print(f"Personnes différentes: {describe(different)}")
+    print(f"Seuil {threshold:.3f}: fusion d'identités {rates['false_merge_rate'] * 100:.2f} %, "
+          f"ré-identification manquée {rates['missed_reid_rate'] * 100:.2f} %")
+    if suggested is not None:
+        suggested_rates = evaluate_threshold(same, different, suggested)
+        print(f"Seuil suggéré (fusion <= {args.max_false_merge * 100:.2f} %): {suggested:.3f}, "
+              f"ré-identification manquée {suggested_rates['missed_reid_rate'] * 100:.2f} %")
+
+    if rates['false_merge_rate'] > args.max_false_merge:
+        print("Seuil trop permissif: des personnes différentes seraient fusionnées")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
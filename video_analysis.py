@@ -0,0 +1,364 @@
+import cv2
+import tempfile
+import time
+from collections import defaultdict
+from checkpoint import concat_video_segments
+from face_detector import FaceDetector
+
+# Échantillons consécutifs sans détection avant l'expiration d'un track (analyse échantillonnée)
+SAMPLED_PERSISTENCE = 3
+
+
+def format_timestamp(frame_count, fps):
+    """Convertit un numéro de frame en horodatage HH:MM:SS
+    Args:
+        frame_count: Numéro de la frame
+        fps: Cadence de la vidéo
+    Returns:
+        Horodatage formaté
+    """
+    return f"{int(frame_count // fps // 3600):02d}:{int((frame_count // fps) % 3600 // 60):02d}:{int(frame_count // fps % 60):02d}"
+
+
+def interpolate_detections(previous_detections, next_detections, alpha, frame_number, timestamp):
+    """Interpole les détections entre deux frames échantillonnées
+    Args:
+        previous_detections: Détections de l'échantillon précédent
+        next_detections: Détections de l'échantillon suivant
+        alpha: Position relative entre les deux échantillons (0 à 1)
+        frame_number: Numéro de la frame interpolée
+        timestamp: Horodatage de la frame interpolée
+    Returns:
+        Liste des détections interpolées (les visages absents de l'échantillon suivant sont maintenus)
+    """
+    next_by_id = {detection['face_id']: detection for detection in next_detections}
+    interpolated = []
+
+    for detection in previous_detections:
+        item = dict(detection)
+        item['frame_number'] = frame_number
+        item['timestamp'] = timestamp
+
+        next_detection = next_by_id.get(detection['face_id'])
+        if next_detection is not None:
+            item['bbox'] = tuple(
+                int(round(start + (end - start) * alpha))
+                for start, end in zip(detection['bbox'], next_detection['bbox'])
+            )
+        interpolated.append(item)
+
+    return interpolated
+
+
+def compute_sampling_step(sampling_interval, sampling_unit, fps):
+    """Convertit l'intervalle d'échantillonnage demandé en pas de frames
+    Args:
+        sampling_interval: Intervalle (None = toutes les frames)
+        sampling_unit: "frames" ou "millisecondes"
+        fps: Cadence de la vidéo
+    Returns:
+        Pas d'échantillonnage (>= 1)
+    """
+    if not sampling_interval:
+        return 1
+    if sampling_unit == "millisecondes":
+        return max(1, int(round(sampling_interval * fps / 1000)))
+    return max(1, int(sampling_interval))
+
+
+def seek_capture(cap, frame_number):
+    """Positionne la capture sur une frame (avance par grab() si le conteneur ne permet pas le seek)
+    Args:
+        cap: cv2.VideoCapture ouverte
+        frame_number: Frame à atteindre
+    Returns:
+        True si la capture est positionnée sur la frame
+    """
+    if frame_number <= 0:
+        return True
+
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == frame_number:
+        return True
+
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    for _ in range(frame_number):
+        if not cap.grab():
+            return False
+    return True
+
+
+def analyze_video(input_path, detector, analyze_age=True, analyze_gender=True, analyze_emotion=True,
+                  analyze_ethnicity=True, sampling_step=1, interpolate=False, output_path=None,
+                  profiler=None, checkpoint=None, progress_callback=None, render=True):
+    """Analyse une vidéo complète (détection, tracking, annotation)
+
+    Avec un point de reprise, l'état du tracker et les détections sont sauvegardés toutes les
+    checkpoint.interval_frames frames; si un point de reprise existe, l'analyse reprend à la frame
+    sauvegardée au lieu de repartir de la frame 0.
+
+    Sans rendu (render=False), ni annotation ni encodage: seules les détections sont produites,
+    la vidéo annotée peut être générée ensuite par render_annotated_video. Avec interpolation, la
+    vidéo est rendue ainsi après l'analyse (second décodage): les frames entre deux échantillons
+    ne sont jamais gardées en mémoire.
+
+    Args:
+        input_path: Chemin de la vidéo
+        detector: FaceDetector configuré
+        analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity: Attributs analysés
+        sampling_step: Analyse une frame sur sampling_step
+        interpolate: Interpole les détections des frames non analysées dans la vidéo annotée
+        output_path: Vidéo annotée (fichier temporaire si None)
+        profiler: AnalysisProfiler optionnel
+        checkpoint: AnalysisCheckpoint optionnel
+        progress_callback: Fonction (frame_count, total_frames) appelée après chaque frame analysée
+        render: Annote et encode la vidéo pendant l'analyse
+    Returns:
+        Dictionnaire des résultats (output_video_path à None sans rendu)
+    """
+    started_at = time.time()
+    first_frame_latency = None
+
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        raise Exception("Impossible d'ouvrir la vidéo")
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    print(f"Vidéo: {total_frames} frames, {fps} FPS, {width}x{height}")
+
+    interpolate = interpolate and sampling_step > 1
+
+    # Sans interpolation, la vidéo annotée ne contient que les frames échantillonnées
+    output_fps = fps if sampling_step == 1 or interpolate else fps / sampling_step
+    output_path = (output_path or tempfile.mktemp(suffix='_analyzed.mp4')) if render else None
+    fourcc = cv2.VideoWriter.fourcc(*'mp4v')
+
+    if sampling_step > 1:
+        # Chaque frame échantillonnée fait l'objet d'une détection complète
+        detector.detection_interval = 1
+        # Expiration comptée en frames: un pas plus long que la persistance changerait l'identifiant
+        # de chaque visage à chaque échantillon
+        detector.persistence_frames = max(detector.persistence_frames, SAMPLED_PERSISTENCE * sampling_step)
+        print(f"Échantillonnage: 1 frame analysée toutes les {sampling_step} frames")
+        if interpolate and render:
+            print("Interpolation des détections vers la cadence complète pour la vidéo annotée")
+    if not render:
+        print("Mode analytique: vidéo annotée non générée (rendu différé possible)")
+
+    all_detections = []
+    frame_count = 0
+    analyzed_frames = 0
+    segments = []
+
+    state = None
+    deferred_render = False
+    if checkpoint:
+        state, saved_detections = checkpoint.load()
+    if state:
+        detector.load_state(state['detector_state'])
+        all_detections = saved_detections
+        detector.detections = list(saved_detections)
+        frame_count = state['frame_offset']
+        analyzed_frames = state['analyzed_frames']
+        segments = state['segments']
+        # Reprise avec rendu d'une analyse commencée sans rendu: vidéo produite à la fin
+        deferred_render = render and not state.get('rendered', True)
+
+        if not seek_capture(cap, frame_count):
+            cap.release()
+            raise Exception(f"Impossible de repositionner la vidéo à la frame {frame_count}")
+        print(f"Reprise depuis le point de sauvegarde: frame {frame_count}/{total_frames}, "
+              f"{len(all_detections)} détections restaurées")
+
+    # Interpolation: rendu en second passage depuis les détections, comme un rendu différé
+    deferred_render = deferred_render or (render and interpolate)
+
+    out = None
+    if render and not deferred_render:
+        if checkpoint:
+            segments.append(checkpoint.segment_path(len(segments)))
+            out = cv2.VideoWriter(segments[-1], fourcc, output_fps, (width, height))
+        else:
+            out = cv2.VideoWriter(output_path, fourcc, output_fps, (width, height))
+
+    checkpoint_detections_start = len(all_detections)
+    last_checkpoint_frame = frame_count
+
+    print("Début de l'analyse avec système de tracking...")
+    print(f"Détection de nouveaux visages toutes les {detector.detection_interval} frames")
+
+    while True:
+        is_sampled = frame_count % sampling_step == 0
+
+        if is_sampled:
+            ret, frame = cap.read()
+        else:
+            # Frame sautée: avance dans le flux sans décoder les pixels
+            ret, frame = cap.grab(), None
+
+        if not ret:
+            break
+
+        timestamp = format_timestamp(frame_count, fps)
+
+        if is_sampled:
+            if profiler:
+                profiler.start_frame()
+
+            detections = detector.process_frame_with_tracking(
+                frame, frame_count, timestamp,
+                analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity
+            )
+            analyzed_frames += 1
+
+            if detections:
+                all_detections.extend(detections)
+                detector.detections.extend(detections)
+
+                if frame_count % detector.detection_interval == 0:
+                    print(f"Frame {frame_count}: {len(detections)} visage(s) tracké(s)")
+
+            if out is not None:
+                out.write(detector.draw_annotations(
+                    frame, detections,
+                    analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity
+                ))
+
+            if profiler:
+                profiler.end_frame()
+
+            if first_frame_latency is None:
+                first_frame_latency = time.time() - started_at
+                print(f"Première frame analysée en {first_frame_latency * 1000:.0f} ms")
+
+        frame_count += 1
+
+        if is_sampled:
+            if progress_callback:
+                progress_callback(frame_count, total_frames)
+
+            if checkpoint and frame_count - last_checkpoint_frame >= checkpoint.interval_frames:
+                if out is not None:
+                    out.release()
+                checkpoint.save({
+                    'frame_offset': frame_count,
+                    'analyzed_frames': analyzed_frames,
+                    'detections_count': len(all_detections),
+                    'detector_state': detector.get_state(),
+                    'segments': list(segments),
+                    'rendered': out is not None
+                }, all_detections[checkpoint_detections_start:])
+                checkpoint_detections_start = len(all_detections)
+                last_checkpoint_frame = frame_count
+                print(f"Point de reprise sauvegardé: frame {frame_count}/{total_frames}")
+
+                if out is not None:
+                    segments.append(checkpoint.segment_path(len(segments)))
+                    out = cv2.VideoWriter(segments[-1], fourcc, output_fps, (width, height))
+
+    cap.release()
+    if out is not None:
+        out.release()
+
+    if deferred_render:
+        render_annotated_video(
+            input_path, all_detections, analyze_age, analyze_gender, analyze_emotion, analyze_ethnicity,
+            sampling_step, interpolate, output_path
+        )
+    elif checkpoint and render:
+        concat_video_segments(segments, output_path, output_fps, (width, height))
+    if checkpoint:
+        checkpoint.clear()
+
+    print(f"Analyse terminée. {len(all_detections)} détections au total")
+    if detector.reid_gallery is not None and detector.reid_gallery.matches:
+        print(f"Ré-identification: {detector.reid_gallery.matches} visage(s) revenu(s) sous leur identifiant")
+
+    return {
+        'detections': all_detections,
+        'detector': detector,
+        'output_video_path': output_path,
+        'total_frames': total_frames,
+        'analyzed_frames': analyzed_frames,
+        'sampling_step': sampling_step,
+        'fps': fps,
+        'resumed_from': state['frame_offset'] if state else None,
+        'first_frame_latency': first_frame_latency
+    }
+
+
+def render_annotated_video(input_path, detections, show_age=True, show_gender=True, show_emotion=True,
+                           show_ethnicity=True, sampling_step=1, interpolate=False, output_path=None,
+                           progress_callback=None):
+    """Produit la vidéo annotée à partir de détections déjà calculées, sans nouvelle analyse
+
+    Même sortie que le rendu pendant l'analyse: avec échantillonnage, seules les frames analysées
+    sont écrites, sauf interpolation vers la cadence complète.
+
+    Args:
+        input_path: Chemin de la vidéo d'origine
+        detections: Détections de l'analyse (frame_number, bbox, attributs)
+        show_age, show_gender, show_emotion, show_ethnicity: Attributs affichés
+        sampling_step: Pas d'échantillonnage de l'analyse
+        interpolate: Interpole les détections des frames non analysées
+        output_path: Vidéo annotée (fichier temporaire si None)
+        progress_callback: Fonction (frame_count, total_frames) appelée après chaque frame écrite
+    Returns:
+        Chemin de la vidéo annotée
+    """
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        raise Exception("Impossible d'ouvrir la vidéo")
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    interpolate = interpolate and sampling_step > 1
+    output_fps = fps if sampling_step == 1 or interpolate else fps / sampling_step
+    output_path = output_path or tempfile.mktemp(suffix='_analyzed.mp4')
+    out = cv2.VideoWriter(output_path, cv2.VideoWriter.fourcc(*'mp4v'), output_fps, (width, height))
+
+    by_frame = defaultdict(list)
+    for detection in detections:
+        by_frame[detection['frame_number']].append(detection)
+    flags = (show_age, show_gender, show_emotion, show_ethnicity)
+
+    frame_count = 0
+    while True:
+        is_sampled = frame_count % sampling_step == 0
+
+        if is_sampled or interpolate:
+            ret, frame = cap.read()
+        else:
+            ret, frame = cap.grab(), None
+        if not ret:
+            break
+
+        if is_sampled:
+            frame_detections = by_frame.get(frame_count, [])
+        elif interpolate:
+            previous_number = frame_count - frame_count % sampling_step
+            # Sans échantillon suivant (fin de vidéo), les dernières détections sont maintenues
+            frame_detections = interpolate_detections(
+                by_frame.get(previous_number, []), by_frame.get(previous_number + sampling_step, []),
+                (frame_count - previous_number) / sampling_step,
+                frame_count, format_timestamp(frame_count, fps)
+            )
+
+        if frame is not None:
+            out.write(FaceDetector.draw_annotations(frame, frame_detections, *flags))
+            if progress_callback:
+                progress_callback(frame_count + 1, total_frames)
+
+        frame_count += 1
+
+    cap.release()
+    out.release()
+    print(f"Vidéo annotée générée: {frame_count} frames lues ({output_path})")
+    return output_path